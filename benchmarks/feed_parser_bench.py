@@ -0,0 +1,123 @@
+"""Compare the streaming lxml feed parser with the old BeautifulSoup path.
+
+Usage: python3 benchmarks/feed_parser_bench.py [--items 5000] [--repeat 5]
+"""
+from argparse import ArgumentParser
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from sys import modules
+from time import perf_counter
+
+from bs4 import BeautifulSoup as bs
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Load the parser by path: importing it through the `bot` package would run
+# the bot bootstrap (config checks, database and Telegram client).
+def load(name: str):
+    spec = spec_from_file_location(name, ROOT / f"bot/helper/rss_helper/{name}.py")
+    module = module_from_spec(spec)
+    modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+feed_parser = load("feed_parser")
+seen = load("seen")
+
+DESCRIPTION = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20
+
+
+def build_rss(count: int) -> bytes:
+    items = "".join(
+        f"<item><title>Headline {i}</title><link>https://example.com/{i}</link>"
+        f"<guid>https://example.com/{i}</guid><pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate>"
+        f'<enclosure url="https://img.example.com/{i}.jpg?w=800" type="image/jpeg" length="1"/>'
+        f"<description><![CDATA[<p>{DESCRIPTION}</p>]]></description></item>"
+        for i in range(count)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0" '
+        'xmlns:media="http://search.yahoo.com/mrss/"><channel><title>Bench</title>'
+        f"<ttl>30</ttl>{items}</channel></rss>"
+    ).encode()
+
+
+def build_atom(count: int) -> bytes:
+    entries = "".join(
+        f"<entry><id>urn:bench:{i}</id><title>Entry {i}</title>"
+        f'<link href="https://example.com/{i}"/><updated>2024-01-01T00:00:00Z</updated>'
+        f'<content type="html">{DESCRIPTION}</content></entry>'
+        for i in range(count)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<feed xmlns="http://www.w3.org/2005/Atom"><title>Bench</title>{entries}</feed>'
+    ).encode()
+
+
+def soup_path(content: bytes):
+    # Mirrors the previous fetch_rss_feed + process_rss_feed extraction.
+    soup = bs(content.decode(), features="xml")
+    items = []
+    for item in soup.find_all("item")[:15]:
+        guid_tag = item.find("guid")
+        link_tag = item.find("link")
+        title_tag = item.find("title")
+        enclosure = item.find("enclosure")
+        image = enclosure.get("url") if enclosure else None
+        if not image:
+            media = item.find("media:content") or item.find("media:thumbnail")
+            image = media.get("url") if media else None
+        items.append((
+            guid_tag.get_text(strip=True) if guid_tag else link_tag.get_text(strip=True),
+            title_tag.get_text(strip=True) if title_tag else "",
+            image,
+        ))
+    if not items:
+        for entry in soup.find_all("entry")[:15]:
+            id_tag = entry.find("id")
+            link_tag = entry.find("link")
+            items.append((
+                id_tag.get_text(strip=True) if id_tag else "",
+                entry.find("title").get_text(strip=True),
+                link_tag.get("href") if link_tag else "",
+            ))
+    return items
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, content, guid in (
+        ("rss", build_rss(args.items), "https://example.com/{}"),
+        ("atom", build_atom(args.items), "urn:bench:{}"),
+    ):
+        # The steady state of a poll: every item in the window was seen before.
+        known = seen.SeenGuids()
+        known.remember([guid.format(i) for i in range(feed_parser.ITEM_LIMIT)])
+        size = len(content) / 1048576
+        soup = best_of(lambda: soup_path(content), args.repeat)
+        stream = best_of(lambda: feed_parser.parse_feed(content), args.repeat)
+        all_seen = best_of(lambda: feed_parser.parse_feed(content, known=known.__contains__), args.repeat)
+        print(
+            f"{name:5} {args.items} items, {size:.1f}MB | soup {soup * 1000:8.1f}ms | "
+            f"iterparse {stream * 1000:6.2f}ms ({soup / stream:.0f}x) | "
+            f"all seen {all_seen * 1000:6.2f}ms ({soup / all_seen:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Time the RSS lookups that still reach MongoDB with and without the indexes.
+
+Subscriptions, settings and groups are read from memory, so what is left is
+feed data by feed_id, the delivery queue claim and the lease check.
+
+Needs a reachable MongoDB; everything goes to a scratch database that is
+dropped afterwards.
+
+Usage: python3 benchmarks/mongo_index_bench.py [--db-url mongodb://localhost:27017]
+       [--feeds 100000] [--users 1000] [--repeat 200]
+"""
+from argparse import ArgumentParser
+from asyncio import run
+from datetime import datetime, timedelta
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from random import Random
+from statistics import median
+from time import perf_counter
+
+from pymongo import AsyncMongoClient
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Load by path so the bot bootstrap does not run.
+spec = spec_from_file_location("indexes", ROOT / "bot/helper/rss_helper/indexes.py")
+indexes = module_from_spec(spec)
+spec.loader.exec_module(indexes)
+
+BENCH_DATABASE = "rss_index_bench"
+
+
+async def populate(database, feeds: int, users: int):
+    now = datetime.utcnow()
+    feed_docs, data_docs, queue_docs, lease_docs = [], [], [], []
+    for i in range(feeds):
+        user_id = i % users
+        feed_id = f"feed_{user_id}_{i}"
+        feed_docs.append({
+            "_id": feed_id,
+            "user_id": user_id,
+            "url": f"https://host{i % 500}.example.com/feed/{i}.xml",
+            "title": f"Feed {i:06d}",
+            "enabled": i % 7 != 0,
+            "created_at": now - timedelta(minutes=i),
+        })
+        data_docs.append({
+            "feed_id": feed_id,
+            "last_guid": f"https://host{i % 500}.example.com/post/{i}",
+            "total_items": i % 50,
+            "check_count": i % 300,
+        })
+        # Most of the queue is claimed by a running drain.
+        queue_docs.append({
+            "chat_id": user_id,
+            "text": f"Post {i}",
+            "created_at": now,
+            "claimed_until": now + timedelta(hours=1) if i % 100 else now - timedelta(minutes=1),
+        })
+        lease_docs.append({
+            "_id": f"https://host{i % 500}.example.com/feed/{i}.xml",
+            "lease_owner": f"worker{i % 4}",
+            "lease_until": now + timedelta(minutes=5),
+        })
+    for start in range(0, feeds, 10000):
+        await database.rss_feeds.insert_many(feed_docs[start:start + 10000], ordered=False)
+        await database.rss_feed_data.insert_many(data_docs[start:start + 10000], ordered=False)
+        await database.rss_delivery_queue.insert_many(queue_docs[start:start + 10000], ordered=False)
+        await database.rss_leases.insert_many(lease_docs[start:start + 10000], ordered=False)
+
+
+def lookups(rng: Random, feeds: int, users: int):
+    i = rng.randrange(feeds)
+    user_id = i % users
+    urls = [f"https://host{j % 500}.example.com/feed/{j}.xml" for j in range(i, min(i + 20, feeds))]
+    return [
+        ("feed data by feed_id", "rss_feed_data", {"feed_id": f"feed_{user_id}_{i}"}, None),
+        ("outbox claim", "rss_delivery_queue", {"claimed_until": {"$lte": datetime.utcnow()}}, [("_id", 1)]),
+        ("held leases", "rss_leases",
+         {"_id": {"$in": urls}, "lease_owner": "worker0", "lease_until": {"$gt": datetime.utcnow()}}, None),
+    ]
+
+
+async def measure(database, args) -> dict:
+    rng = Random(7)
+    timings = {}
+    for _ in range(args.repeat):
+        for label, name, query, sort in lookups(rng, args.feeds, args.users):
+            cursor = database[name].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            if name == "rss_delivery_queue":
+                cursor = cursor.limit(500)
+            start = perf_counter()
+            await cursor.to_list(None)
+            timings.setdefault(label, []).append(perf_counter() - start)
+    return {label: median(values) * 1000 for label, values in timings.items()}
+
+
+async def main(args):
+    client = AsyncMongoClient(args.db_url)
+    try:
+        await client.drop_database(BENCH_DATABASE)
+        database = client[BENCH_DATABASE]
+        start = perf_counter()
+        await populate(database, args.feeds, args.users)
+        print(f"Inserted {args.feeds} feeds for {args.users} users in {perf_counter() - start:.1f}s")
+
+        before = await measure(database, args)
+        await indexes.ensure_indexes(database)
+        problems = await indexes.verify_indexes(database)
+        after = await measure(database, args)
+
+        print(f"{'lookup':<26}{'no index (ms)':>16}{'indexed (ms)':>16}{'speedup':>10}")
+        for label in before:
+            print(f"{label:<26}{before[label]:>16.3f}{after[label]:>16.3f}{before[label] / after[label]:>9.0f}x")
+        for name, query, sort, stages in problems:
+            print(f"NOT INDEXED: {name} {query} sort={sort}: {' > '.join(map(str, stages))}")
+        print(f"explain: {len(indexes.QUERIES) - len(problems)}/{len(indexes.QUERIES)} queries use an index")
+    finally:
+        await client.drop_database(BENCH_DATABASE)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--db-url", default="mongodb://localhost:27017")
+    parser.add_argument("--feeds", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    run(main(parser.parse_args()))
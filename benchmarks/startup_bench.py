@@ -0,0 +1,86 @@
+"""Measure what lazy module loading saves at startup.
+
+Each run is a fresh interpreter that bootstraps the bot package and then
+times the real import of bot.modules, reporting wall time and peak RSS on
+top of the bootstrap. "lazy" is the import as startup does it, "eager" also
+loads every module of the manifest, as startup did before, and each module
+row is "lazy" plus loading that module. Run it from a checkout with a
+working config.env.
+
+Usage: python3 benchmarks/startup_bench.py [--repeat 3]
+"""
+from argparse import ArgumentParser
+from ast import parse
+from pathlib import Path
+from statistics import median
+from subprocess import run
+from sys import executable
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ROOT / "bot/modules"
+
+# Runs in the child: bootstrap `bot`, then import bot.modules and load the
+# lazy modules named in argv ("*" for all); print seconds and peak RSS (KiB).
+PROBE = """
+import sys
+from resource import RUSAGE_SELF, getrusage
+from time import perf_counter
+# Bootstrap the way the RSS worker does, so the child neither logs in to
+# Telegram nor starts the web server.
+sys.orig_argv.append("bot.rss_worker")
+import bot
+baseline = getrusage(RUSAGE_SELF).ru_maxrss
+start = perf_counter()
+import bot.modules
+names = bot.modules.LAZY_MODULES if sys.argv[1:] == ["*"] else sys.argv[1:]
+for name in names:
+    bot.modules.LAZY_MODULES[name].load()
+print(perf_counter() - start, getrusage(RUSAGE_SELF).ru_maxrss - baseline)
+"""
+
+
+def lazy_module_names() -> list:
+    # The manifest keys, read without importing bot.modules.
+    for node in parse((MODULES / "__init__.py").read_text()).body:
+        targets = getattr(node, "targets", [])
+        if any(getattr(target, "id", None) == "MANIFEST" for target in targets):
+            return [key.value for key in node.value.keys]
+    return []
+
+
+def measure(names, repeat: int):
+    times, rss = [], []
+    for _ in range(repeat):
+        result = run([executable, "-c", PROBE, *names], capture_output=True, text=True, cwd=ROOT)
+        if result.returncode:
+            error = result.stderr.strip().splitlines()
+            return error[-1] if error else f"exit code {result.returncode}"
+        elapsed, peak = result.stdout.split()[-2:]
+        times.append(float(elapsed))
+        rss.append(int(peak))
+    return median(times), median(rss)
+
+
+def report(label: str, measured):
+    if isinstance(measured, str):
+        print(f"{label:<12} failed: {measured}")
+    else:
+        print(f"{label:<12} {measured[0] * 1000:>9.1f} ms {measured[1] / 1024:>9.1f} MiB")
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lazy = measure([], args.repeat)
+    print(f"{'module':<12} {'import':>12} {'peak rss':>13}")
+    for name in lazy_module_names():
+        report(name, measure([name], args.repeat))
+    print()
+    report("eager", measure(["*"], args.repeat))
+    report("lazy", lazy)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,11 +15,13 @@ from logging import (
     warning as log_warning,
     ERROR,
 )
+from multiprocessing import parent_process
 from os import remove, path as ospath, environ
 from pymongo import AsyncMongoClient
 from pyrogram import Client as tgClient
 from socket import setdefaulttimeout
 from subprocess import Popen, run
+from sys import orig_argv
 from time import time
 from tzlocal import get_localzone
 
@@ -45,6 +47,13 @@ basicConfig(
 
 LOGGER = getLogger(__name__)
 
+# `python -m bot.rss_worker` shares this config but runs neither the
+# Telegram client nor the web server.
+IS_RSS_WORKER = "bot.rss_worker" in orig_argv
+# Processes of the "cpu" executor import this package to unpickle their jobs;
+# they must not log in to Telegram or start the web server either.
+IS_POOL_WORKER = parent_process() is not None
+
 load_dotenv("config.env", override=True)
 
 
@@ -130,6 +139,18 @@ UPSTREAM_BRANCH = environ.get("UPSTREAM_BRANCH", "")
 if len(UPSTREAM_BRANCH) == 0:
     UPSTREAM_BRANCH = "main"
 
+RSS_MAX_BODY_SIZE = environ.get("RSS_MAX_BODY_SIZE", "")
+if len(RSS_MAX_BODY_SIZE) == 0:
+    RSS_MAX_BODY_SIZE = 10 * 1024 * 1024
+else:
+    RSS_MAX_BODY_SIZE = int(RSS_MAX_BODY_SIZE)
+
+RSS_EXTERNAL_WORKER = environ.get("RSS_EXTERNAL_WORKER", "")
+RSS_EXTERNAL_WORKER = RSS_EXTERNAL_WORKER.lower() == "true"
+
+RCLONE_RCD = environ.get("RCLONE_RCD", "")
+RCLONE_RCD = RCLONE_RCD.lower() != "false"
+
 BASE_URL = environ.get("BASE_URL", "").rstrip("/")
 if len(BASE_URL) == 0:
     log_warning("BASE_URL not provided!")
@@ -141,6 +162,9 @@ config_dict = {
     "DATABASE_URL": DATABASE_URL,
     "DOWNLOAD_DIR": DOWNLOAD_DIR,
     "OWNER_ID": OWNER_ID,
+    "RCLONE_RCD": RCLONE_RCD,
+    "RSS_EXTERNAL_WORKER": RSS_EXTERNAL_WORKER,
+    "RSS_MAX_BODY_SIZE": RSS_MAX_BODY_SIZE,
     "SUDO_USERS": SUDO_USERS,
     "TELEGRAM_API": TELEGRAM_API,
     "TELEGRAM_HASH": TELEGRAM_HASH,
@@ -149,7 +173,7 @@ config_dict = {
 }
 
 PORT = int(environ.get("PORT", 80))
-if BASE_URL:
+if BASE_URL and not IS_RSS_WORKER and not IS_POOL_WORKER:
     Popen(
         f"gunicorn web.wserver:app --bind 0.0.0.0:{PORT} --worker-class gevent",
         shell=True,
@@ -170,7 +194,9 @@ bot = tgClient(
     bot_token=BOT_TOKEN,
     workers=1000,
     max_concurrent_transmissions=10,
-).start()
-BOT_NAME = bot.me.username
+)
+if not IS_RSS_WORKER and not IS_POOL_WORKER:
+    bot.start()
+    BOT_NAME = bot.me.username
 
 scheduler = AsyncIOScheduler(event_loop=bot_loop)
@@ -1,8 +1,8 @@
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath, remove
 from asyncio import gather, create_subprocess_exec, sleep
+from html import escape
 from os import execl as osexecl
-from psutil import disk_usage, cpu_percent, swap_memory, cpu_count, virtual_memory, net_io_counters, boot_time
 from pyrogram.filters import command, regex
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 from signal import signal, SIGINT
@@ -10,8 +10,11 @@ from sys import executable
 from time import time
 
 from bot import bot, bot_loop, bot_start_time, LOGGER, DATABASE_URL
-from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
+from bot.helper.ext_utils.bot_utils import EXECUTORS, sync_to_async
 from bot.helper.ext_utils.files_utils import clean_all, exit_clean_up, get_readable_file_size, get_readable_time
+from bot.helper.ext_utils.loop_monitor import loop_monitor
+from bot.helper.ext_utils.system_utils import system_sampler
+from bot.helper.telegram_helper.auth_store import auth_store
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.filters import CustomFilters
@@ -19,37 +22,63 @@ from bot.helper.telegram_helper.message_utils import send_message, edit_message,
 from bot.modules import *
 
 async def stats(_, message):
-    if await aiopath.exists(".git"):
-        last_commit = await cmd_exec(
-            "git log -1 --date=short --pretty=format:'%cd <b>From</b> %cr'", True
-        )
-        last_commit = last_commit[0]
-    else:
-        last_commit = "No UPSTREAM_REPO"
-    total, used, free, disk = disk_usage("/")
-    swap = swap_memory()
-    memory = virtual_memory()
+    snapshot = system_sampler.snapshot or await system_sampler.sample()
+    total, used, free, disk = snapshot.disk
+    swap = snapshot.swap
+    memory = snapshot.memory
     stats = (
-        f"<b>Commit Date:</b> {last_commit}\n\n"
+        f"<b>Commit Date:</b> {snapshot.last_commit}\n\n"
         f"<b>Bot Uptime:</b> {get_readable_time(time() - bot_start_time)}\n"
-        f"<b>OS Uptime:</b> {get_readable_time(time() - boot_time())}\n\n"
+        f"<b>OS Uptime:</b> {get_readable_time(time() - snapshot.boot_time)}\n\n"
         f"<b>Total Disk Space:</b> {get_readable_file_size(total)}\n"
         f"<b>Used:</b> {get_readable_file_size(used)} | <b>Free:</b> {get_readable_file_size(free)}\n\n"
-        f"<b>Upload:</b> {get_readable_file_size(net_io_counters().bytes_sent)}\n"
-        f"<b>Download:</b> {get_readable_file_size(net_io_counters().bytes_recv)}\n\n"
-        f"<b>CPU:</b> {cpu_percent(interval=0.5)}%\n"
+        f"<b>Upload:</b> {get_readable_file_size(snapshot.bytes_sent)} | "
+        f"{get_readable_file_size(snapshot.upload_rate)}/s\n"
+        f"<b>Download:</b> {get_readable_file_size(snapshot.bytes_recv)} | "
+        f"{get_readable_file_size(snapshot.download_rate)}/s\n\n"
+        f"<b>CPU:</b> {snapshot.cpu}%\n"
         f"<b>RAM:</b> {memory.percent}%\n"
         f"<b>DISK:</b> {disk}%\n\n"
-        f"<b>Physical Cores:</b> {cpu_count(logical=False)}\n"
-        f"<b>Total Cores:</b> {cpu_count(logical=True)}\n\n"
+        f"<b>Physical Cores:</b> {snapshot.cpu_physical}\n"
+        f"<b>Total Cores:</b> {snapshot.cpu_logical}\n\n"
         f"<b>SWAP:</b> {get_readable_file_size(swap.total)} | <b>Used:</b> {swap.percent}%\n"
         f"<b>Memory Total:</b> {get_readable_file_size(memory.total)}\n"
         f"<b>Memory Free:</b> {get_readable_file_size(memory.available)}\n"
-        f"<b>Memory Used:</b> {get_readable_file_size(memory.used)}\n"
+        f"<b>Memory Used:</b> {get_readable_file_size(memory.used)}\n\n"
+        f"<b>Executors:</b>\n"
     )
+    for name, executor in EXECUTORS.items():
+        executor_stats = executor.stats()
+        stats += (
+            f"<b>{name}:</b> {executor_stats['pending'] - executor_stats['queued']}/{executor_stats['workers']} busy | "
+            f"<b>Queued:</b> {executor_stats['queued']} | <b>Peak:</b> {executor_stats['peak_pending']}\n"
+        )
     await send_message(message, stats)
 
 
+async def loop_stats(_, message):
+    snapshot = loop_monitor.snapshot()
+    peak = max(snapshot["histogram"].values()) or 1
+    histogram = "\n".join(
+        f"<code>{label:>9} {'█' * (count * 20 // peak):<20} {count}</code>"
+        for label, count in snapshot["histogram"].items()
+    )
+    stalls = "\n\n".join(
+        f"<b>{escape(stall['handler'])}</b> {stall['duration_ms'] if stall['duration_ms'] is not None else '...'}ms, "
+        f"{get_readable_time(time() - stall['at']) or '0s'} ago\n"
+        f"<code>{escape(chr(10).join(stall['stack'][-4:]))}</code>"
+        for stall in reversed(snapshot["stalls"][-5:])
+    )
+    msg = (
+        f"<b>Loop Lag</b> ({snapshot['samples']} samples)\n"
+        f"<b>Mean:</b> {snapshot['mean_ms']}ms | <b>p50:</b> {snapshot['p50_ms']}ms | "
+        f"<b>p99:</b> {snapshot['p99_ms']}ms | <b>Max:</b> {snapshot['max_ms']}ms\n\n"
+        f"{histogram}\n\n"
+        f"<b>Recent Stalls:</b>\n{stalls or 'None'}"
+    )
+    await send_message(message, msg)
+
+
 async def start(client, message):
     if await CustomFilters.authorized(client, message):
         start_string = f"""
@@ -130,6 +159,7 @@ async def log(_, message):
 help_string = f"""
 NOTE: Try each command without any argument to see more detalis.
 /{BotCommands.StatsCommand}: Show stats of the machine where the bot is hosted in.
+/{BotCommands.LoopStatsCommand}: Show event loop lag and the handlers that blocked it (Only Owner & Sudo).
 /{BotCommands.PingCommand}: Check how long it takes to Ping the Bot (Only Owner & Sudo).
 /{BotCommands.AuthorizeCommand}: Authorize a chat or a user to use the bot (Only Owner & Sudo).
 /{BotCommands.UnAuthorizeCommand}: Unauthorize a chat or a user to use the bot (Only Owner & Sudo).
@@ -141,6 +171,7 @@ NOTE: Try each command without any argument to see more detalis.
 /{BotCommands.AExecCommand}: Exec async functions (Only Owner).
 /{BotCommands.ExecCommand}: Exec sync functions (Only Owner).
 /{BotCommands.ClearLocalsCommand}: Clear {BotCommands.AExecCommand} or {BotCommands.ExecCommand} locals (Only Owner).
+/{BotCommands.RssStatsCommand}: Show RSS cycle timings and the slowest feeds (Only Owner).
 """
 
 
@@ -178,7 +209,10 @@ async def restart_notification():
 async def main():
     await gather(
         restart_notification(),
+        auth_store.load(),
     )
+    system_sampler.start()
+    loop_monitor.start()
 
     bot.add_handler(MessageHandler(start, filters=command(BotCommands.StartCommand)))
     bot.add_handler(
@@ -212,6 +246,11 @@ async def main():
             stats, filters=command(BotCommands.StatsCommand) & CustomFilters.authorized
         )
     )
+    bot.add_handler(
+        MessageHandler(
+            loop_stats, filters=command(BotCommands.LoopStatsCommand) & CustomFilters.sudo
+        )
+    )
     LOGGER.info("Bot Started!")
     signal(SIGINT, exit_clean_up)
 
@@ -6,13 +6,83 @@ from asyncio import (
     sleep,
 )
 from asyncio.subprocess import PIPE
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from functools import partial, wraps
+from multiprocessing import get_context
+from os import cpu_count
 
 from bot import user_data, config_dict, bot_loop
 from bot.helper.telegram_helper.button_build import ButtonMaker
 
-THREADPOOL = ThreadPoolExecutor(max_workers=1000)
+
+class NamedExecutor:
+    """A bounded pool for one kind of blocking work.
+
+    `pending` counts jobs submitted and not finished yet; whatever is beyond
+    `max_workers` is waiting in the pool's queue. Process pools are created
+    on first use and rebuilt if a worker dies. By then this process runs
+    the event loop, Mongo and the thread pools, so their workers come from a
+    forkserver rather than a fork of it, which could inherit a lock some
+    other thread was holding.
+    """
+
+    def __init__(self, name, max_workers, processes=False):
+        self.name = name
+        self.max_workers = max_workers
+        self.processes = processes
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self._executor = None
+
+    @property
+    def queued(self):
+        return max(self.pending - self.max_workers, 0)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=get_context("forkserver")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+        return self._executor
+
+    def _done(self, future):
+        self.pending -= 1
+        self.completed += 1
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._executor = None
+
+    def run(self, func):
+        future = bot_loop.run_in_executor(self._get_executor(), func)
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        future.add_done_callback(self._done)
+        return future
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "queued": self.queued,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+        }
+
+
+# io: blocking network SDKs (googleapiclient, OAuth), the default.
+# disk: filesystem walks and stat-heavy work.
+# cpu: parsing and image work, in separate processes; jobs must pickle.
+EXECUTORS = {
+    "io": NamedExecutor("io", 16),
+    "disk": NamedExecutor("disk", 4),
+    "cpu": NamedExecutor("cpu", max(cpu_count() or 1, 2), processes=True),
+}
 
 
 class setInterval:
@@ -89,9 +159,9 @@ def new_task(func):
     return wrapper
 
 
-async def sync_to_async(func, *args, wait=True, **kwargs):
+async def sync_to_async(func, *args, wait=True, executor="io", **kwargs):
     pfunc = partial(func, *args, **kwargs)
-    future = bot_loop.run_in_executor(THREADPOOL, pfunc)
+    future = EXECUTORS[executor].run(pfunc)
     return await future if wait else future
 
 
@@ -25,24 +25,27 @@ def exit_clean_up(signal, frame):
         LOGGER.info("Please wait a while cleaning up")
         close_db()
         clean_all()
-        srun(["pkill", "-9", "-f", "ffmpeg"])
+        srun(["pkill", "-9", "-f", "ffmpeg|rclone rcd"])
         sexit(0)
     except KeyboardInterrupt:
         LOGGER.warning("Force Exiting before the cleanup finishes!")
         sexit(1)
 
 
-async def get_path_size(path):
-    if await aiopath.isfile(path):
-        return await aiopath.getsize(path)
+def _walk_size(path):
     total_size = 0
-    for root, _, files in await sync_to_async(walk, path):
+    for root, _, files in walk(path):
         for f in files:
-            abs_path = ospath.join(root, f)
-            total_size += await aiopath.getsize(abs_path)
+            total_size += ospath.getsize(ospath.join(root, f))
     return total_size
 
 
+async def get_path_size(path):
+    if await aiopath.isfile(path):
+        return await aiopath.getsize(path)
+    return await sync_to_async(_walk_size, path, executor="disk")
+
+
 def get_mime_type(file_path):
     mime = Magic(mime=True)
     mime_type = mime.from_file(file_path)
@@ -1,4 +1,5 @@
 from re import match as re_match
+from urllib.parse import urlsplit, urlunsplit
 
 
 def is_magnet(url: str):
@@ -51,3 +52,22 @@ def is_gdrive_id(id_: str):
 
 def get_mega_link_type(url: str):
     return "folder" if "folder" in url or "/#F!" in url else "file"
+
+
+def normalize_url(url: str):
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username
+        if parts.password:
+            userinfo += f":{parts.password}"
+        host = f"{userinfo}@{host}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
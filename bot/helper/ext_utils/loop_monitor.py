@@ -0,0 +1,152 @@
+from aiofiles import open as aiopen
+from asyncio import sleep
+from collections import deque
+from json import dumps
+from os import path as ospath
+from sys import _current_frames
+from threading import Thread, get_ident
+from time import monotonic, sleep as thread_sleep, time
+from traceback import extract_stack
+
+from bot import bot_loop, LOGGER
+from bot.helper.ext_utils.bot_utils import setInterval
+
+HEARTBEAT = 0.1
+# The watchdog captures a stack once the loop is this late (seconds).
+STALL_THRESHOLD = 0.25
+LAG_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_STALLS = 20
+STACK_DEPTH = 12
+SNAPSHOT_FILE = "loop_stats.json"
+SNAPSHOT_INTERVAL = 30
+
+
+def _handler_name(stack) -> str:
+    # The outermost frame inside bot/modules is the handler that was
+    # running; anything else from this package is the next best guess.
+    package = ospath.dirname(ospath.dirname(ospath.dirname(ospath.abspath(__file__))))
+    ours = [frame for frame in stack if frame.filename.startswith(package)]
+    for frame in ours:
+        if f"{ospath.sep}modules{ospath.sep}" in frame.filename:
+            return f"{ospath.basename(frame.filename)[:-3]}.{frame.name}"
+    if ours:
+        return f"{ospath.basename(ours[-1].filename)[:-3]}.{ours[-1].name}"
+    return stack[-1].name if stack else "unknown"
+
+
+class LoopMonitor:
+    """Measures how late bot_loop runs its callbacks.
+
+    A heartbeat task sleeps HEARTBEAT seconds and records how much later than
+    that it woke up into a histogram of LAG_BUCKETS milliseconds. A watchdog
+    thread notices when the heartbeat is overdue and captures the loop
+    thread's stack while the blocking code is still running, so each stall is
+    kept with the handler that caused it.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LAG_BUCKETS) + 1)
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self.started_at = None
+        self._beat = monotonic()
+        self._loop_thread = None
+        self._stall = None
+
+    def start(self):
+        if self.started_at is not None:
+            return
+        self.started_at = time()
+        bot_loop.create_task(self._heartbeat())
+        Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+        setInterval(SNAPSHOT_INTERVAL, self.write_snapshot)
+
+    async def _heartbeat(self):
+        self._loop_thread = get_ident()
+        while True:
+            start_time = monotonic()
+            await sleep(HEARTBEAT)
+            now = monotonic()
+            self._beat = now
+            self._record(max(now - start_time - HEARTBEAT, 0) * 1000)
+
+    def _record(self, lag: float):
+        index = 0
+        while index < len(LAG_BUCKETS) and lag > LAG_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        stall, self._stall = self._stall, None
+        if stall is not None:
+            stall["duration_ms"] = round(lag)
+            LOGGER.warning(f"Event loop blocked for {lag:.0f}ms in {stall['handler']}")
+
+    def _watchdog(self):
+        while True:
+            thread_sleep(STALL_THRESHOLD / 2)
+            if self._loop_thread is None or self._stall is not None:
+                continue
+            beat = self._beat
+            if monotonic() - beat < HEARTBEAT + STALL_THRESHOLD:
+                continue
+            frame = _current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = extract_stack(frame)
+            del frame
+            if self._beat != beat:
+                # The loop caught up while the stack was being read.
+                continue
+            self._stall = {
+                "at": time(),
+                "handler": _handler_name(stack),
+                "duration_ms": None,
+                "stack": [
+                    f"{ospath.basename(entry.filename)}:{entry.lineno} {entry.name}"
+                    for entry in stack[-STACK_DEPTH:]
+                ],
+            }
+            self.stalls.append(self._stall)
+
+    def quantile(self, fraction: float):
+        """Upper bound (ms) of the bucket holding the given fraction of samples."""
+        if not self.samples:
+            return 0
+        target = fraction * self.samples
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                if index < len(LAG_BUCKETS):
+                    return min(LAG_BUCKETS[index], round(self.max_lag))
+                return round(self.max_lag)
+        return round(self.max_lag)
+
+    def snapshot(self) -> dict:
+        labels = [f"<={bound}ms" for bound in LAG_BUCKETS] + [f">{LAG_BUCKETS[-1]}ms"]
+        return {
+            "started_at": self.started_at,
+            "taken_at": time(),
+            "samples": self.samples,
+            "mean_ms": round(self.total_lag / self.samples, 2) if self.samples else 0,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_lag),
+            "histogram": dict(zip(labels, self.counts)),
+            "stalls": list(self.stalls),
+        }
+
+    async def write_snapshot(self):
+        # The web server runs in its own process and serves this file.
+        try:
+            async with aiopen(SNAPSHOT_FILE, "w") as f:
+                await f.write(dumps(self.snapshot()))
+        except Exception as e:
+            LOGGER.error(f"Could not write loop stats: {e}")
+
+
+loop_monitor = LoopMonitor()
@@ -12,6 +12,10 @@ from bot.helper.ext_utils.bot_utils import cmd_exec
 from bot.helper.ext_utils.bot_utils import sync_to_async
 
 
+def _save_thumb(photo_dir, des_dir):
+    Image.open(photo_dir).convert("RGB").save(des_dir, "JPEG")
+
+
 async def createThumb(msg, _id=""):
     if not _id:
         _id = msg.id
@@ -19,7 +23,7 @@ async def createThumb(msg, _id=""):
     await makedirs(path, exist_ok=True)
     photo_dir = await msg.download()
     des_dir = f"{path}{_id}.jpg"
-    await sync_to_async(Image.open(photo_dir).convert("RGB").save, des_dir, "JPEG")
+    await sync_to_async(_save_thumb, photo_dir, des_dir, executor="cpu")
     await remove(photo_dir)
     return des_dir
 
@@ -0,0 +1,122 @@
+from aiofiles.os import path as aiopath
+from dataclasses import dataclass
+from psutil import (
+    boot_time,
+    cpu_count,
+    cpu_percent,
+    disk_usage,
+    net_io_counters,
+    swap_memory,
+    virtual_memory,
+)
+from time import time
+
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import cmd_exec, setInterval, sync_to_async
+
+SAMPLE_INTERVAL = 5
+COMMIT_REFRESH = 600
+
+
+@dataclass(slots=True)
+class SystemSnapshot:
+    taken_at: float
+    cpu: float
+    cpu_physical: int
+    cpu_logical: int
+    memory: object
+    swap: object
+    disk: object
+    bytes_sent: int
+    bytes_recv: int
+    upload_rate: float
+    download_rate: float
+    boot_time: float
+    last_commit: str
+
+
+def _read_system():
+    # psutil calls are plain syscalls, but disk_usage can stall on a slow
+    # mount; keep all of them off the event loop.
+    net = net_io_counters()
+    return (
+        cpu_percent(interval=None),
+        virtual_memory(),
+        swap_memory(),
+        disk_usage("/"),
+        net.bytes_sent,
+        net.bytes_recv,
+    )
+
+
+class SystemSampler:
+    """Samples machine stats every SAMPLE_INTERVAL seconds for /stats.
+
+    CPU usage is measured between two samples instead of blocking for an
+    interval, network counters are turned into per-second rates, and the
+    last commit is only looked up every COMMIT_REFRESH seconds.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.snapshot = None
+        self._timer = None
+        self._last_commit = ""
+        self._commit_checked = 0
+
+    def start(self):
+        if self._timer is None:
+            # Primes cpu_percent so the first real sample has a baseline.
+            cpu_percent(interval=None)
+            self._timer = setInterval(self.interval, self.sample)
+
+    def cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _commit(self):
+        if time() - self._commit_checked < COMMIT_REFRESH:
+            return self._last_commit
+        self._commit_checked = time()
+        if await aiopath.exists(".git"):
+            last_commit = await cmd_exec(
+                "git log -1 --date=short --pretty=format:'%cd <b>From</b> %cr'", True
+            )
+            self._last_commit = last_commit[0]
+        else:
+            self._last_commit = "No UPSTREAM_REPO"
+        return self._last_commit
+
+    async def sample(self):
+        try:
+            cpu, memory, swap, disk, sent, recv = await sync_to_async(_read_system, executor="disk")
+            now = time()
+            previous = self.snapshot
+            if previous is not None and now > previous.taken_at:
+                elapsed = now - previous.taken_at
+                upload_rate = max(sent - previous.bytes_sent, 0) / elapsed
+                download_rate = max(recv - previous.bytes_recv, 0) / elapsed
+            else:
+                upload_rate = download_rate = 0.0
+            self.snapshot = SystemSnapshot(
+                taken_at=now,
+                cpu=cpu,
+                cpu_physical=previous.cpu_physical if previous else cpu_count(logical=False),
+                cpu_logical=previous.cpu_logical if previous else cpu_count(logical=True),
+                memory=memory,
+                swap=swap,
+                disk=disk,
+                bytes_sent=sent,
+                bytes_recv=recv,
+                upload_rate=upload_rate,
+                download_rate=download_rate,
+                boot_time=previous.boot_time if previous else boot_time(),
+                last_commit=await self._commit(),
+            )
+        except Exception as e:
+            LOGGER.error(f"System sampler error: {e}")
+        return self.snapshot
+
+
+system_sampler = SystemSampler()
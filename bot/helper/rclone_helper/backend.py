@@ -0,0 +1,431 @@
+from aiofiles.os import path as aiopath, remove
+from asyncio import Lock, TimeoutError, create_subprocess_exec, create_task, sleep, wait_for
+from asyncio.subprocess import DEVNULL, PIPE
+from contextlib import asynccontextmanager
+from json import loads
+from time import time
+
+from httpx import AsyncClient, AsyncHTTPTransport, Limits, TimeoutException, TransportError
+
+from bot import LOGGER, RCLONE_RCD
+from bot.helper.rclone_helper.listing import ItemStream, Listing
+
+RCLONE_CONFIG = "/usr/src/app/rclone.conf"
+RCLONE_TIMEOUT = 300
+RCD_SOCKET = "/tmp/rclone_rcd.sock"
+RCD_START_TIMEOUT = 15
+# After rcd failed to start, use subprocesses for this long before retrying.
+RCD_RETRY = 300
+RCD_CONNECTIONS = 8
+STREAM_CHUNK = 64 * 1024
+
+
+class RcdUnavailable(Exception):
+    pass
+
+
+@asynccontextmanager
+async def rclone_process(*args):
+    """Context manager for rclone processes with proper cleanup"""
+    process = None
+    try:
+        process = await create_subprocess_exec(*args, stdout=PIPE, stderr=PIPE)
+        yield process
+    except Exception as e:
+        LOGGER.error(f"Process error: {e}")
+        raise
+    finally:
+        if process and process.returncode is None:
+            try:
+                process.terminate()
+                try:
+                    await wait_for(process.wait(), timeout=5)
+                except TimeoutError:
+                    LOGGER.warning("Process didn't terminate, killing...")
+                    process.kill()
+                    await process.wait()
+            except Exception as e:
+                LOGGER.error(f"Process cleanup error: {e}")
+
+
+async def run_rclone(cmd, timeout=RCLONE_TIMEOUT):
+    """Run an rclone command and return (stdout, stderr, return_code)"""
+    try:
+        async with rclone_process(*cmd) as process:
+            try:
+                stdout, stderr = await wait_for(process.communicate(), timeout=timeout)
+            except TimeoutError:
+                LOGGER.error(f"Command timeout after {timeout}s: {' '.join(cmd)}")
+                return None, f"Operation timed out after {timeout} seconds", -1
+
+            return_code = process.returncode
+            stdout = stdout.decode().strip()
+            stderr = stderr.decode().strip()
+            if return_code != 0:
+                LOGGER.error(f"Command failed (rc={return_code}): {' '.join(cmd)}")
+                LOGGER.error(f"Stderr: {stderr}")
+            return stdout, stderr, return_code
+
+    except Exception as e:
+        LOGGER.error(f"Command execution error: {e}", exc_info=True)
+        return None, str(e), -1
+
+
+class RcloneBackend:
+    """rclone operations for the file browser.
+
+    With `use_rcd` one long-lived `rclone rcd` is started on a unix socket
+    the first time it is needed, and every operation is a request to its RC
+    API over a pooled httpx client, so the config, remote authentication and
+    directory cache are reused instead of paid for by a new process on each
+    click. If the daemon cannot be started or dies, operations run as one
+    rclone subprocess each, as they always did, until it is retried.
+
+    Every operation returns (result, error) with error None on success.
+    """
+
+    def __init__(self, config=RCLONE_CONFIG, use_rcd=True, socket=RCD_SOCKET):
+        self.config = config
+        self.use_rcd = use_rcd
+        self.socket = socket
+        self._process = None
+        self._client = None
+        self._lock = Lock()
+        self._failed_at = 0
+
+    def _running(self):
+        return self._process is not None and self._process.returncode is None
+
+    async def _daemon(self):
+        if not self.use_rcd:
+            return None
+        if self._running():
+            return self._client
+        if time() - self._failed_at < RCD_RETRY:
+            return None
+        async with self._lock:
+            if self._running():
+                return self._client
+            try:
+                await self._start()
+                return self._client
+            except Exception as e:
+                LOGGER.error(f"rclone rcd unavailable, using subprocesses: {e}")
+                self._failed_at = time()
+                await self.stop()
+                return None
+
+    async def _start(self):
+        if await aiopath.exists(self.socket):
+            await remove(self.socket)
+        self._process = await create_subprocess_exec(
+            "rclone",
+            "rcd",
+            f"--config={self.config}",
+            f"--rc-addr=unix://{self.socket}",
+            "--rc-no-auth",
+            stdout=DEVNULL,
+            stderr=DEVNULL,
+        )
+        if self._client is None:
+            self._client = AsyncClient(
+                transport=AsyncHTTPTransport(uds=self.socket),
+                base_url="http://rclone",
+                timeout=RCLONE_TIMEOUT,
+                limits=Limits(max_connections=RCD_CONNECTIONS),
+            )
+        deadline = time() + RCD_START_TIMEOUT
+        while True:
+            if self._process.returncode is not None:
+                raise RcdUnavailable(f"rcd exited with code {self._process.returncode}")
+            try:
+                (await self._client.post("/rc/noop")).raise_for_status()
+                break
+            except TransportError:
+                if time() > deadline:
+                    raise
+                await sleep(0.1)
+        LOGGER.info(f"rclone rcd listening on {self.socket}")
+
+    async def stop(self):
+        if self._running():
+            self._process.terminate()
+            try:
+                await wait_for(self._process.wait(), timeout=5)
+            except TimeoutError:
+                self._process.kill()
+                await self._process.wait()
+        self._process = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _rc(self, command, timeout, **params):
+        client = await self._daemon()
+        if client is None:
+            raise RcdUnavailable
+        try:
+            response = await client.post(f"/{command}", json=params, timeout=timeout)
+        except TimeoutException:
+            LOGGER.error(f"rcd {command} timed out after {timeout}s")
+            return None, f"Operation timed out after {timeout} seconds"
+        except TransportError as e:
+            LOGGER.error(f"rcd {command} failed, falling back to a subprocess: {e}")
+            raise RcdUnavailable from e
+        try:
+            data = response.json()
+        except ValueError:
+            # Not an RC reply, e.g. a crash or proxy page.
+            error = f"{response.status_code} {response.reason_phrase}"
+            LOGGER.error(f"rcd {command} failed ({error}): {response.text[:200]}")
+            return None, error
+        if response.status_code != 200:
+            LOGGER.error(f"rcd {command} failed ({response.status_code}): {data.get('error')}")
+            return None, data.get("error") or response.text
+        return data, None
+
+    async def _call(self, command, params, cmd, timeout):
+        """`command` on the daemon, else `cmd` as a subprocess.
+
+        Returns (data, None, error): the RC reply, or (None, stdout, error)
+        when the subprocess ran instead.
+        """
+        try:
+            data, error = await self._rc(command, timeout, **params)
+            return data, None, error
+        except RcdUnavailable:
+            pass
+        stdout, stderr, return_code = await run_rclone(
+            ["rclone", *cmd, f"--config={self.config}"], timeout
+        )
+        return None, stdout, (stderr or "Unknown error") if return_code != 0 else None
+
+    async def list(
+        self,
+        remote,
+        path="",
+        recurse=False,
+        files_only=False,
+        dirs_only=False,
+        no_modtime=True,
+        include=None,
+        timeout=RCLONE_TIMEOUT,
+    ):
+        """lsjson entries of `remote:path`; `include` is a case-insensitive
+        filter pattern such as `*name*`.
+
+        Entry paths are relative to `path`, as lsjson gives them, whichever
+        way the listing was made.
+        """
+        path = path.strip("/")
+        params = {
+            "fs": f"{remote}:",
+            "remote": path,
+            "opt": {
+                "recurse": recurse,
+                "filesOnly": files_only,
+                "dirsOnly": dirs_only,
+                "noModTime": no_modtime,
+            },
+            "_config": {"UseListR": True},
+        }
+        cmd = ["lsjson", f"{remote}:{path}", "--fast-list"]
+        if recurse:
+            cmd.append("-R")
+        else:
+            cmd.append("--max-depth=1")
+        if files_only:
+            cmd.append("--files-only")
+        if dirs_only:
+            cmd.append("--dirs-only")
+        if no_modtime:
+            cmd.append("--no-modtime")
+        if include:
+            params["_filter"] = {"IncludeRule": [include], "IgnoreCase": True}
+            cmd.extend(["--ignore-case", "--include", include])
+        data, stdout, error = await self._call("operations/list", params, cmd, timeout)
+        if error:
+            return None, error
+        if data is not None:
+            entries = data.get("list") or []
+            # operations/list gives paths from the root of the remote.
+            if path:
+                for entry in entries:
+                    entry["Path"] = entry["Path"].removeprefix(f"{path}/")
+            return entries, None
+        return loads(stdout) if stdout else [], None
+
+    async def stream_list(self, remote, path="", listing=None, timeout=RCLONE_TIMEOUT):
+        """The entries of `remote:path` as a compact Listing.
+
+        Entries are parsed and added to `listing` while the reply is still
+        arriving, so a caller holding it can show the first ones before the
+        directory has been listed completely.
+        """
+        path = path.strip("/")
+        listing = Listing() if listing is None else listing
+        try:
+            try:
+                error = await wait_for(self._stream_rc(remote, path, listing), timeout)
+            except RcdUnavailable:
+                error = await wait_for(self._stream_process(remote, path, listing), timeout)
+        except TimeoutError:
+            LOGGER.error(f"Listing {remote}:{path} timed out after {timeout}s")
+            error = f"Operation timed out after {timeout} seconds"
+        listing.finish(error)
+        return (listing, None) if error is None else (None, error)
+
+    async def _stream_rc(self, remote, path, listing):
+        client = await self._daemon()
+        if client is None:
+            raise RcdUnavailable
+        parser = ItemStream()
+        params = {"fs": f"{remote}:", "remote": path, "opt": {"noModTime": True}}
+        try:
+            async with client.stream("POST", "/operations/list", json=params, timeout=None) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    try:
+                        error = loads(body).get("error")
+                    except ValueError:
+                        error = None
+                    error = error or f"{response.status_code} {response.reason_phrase}"
+                    LOGGER.error(f"rcd operations/list failed ({response.status_code}): {error}")
+                    return error
+                async for chunk in response.aiter_bytes(STREAM_CHUNK):
+                    listing.extend(parser.feed(chunk))
+        except TransportError as e:
+            # Only safe to start over as a subprocess while nothing was added.
+            if len(listing):
+                return str(e)
+            LOGGER.error(f"rcd operations/list failed, falling back to a subprocess: {e}")
+            raise RcdUnavailable from e
+        return None if parser.done else "Incomplete listing"
+
+    async def _stream_process(self, remote, path, listing):
+        parser = ItemStream()
+        async with rclone_process(
+            "rclone",
+            "lsjson",
+            f"--config={self.config}",
+            f"{remote}:{path}",
+            "--fast-list",
+            "--max-depth=1",
+            "--no-modtime",
+        ) as process:
+            stderr = create_task(process.stderr.read())
+            try:
+                while chunk := await process.stdout.read(STREAM_CHUNK):
+                    listing.extend(parser.feed(chunk))
+                error = (await stderr).decode().strip()
+                await process.wait()
+            finally:
+                stderr.cancel()
+            if process.returncode != 0:
+                error = error or "Unknown error"
+                LOGGER.error(f"Listing {remote}:{path} failed (rc={process.returncode}): {error}")
+                return error
+        return None if parser.done else "Incomplete listing"
+
+    async def size(self, remote, path="", timeout=RCLONE_TIMEOUT):
+        """{"count": files, "bytes": total size} of `remote:path`."""
+        path = path.strip("/")
+        data, stdout, error = await self._call(
+            "operations/size",
+            {"fs": f"{remote}:{path}", "_config": {"UseListR": True}},
+            ["size", f"{remote}:{path}", "--fast-list", "--json"],
+            timeout,
+        )
+        if error:
+            return None, error
+        if data is not None:
+            return data, None
+        return loads(stdout) if stdout else {}, None
+
+    async def about(self, remote, timeout=30):
+        data, stdout, error = await self._call(
+            "operations/about", {"fs": f"{remote}:"}, ["about", "--json", f"{remote}:"], timeout
+        )
+        if error:
+            return None, error
+        if data is not None:
+            return data, None
+        return loads(stdout) if stdout else {}, None
+
+    async def link(self, remote, path, timeout=30):
+        path = path.strip("/")
+        data, stdout, error = await self._call(
+            "operations/publiclink",
+            {"fs": f"{remote}:", "remote": path},
+            ["link", f"{remote}:{path}"],
+            timeout,
+        )
+        if error:
+            return None, error
+        return (data.get("url") if data is not None else stdout) or None, None
+
+    async def _operation(self, command, params, cmd, timeout):
+        _, _, error = await self._call(command, params, cmd, timeout)
+        return error is None, error
+
+    async def mkdir(self, remote, path, timeout=30):
+        path = path.strip("/")
+        return await self._operation(
+            "operations/mkdir", {"fs": f"{remote}:", "remote": path}, ["mkdir", f"{remote}:{path}"], timeout
+        )
+
+    async def purge(self, remote, path, timeout=RCLONE_TIMEOUT):
+        path = path.strip("/")
+        return await self._operation(
+            "operations/purge", {"fs": f"{remote}:", "remote": path}, ["purge", f"{remote}:{path}"], timeout
+        )
+
+    async def delete_file(self, remote, path, timeout=60):
+        path = path.strip("/")
+        return await self._operation(
+            "operations/deletefile", {"fs": f"{remote}:", "remote": path}, ["delete", f"{remote}:{path}"], timeout
+        )
+
+    async def rmdirs(self, remote, path, timeout=RCLONE_TIMEOUT):
+        path = path.strip("/")
+        return await self._operation(
+            "operations/rmdirs",
+            {"fs": f"{remote}:", "remote": path, "leaveRoot": False},
+            ["rmdirs", f"{remote}:{path}"],
+            timeout,
+        )
+
+    async def moveto(self, remote, src_path, dst_path, timeout=60):
+        src_path = src_path.strip("/")
+        dst_path = dst_path.strip("/")
+        return await self._operation(
+            "operations/movefile",
+            {"srcFs": f"{remote}:", "srcRemote": src_path, "dstFs": f"{remote}:", "dstRemote": dst_path},
+            ["moveto", f"{remote}:{src_path}", f"{remote}:{dst_path}"],
+            timeout,
+        )
+
+    async def dedupe(self, remote, path, timeout=RCLONE_TIMEOUT):
+        # The RC API has no dedupe operation, so this is always a subprocess.
+        path = path.strip("/")
+        _, stderr, return_code = await run_rclone(
+            [
+                "rclone",
+                "dedupe",
+                "newest",
+                "--tpslimit",
+                "4",
+                "--transfers",
+                "1",
+                "--fast-list",
+                f"--config={self.config}",
+                f"{remote}:{path}",
+            ],
+            timeout,
+        )
+        if return_code != 0:
+            return False, stderr or "Unknown error"
+        return True, None
+
+
+rclone = RcloneBackend(use_rcd=RCLONE_RCD)
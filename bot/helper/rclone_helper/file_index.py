@@ -0,0 +1,217 @@
+from asyncio import Semaphore, create_task, gather
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.rclone_helper.backend import rclone
+
+INDEX_DB = "rclone_index.db"
+# Searches on an index older than this start a refresh in the background.
+INDEX_REFRESH = 3600
+CRAWL_TIMEOUT = 1800
+CRAWL_CONCURRENCY = 4
+# Past this share of changed directories the remote is listed in one go
+# instead; backends without directory modtimes always end up here.
+REBUILD_RATIO = 0.5
+# The trigram tokenizer cannot match anything shorter.
+MIN_MATCH_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS remotes (remote TEXT PRIMARY KEY, indexed_at REAL);
+CREATE TABLE IF NOT EXISTS dirs (
+    remote TEXT, path TEXT, modtime TEXT, PRIMARY KEY (remote, path)
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, remote TEXT, dir TEXT, name TEXT, path TEXT, size INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (remote, dir);
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    name, content='files', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts (files_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+
+
+def _parent(path):
+    return path.rpartition("/")[0]
+
+
+def _file_rows(remote, entries, base=""):
+    for entry in entries:
+        if not entry.get("IsDir"):
+            path = f"{base}/{entry['Name']}" if base else entry["Path"]
+            yield remote, _parent(path), entry["Name"], path, entry.get("Size", 0)
+
+
+class FileIndex:
+    """Per-remote file names in SQLite, searched through FTS5.
+
+    The first search on a remote lists it recursively in the background;
+    until that finishes searches go to rclone as before. Afterwards a
+    refresh lists only directories (with modtimes) and re-lists the files
+    of those whose modtime changed, dropping directories that are gone.
+    Searches on an index older than INDEX_REFRESH start one, and writes
+    made through the bot mark their directories for it. All SQLite work
+    runs on the disk executor over one connection.
+    """
+
+    def __init__(self, path=INDEX_DB):
+        self.path = path
+        self._db = None
+        self._lock = Lock()
+        self._tasks = {}
+
+    def _execute(self, func, *args):
+        with self._lock:
+            if self._db is None:
+                self._db = connect(self.path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.executescript(SCHEMA)
+            with self._db:
+                return func(self._db, *args)
+
+    async def _run(self, func, *args):
+        return await sync_to_async(self._execute, func, *args, executor="disk")
+
+    @staticmethod
+    def _indexed_at(db, remote):
+        row = db.execute("SELECT indexed_at FROM remotes WHERE remote = ?", (remote,)).fetchone()
+        return row[0] if row else None
+
+    async def ready(self, remote) -> bool:
+        """Whether `remote` can be searched locally, starting a build or a
+        refresh in the background when one is due."""
+        indexed_at = await self._run(self._indexed_at, remote)
+        if indexed_at is None or time() - indexed_at > INDEX_REFRESH:
+            self.update(remote, rebuild=indexed_at is None)
+        return indexed_at is not None
+
+    def update(self, remote, rebuild=False):
+        if remote not in self._tasks:
+            task = create_task(self._update(remote, rebuild))
+            self._tasks[remote] = task
+            task.add_done_callback(lambda _: self._tasks.pop(remote, None))
+
+    async def _update(self, remote, rebuild):
+        start_time = time()
+        try:
+            if rebuild:
+                count = await self._rebuild(remote)
+            else:
+                count = await self._refresh(remote)
+            if count is not None:
+                LOGGER.info(f"Indexed {count} directories of {remote} in {time() - start_time:.1f}s")
+        except Exception as e:
+            LOGGER.error(f"Indexing {remote} failed: {e}", exc_info=True)
+
+    async def _rebuild(self, remote):
+        entries, err = await rclone.list(remote, recurse=True, no_modtime=False, timeout=CRAWL_TIMEOUT)
+        if err:
+            LOGGER.error(f"Indexing {remote} failed: {err}")
+            return None
+        dirs = [(remote, entry["Path"], entry.get("ModTime")) for entry in entries if entry.get("IsDir")]
+        files = list(_file_rows(remote, entries))
+
+        def store(db):
+            db.execute("DELETE FROM files WHERE remote = ?", (remote,))
+            db.execute("DELETE FROM dirs WHERE remote = ?", (remote,))
+            db.executemany("INSERT INTO dirs VALUES (?, ?, ?)", dirs)
+            db.executemany("INSERT INTO files (remote, dir, name, path, size) VALUES (?, ?, ?, ?, ?)", files)
+            db.execute("INSERT OR REPLACE INTO remotes VALUES (?, ?)", (remote, time()))
+
+        await self._run(store)
+        return len(dirs) + 1
+
+    async def _refresh(self, remote):
+        entries, err = await rclone.list(
+            remote, recurse=True, dirs_only=True, no_modtime=False, timeout=CRAWL_TIMEOUT
+        )
+        if err:
+            LOGGER.error(f"Refreshing the index of {remote} failed: {err}")
+            return None
+        current = {entry["Path"]: entry.get("ModTime") for entry in entries}
+
+        def known_dirs(db):
+            return dict(db.execute("SELECT path, modtime FROM dirs WHERE remote = ?", (remote,)))
+
+        known = await self._run(known_dirs)
+        # The root has no modtime of its own and is always listed again.
+        changed = [""] + [path for path, modtime in current.items() if modtime is None or known.get(path) != modtime]
+        removed = [path for path in known if path not in current]
+        if len(changed) - 1 > len(current) * REBUILD_RATIO:
+            return await self._rebuild(remote)
+
+        semaphore = Semaphore(CRAWL_CONCURRENCY)
+
+        async def list_files(path):
+            async with semaphore:
+                return await rclone.list(remote, path, files_only=True, timeout=CRAWL_TIMEOUT)
+
+        listings = await gather(*(list_files(path) for path in changed))
+        failed = {path for path, (_, err) in zip(changed, listings) if err}
+
+        def store(db):
+            for path in removed:
+                db.execute("DELETE FROM files WHERE remote = ? AND dir = ?", (remote, path))
+                db.execute("DELETE FROM dirs WHERE remote = ? AND path = ?", (remote, path))
+            for path, (listing, err) in zip(changed, listings):
+                if err:
+                    continue
+                db.execute("DELETE FROM files WHERE remote = ? AND dir = ?", (remote, path))
+                db.executemany(
+                    "INSERT INTO files (remote, dir, name, path, size) VALUES (?, ?, ?, ?, ?)",
+                    _file_rows(remote, listing, path),
+                )
+                if path:
+                    db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (remote, path, current[path]))
+            # Failed directories keep their old modtime and are retried next time.
+            if not failed:
+                db.execute("INSERT OR REPLACE INTO remotes VALUES (?, ?)", (remote, time()))
+
+        await self._run(store)
+        return len(changed)
+
+    async def invalidate(self, remote, *paths):
+        """Have the next search refresh `remote`, re-listing the directories
+        holding `paths` and the directories themselves."""
+        dirs = {_parent(path.strip("/")) for path in paths} | {path.strip("/") for path in paths}
+
+        def mark(db):
+            db.executemany(
+                "UPDATE dirs SET modtime = NULL WHERE remote = ? AND path = ?",
+                [(remote, path) for path in dirs],
+            )
+            db.execute("UPDATE remotes SET indexed_at = 0 WHERE remote = ?", (remote,))
+
+        await self._run(mark)
+
+    async def search(self, remote, text, limit, offset=0):
+        """(total, [(name, path, size)]) of files whose name contains `text`."""
+
+        def query(db):
+            if len(text) >= MIN_MATCH_LENGTH:
+                match = '"' + text.replace('"', '""') + '"'
+                where = "f.remote = ? AND f.id IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?)"
+                args = (remote, match)
+            else:
+                pattern = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                where = "f.remote = ? AND f.name LIKE ? ESCAPE '\\'"
+                args = (remote, f"%{pattern}%")
+            total = db.execute(f"SELECT COUNT(*) FROM files f WHERE {where}", args).fetchone()[0]
+            rows = db.execute(
+                f"SELECT f.name, f.path, f.size FROM files f WHERE {where} ORDER BY f.name LIMIT ? OFFSET ?",
+                (*args, limit, offset),
+            ).fetchall()
+            return total, rows
+
+        return await self._run(query)
+
+
+file_index = FileIndex()
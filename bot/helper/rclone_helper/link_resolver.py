@@ -0,0 +1,79 @@
+from asyncio import Semaphore, create_task, current_task, gather, shield
+from collections import OrderedDict
+from time import time
+
+from bot.helper.rclone_helper.backend import rclone
+
+LINK_TTL = 3600
+# Failures are remembered briefly so a page of dead links is not retried
+# on every redraw.
+FAILED_TTL = 60
+MAX_LINKS = 5000
+CONCURRENCY = 8
+
+
+class LinkResolver:
+    """Public links of rclone files, cached per (remote, path).
+
+    At most CONCURRENCY lookups run at a time, and a lookup for a path that
+    is already being resolved waits for that one instead of starting
+    another. Links are kept for LINK_TTL, failures for FAILED_TTL, and the
+    least recently used are dropped past MAX_LINKS.
+    """
+
+    def __init__(self, concurrency=CONCURRENCY, max_links=MAX_LINKS):
+        self.max_links = max_links
+        self._semaphore = Semaphore(concurrency)
+        self._links = OrderedDict()
+        self._inflight = {}
+
+    async def resolve(self, remote, path, timeout=30):
+        """(link, error) for `remote:path`."""
+        key = (remote, path.strip("/"))
+        cached = self._links.get(key)
+        if cached is not None:
+            expires_at, link, error = cached
+            if time() < expires_at:
+                self._links.move_to_end(key)
+                return link, error
+            del self._links[key]
+        task = self._inflight.get(key)
+        if task is None:
+            task = create_task(self._fetch(key, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await shield(task)
+
+    def _finish(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _fetch(self, key, timeout):
+        async with self._semaphore:
+            link, error = await rclone.link(*key, timeout=timeout)
+        if error is None and not link:
+            error = "No link available"
+        # Not stored if the path was forgotten while this was running.
+        if self._inflight.get(key) is current_task():
+            ttl = LINK_TTL if error is None else FAILED_TTL
+            self._links[key] = (time() + ttl, link, error)
+            self._links.move_to_end(key)
+            if len(self._links) > self.max_links:
+                self._links.popitem(last=False)
+        return link, error
+
+    async def resolve_many(self, remote, paths, timeout=10):
+        return await gather(*(self.resolve(remote, path, timeout) for path in paths))
+
+    def forget(self, remote, *paths):
+        """Drop links at or under each of `paths`, e.g. after a delete or rename."""
+        for path in paths:
+            path = path.strip("/")
+            prefix = f"{path}/" if path else ""
+            for key in list(self._links) + list(self._inflight):
+                if key[0] == remote and (key[1] == path or key[1].startswith(prefix)):
+                    self._links.pop(key, None)
+                    self._inflight.pop(key, None)
+
+
+link_resolver = LinkResolver()
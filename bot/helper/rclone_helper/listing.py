@@ -0,0 +1,141 @@
+from array import array
+from asyncio import get_running_loop
+from codecs import getincrementaldecoder
+from json import JSONDecodeError, JSONDecoder
+from re import compile as re_compile
+from sys import intern
+
+# Rough cost of one entry besides its name: str header, list slots, size, flag.
+ENTRY_OVERHEAD = 90
+
+_SEPARATORS = re_compile(r"[\s,]*")
+_decoder = JSONDecoder()
+
+
+class ItemStream:
+    """Incremental parser for the items of the first JSON array in a stream.
+
+    Fits both `rclone lsjson` output and the `{"list": [...]}` reply of the
+    RC API: everything up to the first "[" is skipped, then each complete
+    item is decoded as soon as its bytes have arrived.
+    """
+
+    __slots__ = ("_buffer", "_decode", "_started", "done")
+
+    def __init__(self):
+        self._buffer = ""
+        self._decode = getincrementaldecoder("utf-8")().decode
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> list:
+        buffer = self._buffer + self._decode(chunk)
+        items = []
+        pos = 0
+        if not self._started:
+            start = buffer.find("[")
+            if start < 0:
+                self._buffer = ""
+                return items
+            self._started = True
+            pos = start + 1
+        while not self.done:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                pos += 1
+                break
+            try:
+                item, pos = _decoder.raw_decode(buffer, pos)
+            except JSONDecodeError:
+                # The item is cut off; the rest comes with the next chunk.
+                break
+            items.append(item)
+        self._buffer = buffer[pos:]
+        return items
+
+
+class Listing:
+    """One directory listing kept as parallel arrays instead of lsjson dicts.
+
+    Entries are (name, size, is_dir, mimetype) tuples, built only for the
+    page being shown. Mimetypes are interned and sizes live in an array, so
+    a large folder costs little more than its names. Entries can be read
+    while the listing is still arriving; sorted orders are computed once it
+    is complete and kept per sort key.
+    """
+
+    __slots__ = ("names", "sizes", "dirs", "mimetypes", "name_bytes", "complete", "error", "_orders", "_waiters")
+
+    def __init__(self):
+        self.names = []
+        self.sizes = array("q")
+        self.dirs = bytearray()
+        self.mimetypes = []
+        self.name_bytes = 0
+        self.complete = False
+        self.error = None
+        self._orders = {}
+        self._waiters = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        return self.name_bytes + len(self.names) * ENTRY_OVERHEAD
+
+    def extend(self, entries):
+        for entry in entries:
+            name = entry.get("Name") or entry.get("Path", "")
+            self.names.append(name)
+            self.sizes.append(entry.get("Size", -1))
+            self.dirs.append(1 if entry.get("IsDir") else 0)
+            self.mimetypes.append(intern(entry.get("MimeType", "")))
+            self.name_bytes += len(name)
+        if entries:
+            self._wake()
+
+    def finish(self, error=None):
+        self.complete = True
+        self.error = error
+        self._wake()
+
+    def _wake(self):
+        pending = []
+        for count, future in self._waiters:
+            if future.done():
+                continue
+            if self.complete or len(self.names) >= count:
+                future.set_result(None)
+            else:
+                pending.append((count, future))
+        self._waiters = pending
+
+    async def wait_for(self, count):
+        """Return once `count` entries have arrived or the listing is done."""
+        if self.complete or len(self.names) >= count:
+            return
+        future = get_running_loop().create_future()
+        self._waiters.append((count, future))
+        await future
+
+    def entry(self, index):
+        return self.names[index], self.sizes[index], bool(self.dirs[index]), self.mimetypes[index]
+
+    def order(self, sort_by):
+        """Entry indexes by "name", by "size" (largest first), or as listed."""
+        if sort_by is None or not self.complete:
+            return range(len(self.names))
+        if sort_by not in self._orders:
+            if sort_by == "name":
+                indexes = sorted(range(len(self.names)), key=self.names.__getitem__)
+            else:
+                indexes = sorted(range(len(self.names)), key=self.sizes.__getitem__, reverse=True)
+            self._orders[sort_by] = array("l", indexes)
+        return self._orders[sort_by]
+
+    def page(self, sort_by, offset, count) -> list:
+        return [self.entry(index) for index in self.order(sort_by)[offset:offset + count]]
@@ -0,0 +1,147 @@
+from asyncio import create_task, current_task, shield
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import time
+
+from bot import LOGGER
+from bot.helper.rclone_helper.listing import Listing
+
+# Listings younger than this are served as they are.
+FRESH_FOR = 60
+# Older ones up to this age are served at once while a refresh runs.
+STALE_FOR = 600
+MAX_BYTES = 32 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class CachedListing:
+    listing: object
+    size: int
+    fetched_at: float
+
+
+def _ancestors(path):
+    parts = path.split("/") if path else []
+    return {"/".join(parts[:index]) for index in range(len(parts))}
+
+
+class ListingCache:
+    """Directory Listings keyed by (remote, path), bounded by size in bytes.
+
+    Within FRESH_FOR a listing is returned as is. Up to STALE_FOR it is
+    still returned right away, and a background load replaces it. Misses
+    and refreshes of the same directory share one load and the Listing it
+    fills, so every caller can show entries as they arrive. A write
+    invalidates the path it touched, everything under it and its ancestors,
+    whose listings and sizes it changed, and leaves other directories alone.
+    The least recently used listings are dropped once MAX_BYTES is exceeded.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, fresh_for=FRESH_FOR, stale_for=STALE_FOR):
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self.size = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._discarded = set()
+
+    @staticmethod
+    def _key(remote, path):
+        return remote, path.strip("/")
+
+    async def get(self, remote, path, loader):
+        """The listing of `remote:path` and an error, using `loader(listing)`
+        (which fills `listing` and returns the same pair) to load it."""
+        listing, load = self.lookup(remote, path, loader)
+        if load is None:
+            return listing, None
+        return await shield(load)
+
+    def lookup(self, remote, path, loader):
+        """The Listing to show for `remote:path` and the load still filling
+        it, which gives the final listing and an error, or None if cached."""
+        key = self._key(remote, path)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time() - entry.fetched_at
+            if age < self.stale_for:
+                self._entries.move_to_end(key)
+                if age < self.fresh_for:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    self._load(key, loader)
+                return entry.listing, None
+        self.misses += 1
+        return self._load(key, loader)
+
+    def _load(self, key, loader):
+        task, listing = self._loading.get(key, (None, None))
+        # A finished load stays here until its done callback runs.
+        if task is None or task.done():
+            listing = Listing()
+            task = create_task(self._fetch(key, loader, listing))
+            self._loading[key] = task, listing
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return listing, task
+
+    def _finish(self, key, task):
+        if self._loading.get(key, (None,))[0] is task:
+            del self._loading[key]
+        self._discarded.discard(task)
+
+    async def _fetch(self, key, loader, listing):
+        try:
+            listing, error = await loader(listing)
+        except Exception as e:
+            LOGGER.error(f"Listing {key[0]}:{key[1]} failed: {e}")
+            # Wake whoever is waiting for entries that will not come.
+            listing.finish(str(e))
+            return None, str(e)
+        # A write while this was loading may have made the result outdated.
+        if error is None and current_task() not in self._discarded:
+            self._store(key, listing)
+        return listing, error
+
+    def _store(self, key, listing):
+        self._forget(key)
+        size = listing.nbytes
+        if size > self.max_bytes:
+            return
+        self._entries[key] = CachedListing(listing, size, time())
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def _drop(self, key):
+        self._forget(key)
+        task, _ = self._loading.pop(key, (None, None))
+        if task is not None:
+            self._discarded.add(task)
+
+    def invalidate(self, remote, *paths):
+        """Forget what a write to each of `paths` on `remote` changed."""
+        for path in paths:
+            path = path.strip("/")
+            affected = _ancestors(path) | {path}
+            prefix = f"{path}/" if path else ""
+            for key in list(self._entries) + list(self._loading):
+                if key[0] == remote and (key[1] in affected or key[1].startswith(prefix)):
+                    self._drop(key)
+
+    def clear(self):
+        for key in list(self._entries) + list(self._loading):
+            self._drop(key)
+
+
+listing_cache = ListingCache()
@@ -0,0 +1,80 @@
+from asyncio import Queue, Semaphore, gather
+from collections import defaultdict
+from time import time
+from urllib.parse import urlsplit
+
+from bot import LOGGER
+
+
+def get_host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class FeedCycle:
+    """Run one polling cycle: fetch concurrently, deliver from a separate queue.
+
+    Fetches are bounded by a global cap and a per-hostname cap, so a cycle takes
+    about as long as its slowest host instead of the sum of every feed. Results
+    are handed to delivery consumers through an unbounded queue, which keeps slow
+    Telegram sends from ever holding a network slot.
+    """
+
+    def __init__(self, fetch, deliver, max_concurrency=20, per_host=2, delivery_workers=4):
+        self.fetch = fetch
+        self.deliver = deliver
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.delivery_workers = delivery_workers
+        self.fetched = 0
+        self.failed = 0
+        self.delivered = 0
+
+    async def run(self, jobs):
+        start_time = time()
+        jobs = list(jobs)
+        results = Queue()
+        global_slots = Semaphore(self.max_concurrency)
+        host_slots = defaultdict(lambda: Semaphore(self.per_host))
+
+        async def fetch_job(url, job):
+            # Take the host slot first so a job queued behind a slow host never
+            # sits on one of the global slots.
+            async with host_slots[get_host(url)]:
+                async with global_slots:
+                    try:
+                        result = await self.fetch(job)
+                        self.fetched += 1
+                    except Exception as e:
+                        LOGGER.error(f"Feed cycle fetch error for {url}: {e}", exc_info=True)
+                        self.failed += 1
+                        return
+            results.put_nowait((job, result))
+
+        async def deliver_results():
+            while True:
+                item = await results.get()
+                if item is None:
+                    return
+                job, result = item
+                try:
+                    await self.deliver(job, result)
+                    self.delivered += 1
+                except Exception as e:
+                    LOGGER.error(f"Feed cycle delivery error: {e}", exc_info=True)
+
+        consumers = [
+            deliver_results() for _ in range(max(1, self.delivery_workers))
+        ]
+        consumer_tasks = gather(*consumers)
+        await gather(*(fetch_job(url, job) for url, job in jobs))
+        for _ in consumers:
+            results.put_nowait(None)
+        await consumer_tasks
+
+        elapsed = time() - start_time
+        hosts = len(host_slots)
+        LOGGER.info(
+            f"Feed cycle: {len(jobs)} job(s) over {hosts} host(s) in {elapsed:.2f}s "
+            f"(fetched {self.fetched}, failed {self.failed}, delivered {self.delivered})"
+        )
+        return elapsed
@@ -0,0 +1,119 @@
+from asyncio import create_task, sleep
+from dataclasses import dataclass
+from hashlib import blake2b
+
+from httpx import AsyncClient, Limits
+
+from bot.helper.rss_helper.schedule import cache_hint
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+MAX_BODY_SIZE = 10 * 1024 * 1024
+# A decoded body this many times larger than what came over the wire is a
+# compression bomb rather than a feed; only checked past the first MiB.
+MAX_COMPRESSION_RATIO = 50
+RATIO_CHECK_AFTER = 1024 * 1024
+MIN_POOL_SIZE = 10
+
+
+class FeedTooLarge(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class FeedResponse:
+    content: bytes | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    cache_hint: int | None = None
+    content_hash: str | None = None
+    not_modified: bool = False
+    status: int | None = None
+    size: int = 0
+
+
+async def fetch_feed(client, url: str, headers: dict = None, known_hash: str = None, max_size: int = MAX_BODY_SIZE) -> FeedResponse:
+    """GET a feed body while hashing it chunk by chunk.
+
+    A 304, or a 200 whose body hashes to `known_hash`, comes back as
+    `not_modified` so the caller can skip parsing. Bodies larger than
+    `max_size` decoded bytes, or that decompress by more than
+    MAX_COMPRESSION_RATIO, raise FeedTooLarge as soon as the limit is
+    crossed, before the rest is downloaded.
+    """
+    async with client.stream("GET", url, headers=headers) as response:
+        result = FeedResponse(cache_hint=cache_hint(response.headers), status=response.status_code)
+        if response.status_code == 304:
+            result.not_modified = True
+            return result
+        response.raise_for_status()
+        result.etag = response.headers.get("ETag")
+        result.last_modified = response.headers.get("Last-Modified")
+
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > max_size:
+            raise FeedTooLarge(f"{url} announced {length} bytes (limit {max_size})")
+
+        hasher = blake2b(digest_size=16)
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > max_size:
+                raise FeedTooLarge(f"{url} sent more than {max_size} bytes")
+            if (
+                len(body) > RATIO_CHECK_AFTER
+                and len(body) > response.num_bytes_downloaded * MAX_COMPRESSION_RATIO
+            ):
+                raise FeedTooLarge(
+                    f"{url} inflated {response.num_bytes_downloaded} bytes to over {len(body)}"
+                )
+            hasher.update(chunk)
+        result.size = response.num_bytes_downloaded
+
+    result.content_hash = hasher.hexdigest()
+    if known_hash and result.content_hash == known_hash:
+        result.not_modified = True
+    else:
+        result.content = bytes(body)
+    return result
+
+
+class FeedClientPool:
+    """The shared httpx client for feed fetches, sized to the work at hand.
+
+    The pool holds `per_host` connections for every distinct host of a cycle,
+    between MIN_POOL_SIZE and `max_connections`. It only grows: a larger
+    cycle swaps in a bigger client and the old one is closed once requests
+    still running on it have had time to finish. HTTP/2 is used when the
+    `h2` package is installed.
+    """
+
+    def __init__(self, timeout, per_host=2, max_connections=20):
+        self.timeout = timeout
+        self.per_host = per_host
+        self.max_connections = max(max_connections, MIN_POOL_SIZE)
+        self.size = 0
+        self.client = None
+
+    def get(self, hosts: int = 0) -> AsyncClient:
+        size = min(max(hosts * self.per_host, MIN_POOL_SIZE), self.max_connections)
+        if self.client is None or size > self.size:
+            old_client = self.client
+            self.size = size
+            self.client = AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                http2=HTTP2,
+                limits=Limits(max_keepalive_connections=size, max_connections=size)
+            )
+            if old_client is not None:
+                create_task(self._close_later(old_client))
+        return self.client
+
+    async def _close_later(self, client):
+        await sleep(self.timeout * 2)
+        await client.aclose()
@@ -0,0 +1,153 @@
+"""Index declarations for the RSS and LiveChart collections.
+
+The bot creates and checks these at startup. The same steps can be run by
+hand without starting the bot:
+
+    python3 bot/helper/rss_helper/indexes.py [--verify-only] [--db-url URL]
+"""
+from logging import getLogger
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+LOGGER = getLogger(__name__)
+
+DATABASE_NAME = "livechartme"
+CYCLE_RETENTION = 7 * 24 * 3600
+CHANGE_RETENTION = 24 * 3600
+
+# Settings, subscriptions and groups are served from memory (RssStore), so
+# their collections are only read in full and written by _id; the unique
+# indexes there stay as constraints between the bot and the RSS worker.
+INDEXES = {
+    "rss_feeds": [
+        IndexModel([("user_id", ASCENDING), ("url", ASCENDING)], unique=True, name="user_url"),
+    ],
+    "rss_feed_data": [
+        IndexModel([("feed_id", ASCENDING)], unique=True, name="feed_id"),
+    ],
+    "rss_delivery_queue": [
+        IndexModel([("claimed_until", ASCENDING), ("_id", ASCENDING)], name="claimed_until"),
+    ],
+    "rss_websub": [
+        IndexModel([("url", ASCENDING)], unique=True, name="url"),
+    ],
+    "rss_cycles": [
+        IndexModel([("started_at", DESCENDING)], expireAfterSeconds=CYCLE_RETENTION, name="started_at"),
+    ],
+    "rss_changes": [
+        IndexModel([("at", ASCENDING)], expireAfterSeconds=CHANGE_RETENTION, name="at"),
+    ],
+    "livechartme_groups": [
+        IndexModel([("user_id", ASCENDING), ("group_id", ASCENDING)], unique=True, name="user_group"),
+    ],
+}
+
+# Declared before the in-memory store took over their queries.
+OBSOLETE_INDEXES = {
+    "rss_feeds": ["user_enabled", "user_title"],
+    "rss_settings": ["enabled_flags"],
+    "livechartme_settings": ["enabled"],
+    "rss_leases": ["owner_until"],
+    "livechartme_groups": ["user_added_at"],
+}
+
+# (collection, filter, sort) for every query the bot sends that must use an index.
+QUERIES = [
+    ("rss_feed_data", {"feed_id": "feed_1_0"}, None),
+    ("rss_delivery_queue", {"claimed_until": {"$lte": 0}}, {"_id": 1}),
+    ("rss_leases", {"_id": {"$in": ["https://example.com/feed"]}, "lease_owner": "worker", "lease_until": {"$gt": 0}}, None),
+    ("rss_push_inbox", {}, {"_id": 1}),
+    ("rss_websub", {"url": "https://example.com/feed"}, None),
+    ("rss_cycles", {"started_at": {"$gte": 0}}, {"started_at": -1}),
+    ("rss_changes", {"at": {"$gt": 0}}, None),
+]
+
+
+async def ensure_indexes(database):
+    for name, indexes in INDEXES.items():
+        try:
+            await database[name].create_indexes(indexes)
+        except OperationFailure as e:
+            # Usually duplicates that predate a unique index; the bot still
+            # works, the lookups are just slower until the data is cleaned.
+            LOGGER.error(f"Could not create indexes on {name}: {e}")
+    for name, index_names in OBSOLETE_INDEXES.items():
+        existing = await database[name].index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                await database[name].drop_index(index_name)
+                LOGGER.info(f"Dropped unused index {index_name} on {name}")
+
+
+def _plan_stages(plan: dict):
+    plan = plan.get("queryPlan", plan)
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for stage in plan.get("inputStages", []):
+        yield from _plan_stages(stage)
+
+
+async def verify_indexes(database) -> list:
+    """Explain every query in QUERIES; returns (collection, filter, sort, stages)
+    for the ones whose winning plan scans the collection or sorts in memory."""
+    problems = []
+    for name, query, sort in QUERIES:
+        find = {"find": name, "filter": query}
+        if sort:
+            find["sort"] = sort
+        explain = await database.command({"explain": find, "verbosity": "queryPlanner"})
+        stages = list(_plan_stages(explain["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages or "SORT" in stages:
+            problems.append((name, query, sort, stages))
+    return problems
+
+
+async def setup_indexes(database) -> bool:
+    await ensure_indexes(database)
+    try:
+        problems = await verify_indexes(database)
+    except Exception as e:
+        LOGGER.warning(f"Index verification skipped: {e}")
+        return False
+    for name, query, sort, stages in problems:
+        LOGGER.warning(f"Query on {name} {query} sort={sort} is not indexed: {' > '.join(map(str, stages))}")
+    if not problems:
+        LOGGER.info(f"Verified indexes for {len(QUERIES)} RSS queries")
+    return not problems
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from asyncio import run
+    from logging import INFO, basicConfig
+    from os import environ
+
+    from dotenv import load_dotenv
+    from pymongo import AsyncMongoClient
+
+    basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=INFO)
+    load_dotenv("config.env", override=True)
+
+    parser = ArgumentParser(description="Create and verify RSS collection indexes")
+    parser.add_argument("--db-url", default=environ.get("DATABASE_URL", ""))
+    parser.add_argument("--verify-only", action="store_true", help="only explain the queries")
+    args = parser.parse_args()
+    if not args.db_url:
+        parser.error("DATABASE_URL is not set and --db-url was not given")
+
+    async def main():
+        client = AsyncMongoClient(args.db_url)
+        try:
+            database = client[DATABASE_NAME]
+            if args.verify_only:
+                problems = await verify_indexes(database)
+                for name, query, sort, stages in problems:
+                    LOGGER.warning(f"{name} {query} sort={sort}: {' > '.join(map(str, stages))}")
+                return not problems
+            return await setup_indexes(database)
+        finally:
+            await client.close()
+
+    exit(0 if run(main()) else 1)
@@ -0,0 +1,86 @@
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+# Weight of the newest sample in the per-feed running averages.
+AVERAGE_WEIGHT = 0.2
+SLOWEST_KEPT = 5
+
+
+def _average(previous, sample: int) -> int:
+    if previous is None:
+        return sample
+    return round(previous + (sample - previous) * AVERAGE_WEIGHT)
+
+
+def feed_metrics(feed_data: dict, result: dict) -> tuple:
+    """`$set` and `$inc` fields describing one check of a feed.
+
+    Subscribers of the same URL share the fetch, so each of them is credited
+    with its full cost.
+    """
+    status = result["status"]
+    set_fields = {
+        "last_fetch_ms": result["fetch_ms"],
+        "avg_fetch_ms": _average(feed_data.get("avg_fetch_ms"), result["fetch_ms"]),
+        "last_status": result["http_status"],
+    }
+    inc_fields = {"fetch_ms_total": result["fetch_ms"], "bytes_total": result["bytes"]}
+    if status == "ok":
+        set_fields["last_parse_ms"] = result["parse_ms"]
+        set_fields["avg_parse_ms"] = _average(feed_data.get("avg_parse_ms"), result["parse_ms"])
+        set_fields["last_bytes"] = result["bytes"]
+        set_fields["last_items"] = len(result["items"])
+        inc_fields["parse_ms_total"] = result["parse_ms"]
+        inc_fields["modified_count"] = 1
+    elif status == "not_modified":
+        # A 304 costs a round trip; a 200 with an unchanged body costs the
+        # whole download as well.
+        inc_fields["not_modified_count" if result["http_status"] == 304 else "unchanged_count"] = 1
+    else:
+        inc_fields["failed_count"] = 1
+    return set_fields, inc_fields
+
+
+@dataclass(slots=True)
+class CycleStats:
+    """Totals for one polling cycle, saved to the `rss_cycles` collection."""
+
+    worker: str
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    duration_ms: int = 0
+    urls: int = 0
+    feeds: int = 0
+    modified: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    bytes: int = 0
+    fetch_ms: int = 0
+    parse_ms: int = 0
+    items: int = 0
+    deliveries: int = 0
+    slowest: list = field(default_factory=list)
+
+    def add_fetch(self, url: str, feeds: int, result: dict):
+        self.urls += 1
+        self.feeds += feeds
+        self.bytes += result["bytes"]
+        self.fetch_ms += result["fetch_ms"]
+        self.parse_ms += result["parse_ms"]
+        if result["status"] == "ok":
+            self.modified += 1
+        elif result["status"] == "not_modified":
+            if result["http_status"] == 304:
+                self.not_modified += 1
+            else:
+                self.unchanged += 1
+        else:
+            self.failed += 1
+
+        self.slowest.append({"url": url, "fetch_ms": result["fetch_ms"]})
+        self.slowest.sort(key=lambda entry: entry["fetch_ms"], reverse=True)
+        del self.slowest[SLOWEST_KEPT:]
+
+    def finish(self) -> dict:
+        self.duration_ms = round((datetime.utcnow() - self.started_at).total_seconds() * 1000)
+        return asdict(self)
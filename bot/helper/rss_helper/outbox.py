@@ -0,0 +1,81 @@
+from asyncio import create_task
+from datetime import datetime, timedelta
+
+from bot import LOGGER
+
+DRAIN_BATCH = 500
+CLAIM_SECONDS = 24 * 3600
+
+
+class DeliveryOutbox:
+    """Mongo-backed hand-off of ready-to-send messages from RSS workers.
+
+    Workers `put` plain delivery dicts; the bot process `drain`s them into
+    its own send path. A drained document is claimed, not removed, and is
+    deleted as soon as its send finished, so a bot restart re-sends whatever
+    was still waiting instead of dropping it, and nothing that was sent.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._done = []
+        self._deleting = None
+        self._released = False
+
+    async def put(self, deliveries: list):
+        if not deliveries:
+            return
+        now = datetime.utcnow()
+        await self._collection.insert_many(
+            [{**delivery, "created_at": now, "claimed_until": now} for delivery in deliveries],
+            ordered=True
+        )
+
+    async def pending(self) -> int:
+        return await self._collection.count_documents({})
+
+    async def drain(self, dispatch, batch: int = DRAIN_BATCH) -> int:
+        if not self._released:
+            # Claims held by a previous run of the bot died with it.
+            await self._collection.update_many({}, {"$set": {"claimed_until": datetime.utcnow()}})
+            self._released = True
+
+        # Left over from a failed delete.
+        if self._done and self._deleting is None:
+            await self._delete_done()
+
+        now = datetime.utcnow()
+        docs = await self._collection.find(
+            {"claimed_until": {"$lte": now}}
+        ).sort("_id", 1).limit(batch).to_list(None)
+        if not docs:
+            return 0
+
+        await self._collection.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}},
+            {"$set": {"claimed_until": now + timedelta(seconds=CLAIM_SECONDS)}}
+        )
+        # `dispatch` takes the whole batch and returns one future per document,
+        # so a headline fanned out to many chats is handed over in one call.
+        for doc, future in zip(docs, dispatch(docs)):
+            future.add_done_callback(lambda _, doc_id=doc["_id"]: self._sent(doc_id))
+        return len(docs)
+
+    def _sent(self, doc_id):
+        self._done.append(doc_id)
+        if self._deleting is None:
+            self._deleting = create_task(self._delete_done())
+
+    async def _delete_done(self):
+        # Sends finishing while a delete runs are picked up by the next one.
+        try:
+            while self._done:
+                done, self._done = self._done, []
+                try:
+                    await self._collection.delete_many({"_id": {"$in": done}})
+                except Exception as e:
+                    LOGGER.error(f"Could not remove {len(done)} sent deliveries, will retry: {e}")
+                    self._done.extend(done)
+                    return
+        finally:
+            self._deleting = None
@@ -0,0 +1,737 @@
+from asyncio import gather
+from datetime import datetime, timedelta
+from functools import partial
+from time import time
+from typing import List, Tuple, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from bot import bot_loop, LOGGER, BASE_URL, DATABASE_URL, RSS_MAX_BODY_SIZE
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.links_utils import normalize_url
+from bot.helper.rss_helper.cycle import FeedCycle, get_host
+from bot.helper.rss_helper.feed_parser import ITEM_LIMIT, parse_feed
+from bot.helper.rss_helper.fetcher import FeedClientPool, FeedResponse, fetch_feed
+from bot.helper.rss_helper.indexes import setup_indexes
+from bot.helper.rss_helper.metrics import CycleStats, feed_metrics
+from bot.helper.rss_helper.outbox import DeliveryOutbox
+from bot.helper.rss_helper.schedule import next_interval, schedule_update
+from bot.helper.rss_helper.seen import SeenByAll, SeenGuids
+from bot.helper.rss_helper.store import RssStore
+from bot.helper.rss_helper.websub import WebSub
+
+URL_LIVECHART_NEWS = 'https://www.livechart.me/feeds/headlines'
+RSS_DELAY = 300
+RSS_TICK = 60
+RSS_TICK_BATCH = 200
+RSS_LEASE_SECONDS = 180
+LIVECHART_LEASE = "livechart"
+REQUEST_TIMEOUT = 30.0
+MAX_CONSECUTIVE_FAILURES = 3
+RSS_MAX_CONCURRENCY = 20
+RSS_PER_HOST_CONCURRENCY = 2
+RSS_DELIVERY_WORKERS = 4
+WEBSUB_LEASE = "websub"
+WEBSUB_MAINTAIN_INTERVAL = 3600
+# Feeds pushed through a hub are still fetched this often in case pushes stop.
+WEBSUB_SAFETY_POLL = timedelta(hours=6)
+PUSH_BATCH = 100
+feed_clients = None
+rss_store = None
+rss_outbox = None
+websub = None
+livechart_next_check = None
+websub_next_check = None
+
+if DATABASE_URL:
+    try:
+        from bot import get_collection
+
+        RSS_SETTINGS = get_collection('rss_settings')
+        RSS_FEEDS = get_collection('rss_feeds')
+        RSS_FEED_DATA = get_collection('rss_feed_data')
+        RSS_LEASES = get_collection('rss_leases')
+        RSS_CYCLES = get_collection('rss_cycles')
+        RSS_PUSH_INBOX = get_collection('rss_push_inbox')
+        LIVECHARTME_SETTINGS = get_collection('livechartme_settings')
+        LIVECHARTME_DATA = get_collection('livechartme_data')
+        LIVECHARTME_GROUPS = get_collection('livechartme_groups')
+
+        bot_loop.create_task(setup_indexes(RSS_FEEDS.database))
+
+        rss_store = RssStore(
+            RSS_SETTINGS,
+            LIVECHARTME_SETTINGS,
+            RSS_FEEDS,
+            RSS_FEED_DATA,
+            LIVECHARTME_GROUPS,
+            get_collection('rss_changes')
+        )
+        rss_outbox = DeliveryOutbox(get_collection('rss_delivery_queue'))
+        websub = WebSub(get_collection('rss_websub'), BASE_URL)
+
+        feed_clients = FeedClientPool(
+            REQUEST_TIMEOUT,
+            per_host=RSS_PER_HOST_CONCURRENCY,
+            max_connections=RSS_MAX_CONCURRENCY
+        )
+    except Exception as e:
+        LOGGER.error(f"RSS Manager: Initialization failed: {e}")
+        DATABASE_URL = None
+
+
+def livechart_item(record) -> dict:
+    return {
+        'title': record.title,
+        'link': record.link,
+        'source': record.guid,
+        'image': record.enclosure.split('?')[0] if record.enclosure else None
+    }
+
+
+async def fetch_livechart_news(known=None, limit: Optional[int] = ITEM_LIMIT):
+    try:
+        response = await fetch_feed(feed_clients.get(), URL_LIVECHART_NEWS, max_size=RSS_MAX_BODY_SIZE)
+        return await sync_to_async(parse_feed, response.content, known, limit, executor="cpu")
+    except Exception as e:
+        LOGGER.error(f"LiveChart fetch error: {e}")
+        return None
+
+
+async def process_livechart(sink):
+    try:
+        subscribers = rss_store.lc_users()
+        all_groups = list(rss_store.groups.values())
+
+        if not subscribers and not all_groups:
+            return
+
+        LOGGER.info("Checking LiveChart.me for updates...")
+        stored = await LIVECHARTME_DATA.find_one({'_id': 'latest'})
+        seen = seen_guids(stored)
+
+        parsed = await fetch_livechart_news(SeenByAll([seen]) if seen is not None else None)
+        if not parsed:
+            LOGGER.warning("Failed to fetch LiveChart.me feed")
+            return
+
+        if not parsed.item_count:
+            LOGGER.warning("No items in LiveChart.me feed")
+            return
+
+        first_guid = parsed.first_guid
+
+        if not first_guid:
+            LOGGER.warning("No GUID found in first LiveChart item")
+            return
+
+        if not stored:
+            await LIVECHARTME_DATA.insert_one({
+                '_id': 'latest',
+                'seen_guids': SeenGuids().remember([record.key for record in parsed.items]),
+                'updated_at': datetime.utcnow()
+            })
+            LOGGER.info("LiveChartMe initialized")
+            return
+
+        new_records, seen_data = slice_new_items(parsed.items, seen, stored.get('guid', ''))
+        new_items = [livechart_item(record) for record in new_records]
+        if not new_items:
+            if seen_data != stored.get('seen_guids'):
+                await LIVECHARTME_DATA.update_one({'_id': 'latest'}, {'$set': {'seen_guids': seen_data}})
+            return
+
+        deliveries = []
+        for chat_id in subscribers:
+            for item in reversed(new_items):
+                deliveries.append({"kind": "livechart", "chat_id": chat_id, "item": item})
+
+        for group_doc in all_groups:
+            for item in reversed(new_items):
+                deliveries.append({
+                    "kind": "livechart",
+                    "chat_id": group_doc['group_id'],
+                    "item": item,
+                    "group_doc_id": group_doc['_id']
+                })
+
+        await sink(deliveries)
+
+        await LIVECHARTME_DATA.update_one(
+            {'_id': 'latest'},
+            {'$set': {'seen_guids': seen_data, 'updated_at': datetime.utcnow()}}
+        )
+
+        total_targets = len(subscribers) + len(all_groups)
+        LOGGER.info(f"Queued {len(new_items)} LiveChart headlines for {total_targets} targets")
+
+    except Exception as e:
+        LOGGER.error(f"LiveChartMe processing error: {e}", exc_info=True)
+
+
+async def fetch_rss_feed(
+    url: str,
+    etag: str = None,
+    last_modified: str = None,
+    content_hash: str = None,
+    force_fetch: bool = False
+) -> Optional[FeedResponse]:
+    try:
+        headers = {}
+
+        if not force_fetch:
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        else:
+            content_hash = None
+
+        return await fetch_feed(feed_clients.get(), url, headers, content_hash, RSS_MAX_BODY_SIZE)
+
+    except Exception as e:
+        LOGGER.error(f"Error fetching {url}: {e}")
+        return None
+
+
+def seen_guids(feed_data: Optional[dict]) -> Optional[SeenGuids]:
+    if feed_data and 'seen_guids' in feed_data:
+        return SeenGuids(feed_data['seen_guids'])
+    return None
+
+
+def slice_new_items(items: list, seen: Optional[SeenGuids], last_guid: str = '') -> Tuple[list, bytes]:
+    """Items the subscriber has not seen yet, and its updated seen set."""
+    if seen is None:
+        # Older documents only carry the newest guid: everything above it is
+        # new, and from now on every scanned item is remembered.
+        new_items = []
+        for item in items:
+            if last_guid and item.guid and item.guid == last_guid:
+                break
+            new_items.append(item)
+        return new_items, SeenGuids().remember([item.key for item in items])
+
+    new_items = [item for item in items if item.key not in seen]
+    return new_items, seen.remember([item.key for item in new_items])
+
+
+async def check_rss_group(
+    url: str,
+    feeds: List[dict],
+    is_manual: bool = False,
+    pushed: Optional[bytes] = None
+) -> List[dict]:
+    """Fetch stage for every subscription of one URL: one download and parse,
+    then new items are cut per subscriber from their own cursor. A body
+    `pushed` by a WebSub hub takes the place of the download."""
+    LOGGER.info(f"Checking feed: {url} ({len(feeds)} subscriber(s))")
+
+    cursors = [rss_store.feed_data.get(feed['_id']) for feed in feeds]
+
+    # Conditional headers and the body hash are only safe when every
+    # subscriber holds the same validators, otherwise a 304 would hide items
+    # from the ones behind.
+    etag, last_modified, content_hash = None, None, None
+    if all(cursors):
+        etags = {cursor.get('etag') for cursor in cursors}
+        last_modifieds = {cursor.get('last_modified') for cursor in cursors}
+        content_hashes = {cursor.get('content_hash') for cursor in cursors}
+        if len(etags) == 1 and len(last_modifieds) == 1:
+            etag, last_modified = etags.pop(), last_modifieds.pop()
+        if len(content_hashes) == 1:
+            content_hash = content_hashes.pop()
+
+    start_time = time()
+    if pushed is not None:
+        # A push usually carries only the new entries, so the stored
+        # validators are kept for the next safety poll of the full feed.
+        response = FeedResponse(
+            content=pushed,
+            etag=etag,
+            last_modified=last_modified,
+            content_hash=content_hash,
+            status=200,
+            size=len(pushed)
+        )
+    else:
+        response = await fetch_rss_feed(
+            url, etag, last_modified, content_hash, force_fetch=is_manual
+        )
+    fetch_ms = round((time() - start_time) * 1000)
+    content = response.content if response else None
+
+    seen_sets = [seen_guids(cursor) for cursor in cursors]
+
+    latest_items, ttl, hub = [], None, None
+    start_time = time()
+    if content is not None:
+        if is_manual:
+            parsed = await sync_to_async(parse_feed, content, limit=1, executor="cpu")
+        else:
+            # Items every subscriber has already seen are not even built.
+            known = SeenByAll(seen_sets) if all(seen is not None for seen in seen_sets) else None
+            parsed = await sync_to_async(parse_feed, content, known, executor="cpu")
+            if parsed.hub and pushed is None:
+                # Subscribed from the bookkeeping stage, off the fetch slots.
+                hub = (parsed.hub, parsed.self_url or url)
+        latest_items, ttl = parsed.items, parsed.ttl
+    parse_ms = round((time() - start_time) * 1000) if content is not None else 0
+
+    results = []
+    for feed_data, seen in zip(cursors, seen_sets):
+        result = {
+            "feed_data": feed_data,
+            "etag": response.etag if response else None,
+            "last_modified": response.last_modified if response else None,
+            "content_hash": response.content_hash if response else None,
+            "items": [],
+            "seen_guids": None,
+            "cache_hint": response.cache_hint if response else None,
+            "ttl": ttl,
+            "http_status": response.status if response else None,
+            "bytes": response.size if response else 0,
+            "fetch_ms": fetch_ms,
+            "parse_ms": parse_ms,
+            "pushed": pushed is not None,
+            "hub": hub
+        }
+
+        if response is None:
+            result["status"] = "failed"
+        elif response.not_modified:
+            result["status"] = "not_modified"
+        else:
+            result["status"] = "ok"
+            if is_manual:
+                result["items"] = latest_items
+            elif not feed_data:
+                result["seen_guids"] = SeenGuids().remember([item.key for item in latest_items])
+            else:
+                result["items"], result["seen_guids"] = slice_new_items(
+                    latest_items, seen, feed_data.get('last_guid', '')
+                )
+
+        results.append(result)
+
+    return results
+
+
+async def check_rss_feed(feed: dict, is_manual: bool = False) -> dict:
+    results = await check_rss_group(normalize_url(feed['url']), [feed], is_manual)
+    return results[0]
+
+
+async def latest_rss_item(feed: dict):
+    try:
+        result = await check_rss_feed(feed, is_manual=True)
+        return result["items"][0] if result["items"] else None
+    except Exception as e:
+        LOGGER.error(f"Error processing feed: {e}", exc_info=True)
+        return None
+
+
+def feed_schedule(feed_data: dict, result: dict = None, new_items: int = 0, failures: int = 0) -> dict:
+    result = result or {}
+    interval = next_interval(
+        feed_data or {},
+        new_items,
+        failures,
+        hint=result.get("cache_hint"),
+        ttl=result.get("ttl")
+    )
+    return schedule_update(interval, failures)
+
+
+async def record_feed_failure(feed: dict, feed_data: dict, polled: bool = True) -> List[dict]:
+    consecutive_failures = feed_data.get('consecutive_failures', 0) + 1
+    now = datetime.utcnow()
+
+    rss_store.queue_feed_data(
+        feed['_id'],
+        {
+            "last_checked": now,
+            **({"last_polled": now} if polled else {}),
+            "consecutive_failures": consecutive_failures,
+            **feed_schedule(feed_data, failures=consecutive_failures)
+        },
+        {"check_count": 1}
+    )
+
+    if consecutive_failures < MAX_CONSECUTIVE_FAILURES:
+        return []
+
+    await rss_store.update_feed(feed['_id'], {"enabled": False})
+    LOGGER.warning(f"Feed {feed['title']} auto-disabled")
+
+    return [{
+        "kind": "notice",
+        "chat_id": feed['user_id'],
+        "text": (
+            f"**Feed Auto-Disabled**\n\n"
+            f"Feed **{feed['title']}** has failed {consecutive_failures} times.\n\n"
+            f"Please check if the feed URL is still valid."
+        )
+    }]
+
+
+async def record_rss_result(feed: dict, result: dict) -> List[dict]:
+    """Bookkeeping stage of a feed check; returns the messages to send."""
+    feed_data = result["feed_data"]
+    new_etag = result["etag"]
+    new_last_modified = result["last_modified"]
+    current_time = datetime.utcnow()
+    # Only real polls move the WebSub safety poll; pushes do not.
+    polled = {} if result["pushed"] else {"last_polled": current_time}
+
+    if result["status"] == "failed":
+        LOGGER.warning(f"Failed to fetch {feed['title']}")
+        if feed_data:
+            return await record_feed_failure(feed, feed_data)
+        return []
+
+    if result["status"] == "not_modified":
+        if feed_data:
+            rss_store.queue_feed_data(
+                feed['_id'],
+                {
+                    "last_checked": current_time,
+                    **polled,
+                    "consecutive_failures": 0,
+                    **feed_schedule(feed_data, result)
+                },
+                {"check_count": 1, "success_count": 1}
+            )
+        return []
+
+    if not feed_data:
+        if result["seen_guids"]:
+            rss_store.queue_feed_data(feed['_id'], {
+                "seen_guids": result["seen_guids"],
+                "last_checked": current_time,
+                **polled,
+                "etag": new_etag,
+                "last_modified": new_last_modified,
+                "content_hash": result["content_hash"],
+                "total_items": 0,
+                "check_count": 1,
+                "success_count": 1,
+                "consecutive_failures": 0,
+                **feed_schedule(None, result),
+                "created_at": current_time
+            })
+            LOGGER.info(f"Initialized {feed['title']}")
+        return []
+
+    new_items = result["items"]
+
+    if not new_items:
+        rss_store.queue_feed_data(
+            feed['_id'],
+            {
+                "seen_guids": result["seen_guids"],
+                "last_checked": current_time,
+                **polled,
+                "etag": new_etag,
+                "last_modified": new_last_modified,
+                "content_hash": result["content_hash"],
+                "consecutive_failures": 0,
+                **feed_schedule(feed_data, result)
+            },
+            {"check_count": 1, "success_count": 1}
+        )
+        return []
+
+    LOGGER.info(f"Found {len(new_items)} new items in {feed['title']}")
+
+    deliveries = [
+        {
+            "kind": "rss",
+            "chat_id": feed['user_id'],
+            "title": item.title,
+            "link": item.link,
+            "feed_name": feed['title'],
+            "image": item.image
+        }
+        for item in reversed(new_items)
+    ]
+
+    rss_store.queue_feed_data(
+        feed['_id'],
+        {
+            "seen_guids": result["seen_guids"],
+            "last_checked": current_time,
+            **polled,
+            "etag": new_etag,
+            "last_modified": new_last_modified,
+            "content_hash": result["content_hash"],
+            "consecutive_failures": 0,
+            **feed_schedule(feed_data, result, len(new_items))
+        },
+        {
+            "total_items": len(new_items),
+            "check_count": 1,
+            "success_count": 1
+        }
+    )
+
+    return deliveries
+
+
+async def record_feed_error(feed: dict, error: Exception, polled: bool = True) -> List[dict]:
+    LOGGER.error(f"Error processing feed: {error}", exc_info=error)
+
+    feed_data = rss_store.feed_data.get(feed['_id'])
+    if not feed_data:
+        return []
+    return await record_feed_failure(feed, feed_data, polled)
+
+
+async def rss_cycle_fetch(feeds: List[dict]):
+    try:
+        return await check_rss_group(normalize_url(feeds[0]['url']), feeds)
+    except Exception as e:
+        return e
+
+
+async def rss_cycle_deliver(sink, stats: CycleStats, feeds: List[dict], results, pushed: bool = False):
+    if isinstance(results, Exception):
+        stats.urls += 1
+        stats.feeds += len(feeds)
+        stats.failed += 1
+    else:
+        stats.add_fetch(normalize_url(feeds[0]['url']), len(feeds), results[0])
+
+    deliveries = []
+    for index, feed in enumerate(feeds):
+        try:
+            if isinstance(results, Exception):
+                deliveries.extend(await record_feed_error(feed, results, not pushed))
+                continue
+            result = results[index]
+            deliveries.extend(await record_rss_result(feed, result))
+            stats.items += len(result["items"])
+            # New subscriptions get their metrics from the next check on;
+            # pushes cost no fetch and would only skew them.
+            if result["feed_data"] and not result["pushed"]:
+                rss_store.queue_feed_data(feed['_id'], *feed_metrics(result["feed_data"], result))
+        except Exception as e:
+            deliveries.extend(await record_feed_error(feed, e, not pushed))
+    stats.deliveries += len(deliveries)
+    await sink(deliveries)
+
+    if not isinstance(results, Exception) and results[0]["hub"]:
+        hub, topic = results[0]["hub"]
+        try:
+            await websub.subscribe(feed_clients.get(), hub, topic, normalize_url(feeds[0]['url']))
+        except Exception as e:
+            LOGGER.error(f"WebSub subscription for {topic} failed: {e}")
+
+
+def due_subscriptions(feed_users: List[int], now: datetime) -> List[Tuple[str, List[dict]]]:
+    """Distinct URLs with at least one subscriber due, most overdue first.
+
+    Every subscriber of a due URL rides along since the body is fetched anyway.
+    """
+    subscriptions = {}
+    for feed in rss_store.enabled_feeds(feed_users):
+        subscriptions.setdefault(normalize_url(feed['url']), []).append(feed)
+
+    due = []
+    for url, feeds in subscriptions.items():
+        if url in websub.active:
+            due_at = min(
+                ((rss_store.feed_data.get(feed['_id']) or {}).get('last_polled') or now - WEBSUB_SAFETY_POLL)
+                + WEBSUB_SAFETY_POLL
+                for feed in feeds
+            )
+        else:
+            # Feeds without a schedule yet (new or from before adaptive
+            # polling) count as due right now.
+            due_at = min(
+                (rss_store.feed_data.get(feed['_id']) or {}).get('next_check') or now
+                for feed in feeds
+            )
+        if due_at <= now:
+            due.append((due_at, url, feeds))
+
+    due.sort(key=lambda job: job[0])
+    if len(due) > RSS_TICK_BATCH:
+        LOGGER.info(f"{len(due) - RSS_TICK_BATCH} due URL(s) deferred to the next tick")
+    return [(url, feeds) for _, url, feeds in due[:RSS_TICK_BATCH]]
+
+
+async def claim_leases(keys: List[str], owner: str, seconds: int) -> set:
+    """Claim the keys not leased by another worker; returns the ones we hold.
+
+    A live lease makes the upsert's filter miss and the insert collide on
+    `_id`, so exactly one worker wins each expired or missing lease.
+    """
+    if not keys:
+        return set()
+    now = datetime.utcnow()
+    requests = [
+        UpdateOne(
+            {"_id": key, "lease_until": {"$lte": now}},
+            {"$set": {"lease_owner": owner, "lease_until": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+        for key in keys
+    ]
+    try:
+        await RSS_LEASES.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        errors = [error for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+        if errors:
+            LOGGER.error(f"Lease claim errors: {errors[:3]}")
+
+    claimed = set()
+    async for lease in RSS_LEASES.find(
+        {"_id": {"$in": keys}, "lease_owner": owner, "lease_until": {"$gt": now}},
+        {"_id": 1}
+    ):
+        claimed.add(lease["_id"])
+    return claimed
+
+
+async def process_push_inbox(sink, feed_users: List[int], lease_owner: str = None):
+    """Run bodies pushed by WebSub hubs through the polling path.
+
+    With several workers an entry is only taken once its feed's lease is
+    held, and removed as it is taken, so every push is handled once. Pushes
+    for feeds leased by another worker stay in the inbox for a later round;
+    anything lost on the way is picked up by the safety poll.
+    """
+    subscriptions = {}
+    for feed in rss_store.enabled_feeds(feed_users):
+        subscriptions.setdefault(normalize_url(feed['url']), []).append(feed)
+
+    stats = CycleStats("websub")
+    pending = await RSS_PUSH_INBOX.find({}, {"url": 1}).sort("_id", 1).limit(PUSH_BATCH).to_list(None)
+    for entry in pending:
+        feeds = subscriptions.get(entry['url'])
+        if feeds and lease_owner is not None and not await claim_leases([entry['url']], lease_owner, RSS_LEASE_SECONDS):
+            continue
+        doc = await RSS_PUSH_INBOX.find_one_and_delete({"_id": entry["_id"]})
+        if doc is None or not feeds:
+            continue
+        try:
+            results = await check_rss_group(doc['url'], feeds, pushed=doc['content'])
+        except Exception as e:
+            results = e
+        await rss_cycle_deliver(sink, stats, feeds, results, pushed=True)
+
+    if stats.urls:
+        await record_cycle(stats)
+
+
+async def record_cycle(stats: CycleStats):
+    cycle = stats.finish()
+    LOGGER.info(
+        f"RSS cycle: {cycle['urls']} URL(s) in {cycle['duration_ms']}ms, "
+        f"{cycle['modified']} changed, {cycle['not_modified']} not modified, "
+        f"{cycle['unchanged']} unchanged, {cycle['failed']} failed, "
+        f"{cycle['bytes']} bytes, {cycle['deliveries']} message(s)"
+    )
+    try:
+        await RSS_CYCLES.insert_one(cycle)
+    except Exception as e:
+        LOGGER.error(f"Could not save RSS cycle stats: {e}")
+
+
+async def load_rss_stats(hours: int = 24, limit: int = 10) -> dict:
+    """Recent cycles, the slowest feeds and the outbox backlog, newest first."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    cycles = await RSS_CYCLES.find(
+        {"started_at": {"$gte": since}}, {"_id": 0}
+    ).sort("started_at", -1).to_list(None)
+    feeds = await RSS_FEED_DATA.find(
+        {"avg_fetch_ms": {"$exists": True}},
+        {"_id": 0, "seen_guids": 0, "etag": 0, "last_modified": 0, "content_hash": 0}
+    ).sort("avg_fetch_ms", -1).limit(limit).to_list(None)
+    outbox = await rss_outbox.pending()
+    return {"cycles": cycles, "feeds": feeds, "outbox": outbox}
+
+
+async def maintain_websub(now: datetime, lease_owner: str = None):
+    global websub_next_check
+
+    if websub_next_check is None or websub_next_check <= now:
+        websub_next_check = now + timedelta(seconds=WEBSUB_MAINTAIN_INTERVAL)
+        if lease_owner is None or await claim_leases([WEBSUB_LEASE], lease_owner, WEBSUB_MAINTAIN_INTERVAL // 2):
+            used_urls = {normalize_url(feed['url']) for feed in rss_store.feeds.values()}
+            try:
+                await websub.maintain(feed_clients.get(), used_urls)
+                return
+            except Exception as e:
+                LOGGER.error(f"WebSub maintenance error: {e}")
+    await websub.refresh()
+
+
+async def run_cycle(sink, lease_owner: str = None):
+    """One polling pass: LiveChart when its interval is up, then every due feed.
+
+    `sink` receives lists of delivery dicts. With `lease_owner` set the
+    LiveChart check and each URL are leased first, so several workers can
+    share one database without polling anything twice.
+    """
+    global livechart_next_check
+
+    await rss_store.load()
+    now = datetime.utcnow()
+    stats = CycleStats(lease_owner or "bot")
+
+    rss_enabled_users = rss_store.rss_users()
+
+    if not rss_enabled_users:
+        LOGGER.info("RSS master switch disabled for all users, skipping cycle")
+        return
+
+    lc_users = [user_id for user_id in rss_store.lc_users() if user_id in rss_enabled_users]
+    has_groups = bool(rss_store.groups)
+
+    tasks = []
+    if (lc_users or has_groups) and (livechart_next_check is None or livechart_next_check <= now):
+        livechart_next_check = now + timedelta(seconds=RSS_DELAY)
+        if lease_owner is None or await claim_leases([LIVECHART_LEASE], lease_owner, RSS_DELAY - RSS_TICK // 2):
+            tasks.append(process_livechart(sink))
+
+    feed_users = rss_store.rss_users(feeds_enabled=True)
+
+    if websub.enabled:
+        await maintain_websub(now, lease_owner)
+        if feed_users and await RSS_PUSH_INBOX.estimated_document_count():
+            tasks.append(process_push_inbox(sink, feed_users, lease_owner))
+
+    if feed_users:
+        jobs = due_subscriptions(feed_users, now)
+
+        if jobs and lease_owner is not None:
+            claimed = await claim_leases([url for url, _ in jobs], lease_owner, RSS_LEASE_SECONDS)
+            jobs = [(url, feeds) for url, feeds in jobs if url in claimed]
+
+        if jobs:
+            feed_count = sum(len(feeds) for _, feeds in jobs)
+            LOGGER.info(f"Fetching {len(jobs)} due URL(s) for {feed_count} feed(s)")
+            feed_clients.get(len({get_host(url) for url, _ in jobs}))
+            cycle = FeedCycle(
+                rss_cycle_fetch,
+                partial(rss_cycle_deliver, sink, stats),
+                max_concurrency=RSS_MAX_CONCURRENCY,
+                per_host=RSS_PER_HOST_CONCURRENCY,
+                delivery_workers=RSS_DELIVERY_WORKERS
+            )
+            tasks.append(cycle.run(jobs))
+
+    if not tasks:
+        return
+
+    LOGGER.info("=" * 50)
+    LOGGER.info("RSS Monitor: Starting check cycle...")
+    await gather(*tasks)
+    await rss_store.flush()
+    if stats.urls:
+        await record_cycle(stats)
+    LOGGER.info("RSS Monitor: Check cycle completed")
+    LOGGER.info("=" * 50)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from random import uniform
+
+DEFAULT_INTERVAL = 300
+MIN_INTERVAL = 120
+MAX_INTERVAL = 6 * 3600
+MAX_BACKOFF = 24 * 3600
+JITTER = 0.15
+
+
+def _http_date(value: str) -> datetime | None:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return parsed
+
+
+def cache_hint(headers) -> int | None:
+    """Seconds the server asked us to keep the response, if it said so.
+
+    `max-age` wins over `Expires`, as in HTTP caching; `no-cache` and
+    `no-store` are not a request to poll faster, so they give no hint.
+    """
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() in ("max-age", "s-maxage"):
+            try:
+                return max(int(value.strip('"')), 0)
+            except ValueError:
+                break
+    expires = _http_date(headers.get("Expires", ""))
+    if expires is None:
+        return None
+    now = _http_date(headers.get("Date", "")) or datetime.utcnow()
+    return max(int((expires - now).total_seconds()), 0)
+
+
+def observed_interval(feed_data: dict, now: datetime) -> float | None:
+    """Mean time between new items since the subscription was created."""
+    created_at = feed_data.get("created_at")
+    total_items = feed_data.get("total_items", 0)
+    if not created_at or not total_items:
+        return None
+    return max((now - created_at).total_seconds(), 0) / total_items
+
+
+def jitter(seconds: float) -> float:
+    return seconds * uniform(1 - JITTER, 1 + JITTER)
+
+
+def first_check(now: datetime, interval: float = DEFAULT_INTERVAL) -> datetime:
+    # New or migrated feeds land anywhere in their first interval instead of
+    # all being due on the same tick.
+    return now + timedelta(seconds=uniform(0, interval))
+
+
+def next_interval(
+    feed_data: dict,
+    new_items: int = 0,
+    failures: int = 0,
+    hint: int | None = None,
+    ttl: int | None = None,
+    now: datetime | None = None,
+) -> float:
+    """Seconds until a feed should be polled again.
+
+    A success moves the previous interval towards half the feed's observed
+    item gap: it halves when items arrived and grows by a quarter when none
+    did. Server hints (`Cache-Control`/`Expires`, RSS `<ttl>` in minutes) are
+    a floor. Failures back off exponentially from the last good interval.
+    """
+    now = now or datetime.utcnow()
+    previous = feed_data.get("check_interval") or DEFAULT_INTERVAL
+
+    if failures:
+        return min(previous * 2 ** failures, MAX_BACKOFF)
+
+    interval = previous / 2 if new_items else previous * 1.25
+    observed = observed_interval(feed_data, now)
+    if observed is not None:
+        interval = (interval + observed / 2) / 2
+    if hint:
+        interval = max(interval, hint)
+    if ttl:
+        interval = max(interval, ttl * 60)
+    return min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+
+
+def schedule_update(interval: float, failures: int = 0, now: datetime | None = None) -> dict:
+    """`$set` fields recording the next due time of a feed.
+
+    The backoff of a failing feed is not stored as its interval, so it goes
+    back to its usual pace after the next success.
+    """
+    now = now or datetime.utcnow()
+    fields = {"next_check": now + timedelta(seconds=jitter(interval))}
+    if not failures:
+        fields["check_interval"] = interval
+    return fields
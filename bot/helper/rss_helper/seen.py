@@ -0,0 +1,67 @@
+from hashlib import blake2b
+
+SEEN_CAPACITY = 64
+HASH_SIZE = 8
+
+
+def guid_hash(guid: str) -> bytes:
+    return blake2b(guid.encode(), digest_size=HASH_SIZE).digest()
+
+
+class SeenByAll:
+    """`known` predicate for parse_feed: seen by every one of `seen_sets`.
+
+    A class rather than a closure so it can be sent to the parsing process.
+    """
+
+    __slots__ = ("seen_sets",)
+
+    def __init__(self, seen_sets):
+        self.seen_sets = seen_sets
+
+    def __call__(self, key) -> bool:
+        return all(key in seen for seen in self.seen_sets)
+
+
+class SeenGuids:
+    """The most recent item guids of a feed, kept as fixed-size hashes.
+
+    The stored form is a single binary field of at most `SEEN_CAPACITY`
+    8-byte blake2b digests, oldest first, so a feed's history never grows
+    past half a kilobyte. Membership goes through a set built once per
+    instance. Entries are item keys (`FeedItem.key`: the guid, else link
+    and title); an empty key is never considered seen.
+    """
+
+    __slots__ = ("data", "_hashes")
+
+    def __init__(self, data: bytes | None = None):
+        self.data = bytes(data or b"")[-SEEN_CAPACITY * HASH_SIZE:]
+        self._hashes = {
+            self.data[index:index + HASH_SIZE]
+            for index in range(0, len(self.data), HASH_SIZE)
+        }
+
+    def __contains__(self, key) -> bool:
+        return bool(key) and guid_hash(key) in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def remember(self, keys) -> bytes:
+        """Add item `keys` (newest first, as they appear in a feed) and return
+        the new stored form, dropping the oldest hashes past the capacity."""
+        added = bytearray()
+        for key in reversed(keys):
+            if not key:
+                continue
+            digest = guid_hash(key)
+            if digest not in self._hashes:
+                self._hashes.add(digest)
+                added += digest
+        if added:
+            data = self.data + bytes(added)
+            self.data = data[-SEEN_CAPACITY * HASH_SIZE:]
+            for index in range(0, len(data) - len(self.data), HASH_SIZE):
+                self._hashes.discard(data[index:index + HASH_SIZE])
+        return self.data
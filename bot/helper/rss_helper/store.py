@@ -0,0 +1,306 @@
+from asyncio import Lock
+from datetime import datetime, timedelta
+from time import time
+
+from pymongo import UpdateOne
+
+from bot import LOGGER
+
+# Changes are looked up this far before the last sync, since the processes
+# writing them may run on hosts whose clocks disagree a little.
+CHANGE_SKEW = 60
+
+
+def _merge(pending: dict, set_fields: dict, inc_fields: dict, upsert: bool = False):
+    # A field may only appear under one operator in a Mongo update. A `$set`
+    # replaces an earlier `$inc`; an `$inc` on a field that is already being
+    # set is folded into the set value.
+    for key, value in set_fields.items():
+        pending["$inc"].pop(key, None)
+        pending["$set"][key] = value
+    for key, value in inc_fields.items():
+        if key in pending["$set"]:
+            pending["$set"][key] += value
+        else:
+            pending["$inc"][key] = pending["$inc"].get(key, 0) + value
+    pending["upsert"] = pending["upsert"] or upsert
+
+
+class RssStore:
+    """In-memory copy of the RSS and LiveChart collections.
+
+    Everything is read once on first use and then served from memory. User
+    actions (settings, subscriptions, groups) are written through to Mongo
+    right away. Bookkeeping from the polling cycle is applied to memory at once
+    but only queued for Mongo, and `flush` sends the whole batch as a single
+    `bulk_write`.
+
+    With a `changes` collection every user action also records what it
+    touched there, and `sync` re-reads just those documents, so another
+    process (the RSS worker) keeps up without reading everything again.
+    """
+
+    def __init__(self, settings, lc_settings, feeds, feed_data, groups, changes=None):
+        self._settings_col = settings
+        self._lc_settings_col = lc_settings
+        self._feeds_col = feeds
+        self._feed_data_col = feed_data
+        self._groups_col = groups
+        self._changes_col = changes
+        self._lock = Lock()
+        self.loaded = False
+        self._synced_at = None
+        self.settings = {}
+        self.lc_settings = {}
+        self.feeds = {}
+        self.feed_data = {}
+        self.groups = {}
+        self._pending_feed_data = {}
+
+    async def load(self):
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            start_time = time()
+            self._synced_at = datetime.utcnow()
+            self.settings = {doc["_id"]: doc async for doc in self._settings_col.find()}
+            self.lc_settings = {doc["_id"]: doc async for doc in self._lc_settings_col.find()}
+            self.feeds = {doc["_id"]: doc async for doc in self._feeds_col.find()}
+            self.feed_data = {doc["feed_id"]: doc async for doc in self._feed_data_col.find()}
+            self.groups = {doc["_id"]: doc async for doc in self._groups_col.find()}
+            self.loaded = True
+            LOGGER.info(
+                f"RSS store loaded {len(self.feeds)} feed(s), {len(self.settings)} user(s) "
+                f"and {len(self.groups)} group(s) in {time() - start_time:.2f}s"
+            )
+
+    async def _changed(self, kind: str, key):
+        if self._changes_col is not None:
+            await self._changes_col.insert_one({"kind": kind, "key": key, "at": datetime.utcnow()})
+
+    async def sync(self):
+        """Re-read the documents other processes changed since the last sync."""
+        if not self.loaded or self._changes_col is None:
+            await self.load()
+            return
+        since = self._synced_at - timedelta(seconds=CHANGE_SKEW)
+        self._synced_at = datetime.utcnow()
+        changed = {
+            (change["kind"], change["key"])
+            async for change in self._changes_col.find({"at": {"$gt": since}}, {"kind": 1, "key": 1})
+        }
+        collections = {
+            "settings": (self._settings_col, self.settings),
+            "lc_settings": (self._lc_settings_col, self.lc_settings),
+            "groups": (self._groups_col, self.groups),
+        }
+        for kind, key in changed:
+            if kind == "feeds":
+                await self.refresh_feed(key)
+                continue
+            collection, docs = collections[kind]
+            doc = await collection.find_one({"_id": key})
+            if doc is None:
+                docs.pop(key, None)
+            else:
+                docs[key] = doc
+
+    async def refresh_feed(self, feed_id: str):
+        """Re-read one subscription that another process may have changed,
+        keeping updates to it that are still queued."""
+        await self.load()
+        feed = await self._feeds_col.find_one({"_id": feed_id})
+        if feed is None:
+            self.feeds.pop(feed_id, None)
+            self.feed_data.pop(feed_id, None)
+            self._pending_feed_data.pop(feed_id, None)
+            return
+        self.feeds[feed_id] = feed
+        feed_data = await self._feed_data_col.find_one({"feed_id": feed_id})
+        if feed_data is not None:
+            pending = self._pending_feed_data.get(feed_id)
+            if pending:
+                feed_data.update(pending["$set"])
+                for key, value in pending["$inc"].items():
+                    feed_data[key] = feed_data.get(key, 0) + value
+            self.feed_data[feed_id] = feed_data
+
+    async def get_settings(self, user_id: int) -> dict:
+        await self.load()
+        settings = self.settings.get(user_id)
+        if settings is None:
+            settings = {"_id": user_id, "rss_enabled": False, "feeds_enabled": False}
+            await self._settings_col.insert_one(settings)
+            self.settings[user_id] = settings
+            await self._changed("settings", user_id)
+        return settings
+
+    async def update_settings(self, user_id: int, fields: dict):
+        await self.load()
+        await self._settings_col.update_one({"_id": user_id}, {"$set": fields}, upsert=True)
+        self.settings.setdefault(user_id, {"_id": user_id}).update(fields)
+        await self._changed("settings", user_id)
+
+    async def get_lc_settings(self, user_id: int) -> dict:
+        await self.load()
+        settings = self.lc_settings.get(user_id)
+        if settings is None:
+            settings = {"_id": user_id, "enabled": False}
+            await self._lc_settings_col.insert_one(settings)
+            self.lc_settings[user_id] = settings
+            await self._changed("lc_settings", user_id)
+        return settings
+
+    async def update_lc_settings(self, user_id: int, fields: dict):
+        await self.load()
+        await self._lc_settings_col.update_one({"_id": user_id}, {"$set": fields}, upsert=True)
+        self.lc_settings.setdefault(user_id, {"_id": user_id}).update(fields)
+        await self._changed("lc_settings", user_id)
+
+    def rss_users(self, feeds_enabled: bool = False) -> list:
+        return [
+            user_id for user_id, settings in self.settings.items()
+            if settings.get("rss_enabled") and (not feeds_enabled or settings.get("feeds_enabled"))
+        ]
+
+    def lc_users(self) -> list:
+        return [user_id for user_id, settings in self.lc_settings.items() if settings.get("enabled")]
+
+    async def user_feeds(self, user_id: int) -> list:
+        await self.load()
+        feeds = [feed for feed in self.feeds.values() if feed["user_id"] == user_id]
+        return sorted(feeds, key=lambda feed: feed["title"])
+
+    async def get_feed(self, user_id: int, feed_id: str) -> dict | None:
+        await self.load()
+        feed = self.feeds.get(feed_id)
+        if feed is None or feed["user_id"] != user_id:
+            return None
+        return feed
+
+    async def find_feed_by_url(self, user_id: int, url: str) -> dict | None:
+        await self.load()
+        for feed in self.feeds.values():
+            if feed["user_id"] == user_id and feed["url"] == url:
+                return feed
+        return None
+
+    def enabled_feeds(self, user_ids) -> list:
+        user_ids = set(user_ids)
+        return [
+            feed for feed in self.feeds.values()
+            if feed["user_id"] in user_ids and feed.get("enabled", True)
+        ]
+
+    async def add_feed(self, feed_doc: dict, feed_data: dict):
+        await self.load()
+        await self._feeds_col.insert_one(feed_doc)
+        await self._feed_data_col.insert_one(feed_data)
+        self.feeds[feed_doc["_id"]] = feed_doc
+        self.feed_data[feed_doc["_id"]] = feed_data
+        await self._changed("feeds", feed_doc["_id"])
+
+    async def remove_feed(self, user_id: int, feed_id: str) -> bool:
+        await self.load()
+        result = await self._feeds_col.delete_one({"_id": feed_id, "user_id": user_id})
+        if not result.deleted_count:
+            return False
+        await self._feed_data_col.delete_one({"feed_id": feed_id})
+        self.feeds.pop(feed_id, None)
+        self.feed_data.pop(feed_id, None)
+        self._pending_feed_data.pop(feed_id, None)
+        await self._changed("feeds", feed_id)
+        return True
+
+    async def update_feed(self, feed_id: str, fields: dict):
+        await self._feeds_col.update_one({"_id": feed_id}, {"$set": fields})
+        if feed_id in self.feeds:
+            self.feeds[feed_id].update(fields)
+        await self._changed("feeds", feed_id)
+
+    async def update_feed_data_now(self, feed_id: str, fields: dict):
+        """Write-through update that also overrides anything still queued."""
+        await self._feed_data_col.update_one({"feed_id": feed_id}, {"$set": fields})
+        if feed_id in self.feed_data:
+            self.feed_data[feed_id].update(fields)
+        pending = self._pending_feed_data.get(feed_id)
+        if pending:
+            for key in fields:
+                pending["$set"].pop(key, None)
+                pending["$inc"].pop(key, None)
+        await self._changed("feeds", feed_id)
+
+    def queue_feed_data(self, feed_id: str, set_fields: dict = None, inc_fields: dict = None):
+        # The subscription may have been removed while its check was running.
+        if feed_id not in self.feeds:
+            return
+        set_fields = set_fields or {}
+        inc_fields = inc_fields or {}
+        upsert = feed_id not in self.feed_data
+        doc = self.feed_data.setdefault(feed_id, {"feed_id": feed_id})
+        doc.update(set_fields)
+        for key, value in inc_fields.items():
+            doc[key] = doc.get(key, 0) + value
+        pending = self._pending_feed_data.setdefault(feed_id, {"$set": {}, "$inc": {}, "upsert": False})
+        _merge(pending, set_fields, inc_fields, upsert)
+
+    async def user_groups(self, user_id: int) -> list:
+        await self.load()
+        groups = [group for group in self.groups.values() if group["user_id"] == user_id]
+        return sorted(groups, key=lambda group: group["added_at"], reverse=True)
+
+    async def find_group(self, user_id: int, group_id: int) -> dict | None:
+        await self.load()
+        for group in self.groups.values():
+            if group["user_id"] == user_id and group["group_id"] == group_id:
+                return group
+        return None
+
+    async def add_group(self, group_doc: dict):
+        await self.load()
+        await self._groups_col.insert_one(group_doc)
+        self.groups[group_doc["_id"]] = group_doc
+        await self._changed("groups", group_doc["_id"])
+
+    async def remove_group(self, user_id: int, group_doc_id: str) -> bool:
+        await self.load()
+        result = await self._groups_col.delete_one({"_id": group_doc_id, "user_id": user_id})
+        if not result.deleted_count:
+            return False
+        self.groups.pop(group_doc_id, None)
+        await self._changed("groups", group_doc_id)
+        return True
+
+    async def touch_groups(self, group_doc_ids, set_fields: dict):
+        """Set the same fields on many groups with a single write."""
+        group_doc_ids = [group_doc_id for group_doc_id in group_doc_ids if group_doc_id in self.groups]
+        if not group_doc_ids:
+            return
+        for group_doc_id in group_doc_ids:
+            self.groups[group_doc_id].update(set_fields)
+        await self._groups_col.update_many({"_id": {"$in": group_doc_ids}}, {"$set": set_fields})
+
+    async def flush(self):
+        pending_feed_data, self._pending_feed_data = self._pending_feed_data, {}
+
+        if pending_feed_data:
+            requests = []
+            for feed_id, pending in pending_feed_data.items():
+                update = {op: fields for op, fields in pending.items() if op != "upsert" and fields}
+                if update:
+                    requests.append(UpdateOne({"feed_id": feed_id}, update, upsert=pending["upsert"]))
+            try:
+                if requests:
+                    await self._feed_data_col.bulk_write(requests, ordered=False)
+            except Exception as e:
+                LOGGER.error(f"RSS store: feed data flush failed, will retry: {e}")
+                for feed_id, pending in pending_feed_data.items():
+                    if feed_id not in self.feeds:
+                        continue
+                    newer = self._pending_feed_data.get(feed_id)
+                    if newer is not None:
+                        _merge(pending, newer["$set"], newer["$inc"], newer["upsert"])
+                    self._pending_feed_data[feed_id] = pending
+
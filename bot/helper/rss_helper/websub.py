@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from secrets import token_hex, token_urlsafe
+
+from bot import LOGGER
+
+LEASE_SECONDS = 10 * 24 * 3600
+# Leases are renewed this long before they run out.
+RENEW_BEFORE = timedelta(days=1)
+# A hub that has not verified (or has denied) a request by then is retried.
+RETRY_AFTER = timedelta(days=1)
+
+
+class WebSub:
+    """WebSub (PubSubHubbub) subscriptions for feeds that advertise a hub.
+
+    One subscription per feed URL, shared by all its subscribers. The hub
+    calls back `{callback_base}/websub/<token>`, which the web server answers;
+    pushed bodies land in the push inbox and go through the normal polling
+    path. URLs with an active lease only need an occasional safety poll.
+    """
+
+    def __init__(self, collection, callback_base: str):
+        self._collection = collection
+        self.callback_base = callback_base.rstrip("/")
+        self.active = set()
+        self.known = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.callback_base)
+
+    async def refresh(self):
+        now = datetime.utcnow()
+        self.active, self.known = set(), set()
+        async for doc in self._collection.find({}, {"url": 1, "state": 1, "lease_until": 1}):
+            self.known.add(doc["url"])
+            if doc["state"] == "active" and doc["lease_until"] > now:
+                self.active.add(doc["url"])
+
+    async def _request(self, client, doc: dict, mode: str) -> bool:
+        data = {
+            "hub.callback": f"{self.callback_base}/websub/{doc['_id']}",
+            "hub.mode": mode,
+            "hub.topic": doc["topic"],
+        }
+        if mode == "subscribe":
+            data["hub.lease_seconds"] = str(LEASE_SECONDS)
+            data["hub.secret"] = doc["secret"]
+        try:
+            response = await client.post(doc["hub"], data=data)
+        except Exception as e:
+            LOGGER.warning(f"WebSub {mode} request to {doc['hub']} failed: {e}")
+            return False
+        if response.status_code not in (202, 204):
+            LOGGER.warning(f"WebSub hub {doc['hub']} refused {mode} for {doc['topic']}: {response.status_code}")
+            return False
+        return True
+
+    async def subscribe(self, client, hub: str, topic: str, url: str):
+        if not self.enabled or url in self.known:
+            return
+        self.known.add(url)
+        if await self._collection.find_one({"url": url}, {"_id": 1}):
+            return
+        doc = {
+            "_id": token_urlsafe(16),
+            "url": url,
+            "topic": topic,
+            "hub": hub,
+            "secret": token_hex(20),
+            "state": "pending",
+            "lease_until": None,
+            "requested_at": datetime.utcnow(),
+        }
+        await self._collection.insert_one(doc)
+        if await self._request(client, doc, "subscribe"):
+            LOGGER.info(f"WebSub subscription requested for {topic} at {hub}")
+
+    async def maintain(self, client, used_urls: set):
+        """Renew leases close to expiry, drop URLs nobody follows any more and
+        forget requests the hub never confirmed."""
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        async for doc in self._collection.find():
+            if doc["url"] not in used_urls:
+                if doc["state"] == "active":
+                    await self._collection.update_one({"_id": doc["_id"]}, {"$set": {"state": "unsubscribing"}})
+                    await self._request(client, doc, "unsubscribe")
+                else:
+                    await self._collection.delete_one({"_id": doc["_id"]})
+            elif doc["state"] == "active" and doc["lease_until"] - RENEW_BEFORE <= now:
+                if await self._request(client, doc, "subscribe"):
+                    await self._collection.update_one({"_id": doc["_id"]}, {"$set": {"requested_at": now}})
+            elif doc["state"] != "active" and doc["requested_at"] + RETRY_AFTER <= now:
+                await self._collection.delete_one({"_id": doc["_id"]})
+        await self.refresh()
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+
+from bot import LOGGER, DATABASE_URL, OWNER_ID, get_collection, user_data
+from bot.helper.ext_utils.bot_utils import update_user_ldata
+
+
+@dataclass(frozen=True, slots=True)
+class AuthSets:
+    owner: frozenset
+    sudo: frozenset
+    authorized: frozenset
+
+
+class AuthStore:
+    """Who may use the bot, persisted in Mongo and mirrored in frozen sets.
+
+    `user_data` stays the source the sets are built from: it is seeded from
+    AUTHORIZED_CHATS / SUDO_USERS and then from the database at startup, and
+    every change is written through to the collection before the sets are
+    rebuilt. The sets are swapped in as one object, so a filter never sees
+    sudo and authorized from two different states. The owner is in every set
+    and sudo users are authorized, so each filter is a single lookup.
+    """
+
+    def __init__(self, collection=None):
+        self._collection = collection
+        self.sets = AuthSets(frozenset(), frozenset(), frozenset())
+        self._rebuild()
+
+    def _rebuild(self):
+        owner = frozenset({OWNER_ID})
+        sudo = owner | {id_ for id_, data in user_data.items() if data.get("is_sudo")}
+        authorized = sudo | {id_ for id_, data in user_data.items() if data.get("is_auth")}
+        self.sets = AuthSets(owner, sudo, authorized)
+
+    async def load(self):
+        if self._collection is not None:
+            try:
+                async for doc in self._collection.find({}):
+                    user_data.setdefault(doc["_id"], {}).update(
+                        {key: doc[key] for key in ("is_auth", "is_sudo") if key in doc}
+                    )
+            except Exception as e:
+                LOGGER.error(f"Could not load authorized users: {e}")
+        self._rebuild()
+        LOGGER.info(
+            f"Loaded {len(self.sets.sudo) - 1} sudo users and "
+            f"{len(self.sets.authorized - self.sets.sudo)} authorized users/chats"
+        )
+
+    async def update(self, id_, key, value):
+        update_user_ldata(id_, key, value)
+        if self._collection is not None:
+            await self._collection.update_one({"_id": id_}, {"$set": {key: value}}, upsert=True)
+        self._rebuild()
+
+    def has_flag(self, id_, key) -> bool:
+        # Only what was granted to the id itself; the owner and sudo users
+        # are authorized without an is_auth flag of their own.
+        return bool(user_data.get(id_, {}).get(key))
+
+    def is_authorized(self, id_) -> bool:
+        return id_ in self.sets.authorized
+
+    def is_sudo(self, id_) -> bool:
+        return id_ in self.sets.sudo
+
+
+auth_store = AuthStore(get_collection("users") if DATABASE_URL else None)
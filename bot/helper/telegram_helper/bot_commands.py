@@ -8,6 +8,7 @@ class _BotCommands:
         self.PingCommand = f"ping"
         self.RestartCommand = f"restart"
         self.StatsCommand = f"stats"
+        self.LoopStatsCommand = f"loopstats"
         self.HelpCommand = f"help"
         self.LogCommand = f"log"
         self.ShellCommand = f"shell"
@@ -16,6 +17,7 @@ class _BotCommands:
         self.ClearLocalsCommand = f"clearlocals"
         self.BotSetCommand = f"bsetting"
         self.RssCommand = f"rss"
+        self.RssStatsCommand = f"rssstats"
         self.MediainfoCommand = f"mediainfo"
 
 
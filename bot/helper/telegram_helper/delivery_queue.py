@@ -0,0 +1,157 @@
+from asyncio import PriorityQueue, sleep
+from heapq import heappop, heappush
+from itertools import count
+from time import monotonic
+
+from pyrogram.errors import FloodWait
+
+from bot import LOGGER, bot_loop
+
+GLOBAL_RATE = 30
+PRIVATE_CHAT_RATE = 1
+GROUP_CHAT_RATE = 20 / 60
+DELIVERY_WORKERS = 16
+MAX_IDLE_CHATS = 5000
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def _refill(self):
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill()
+        self.tokens -= 1
+
+    async def acquire(self):
+        while (wait := self.delay()) > 0:
+            await sleep(wait)
+        self.consume()
+
+
+class ChatState:
+    __slots__ = ("jobs", "bucket", "blocked_until", "scheduled")
+
+    def __init__(self, chat_id):
+        # Positive ids are private chats, negative ones groups and channels.
+        rate = PRIVATE_CHAT_RATE if chat_id > 0 else GROUP_CHAT_RATE
+        self.jobs = []
+        self.bucket = TokenBucket(rate)
+        self.blocked_until = 0
+        self.scheduled = False
+
+    def wait_time(self):
+        return max(self.bucket.delay(), self.blocked_until - monotonic(), 0)
+
+
+class DeliveryQueue:
+    """Outbound Telegram scheduler with a global and a per-chat rate limit.
+
+    Jobs are zero-argument callables returning the send coroutine. Each chat
+    has its own FIFO (by priority) and at most one send in flight, so order
+    inside a chat is kept while other chats proceed. A FloodWait only parks the
+    chat that caused it; its job is retried once the wait is over.
+    """
+
+    def __init__(self, workers=DELIVERY_WORKERS):
+        self.workers = workers
+        self._ready = None
+        self._tasks = []
+        self._chats = {}
+        self._seq = count()
+        self._global = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self.sent = 0
+        self.failed = 0
+        self.flood_waits = 0
+
+    def _start(self):
+        if self._tasks:
+            return
+        self._ready = PriorityQueue()
+        self._tasks = [bot_loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    @property
+    def pending(self):
+        return sum(len(chat.jobs) for chat in self._chats.values())
+
+    def submit(self, chat_id, send, priority=PRIORITY_NORMAL):
+        self._start()
+        if len(self._chats) > MAX_IDLE_CHATS:
+            self._prune()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = ChatState(chat_id)
+        future = bot_loop.create_future()
+        heappush(chat.jobs, (priority, next(self._seq), send, future))
+        if not chat.scheduled:
+            self._schedule(chat_id, chat)
+        return future
+
+    def _schedule(self, chat_id, chat):
+        chat.scheduled = True
+        priority, seq = chat.jobs[0][:2]
+        if wait := chat.wait_time():
+            bot_loop.call_later(wait, self._ready.put_nowait, (priority, seq, chat_id))
+        else:
+            self._ready.put_nowait((priority, seq, chat_id))
+
+    def _prune(self):
+        now = monotonic()
+        for chat_id, chat in list(self._chats.items()):
+            if not chat.scheduled and chat.blocked_until <= now and not chat.bucket.delay():
+                del self._chats[chat_id]
+
+    async def _worker(self):
+        while True:
+            _, _, chat_id = await self._ready.get()
+            chat = self._chats[chat_id]
+            priority, seq, send, future = heappop(chat.jobs)
+            try:
+                if future.done():
+                    continue
+                await self._global.acquire()
+                chat.bucket.consume()
+                try:
+                    result = await send()
+                except FloodWait as f:
+                    self.flood_waits += 1
+                    LOGGER.warning(f"FloodWait {f.value}s for chat {chat_id}")
+                    chat.blocked_until = monotonic() + f.value * 1.2
+                    heappush(chat.jobs, (priority, seq, send, future))
+                except Exception as e:
+                    self.failed += 1
+                    LOGGER.error(f"Delivery to {chat_id} failed: {e}")
+                    future.set_exception(e)
+                    # Fire-and-forget callers never await; keep asyncio from
+                    # logging the exception a second time on collection.
+                    future.exception()
+                else:
+                    self.sent += 1
+                    future.set_result(result)
+            except Exception as e:
+                LOGGER.error(f"Delivery worker error: {e}", exc_info=True)
+            finally:
+                if chat.jobs:
+                    self._schedule(chat_id, chat)
+                else:
+                    chat.scheduled = False
+
+
+delivery_queue = DeliveryQueue()
@@ -1,39 +1,24 @@
 from pyrogram.filters import create
 
-from bot import user_data, OWNER_ID
+from bot.helper.telegram_helper.auth_store import auth_store
 
 
 class CustomFilters:
     async def owner_filter(self, _, update):
         user = update.from_user or update.sender_chat
-        uid = user.id
-        return uid == OWNER_ID
+        return user.id in auth_store.sets.owner
 
     owner = create(owner_filter)
 
     async def authorized_user(self, _, update):
         user = update.from_user or update.sender_chat
-        uid = user.id
-        chat_id = update.chat.id
-        return bool(
-            uid == OWNER_ID
-            or (
-                uid in user_data
-                and (
-                    user_data[uid].get("is_auth", False)
-                    or user_data[uid].get("is_sudo", False)
-                )
-            )
-            or (chat_id in user_data and user_data[chat_id].get("is_auth", False))
-        )
+        authorized = auth_store.sets.authorized
+        return user.id in authorized or update.chat.id in authorized
 
     authorized = create(authorized_user)
 
     async def sudo_user(self, _, update):
         user = update.from_user or update.sender_chat
-        uid = user.id
-        return bool(
-            uid == OWNER_ID or uid in user_data and user_data[uid].get("is_sudo")
-        )
+        return user.id in auth_store.sets.sudo
 
     sudo = create(sudo_user)
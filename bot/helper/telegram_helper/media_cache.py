@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pyrogram.errors import FileIdInvalid, MediaEmpty, WebpageCurlFailed, WebpageMediaEmpty
+
+from bot import LOGGER, DATABASE_URL, bot, bot_loop, get_collection
+
+CACHE_MAX_SIZE = 2000
+NEGATIVE_TTL = timedelta(hours=12)
+
+
+class MediaCache:
+    """Remember Telegram file_ids of remote images sent as photos.
+
+    The first send of a URL lets Telegram fetch it; every later send reuses
+    the returned file_id, so the image is downloaded once instead of once per
+    chat. URLs Telegram could not fetch are remembered too and go straight to
+    the fallback picture until NEGATIVE_TTL expires. Entries live in an
+    in-memory LRU backed by a Mongo collection so they survive restarts.
+    """
+
+    def __init__(self, collection=None, max_size=CACHE_MAX_SIZE):
+        self._collection = collection
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, url, entry):
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def lookup(self, url):
+        entry = self._entries.get(url)
+        if entry is None and self._collection is not None:
+            entry = await self._collection.find_one({"_id": url})
+            if entry:
+                self._remember(url, entry)
+        if entry is None:
+            return None
+        self._entries.move_to_end(url)
+        if entry.get("failed") and datetime.utcnow() - entry["updated_at"] > NEGATIVE_TTL:
+            await self.forget(url)
+            return None
+        return entry
+
+    async def _store(self, url, **fields):
+        entry = {"_id": url, "updated_at": datetime.utcnow(), **fields}
+        self._remember(url, entry)
+        if self._collection is not None:
+            await self._collection.replace_one({"_id": url}, entry, upsert=True)
+
+    async def store_file_id(self, url, file_id):
+        await self._store(url, file_id=file_id, failed=False)
+
+    async def mark_failed(self, url):
+        await self._store(url, file_id=None, failed=True)
+
+    async def forget(self, url):
+        self._entries.pop(url, None)
+        if self._collection is not None:
+            await self._collection.delete_one({"_id": url})
+
+    async def send_photo(self, chat_id, url, fallback=None, **kwargs):
+        entry = await self.lookup(url)
+        if entry is None and url in self._inflight:
+            # Another chat is uploading this URL right now; wait for its
+            # file_id instead of making Telegram fetch the image again.
+            await self._inflight[url]
+            entry = await self.lookup(url)
+
+        if entry and entry.get("failed"):
+            self.hits += 1
+            if fallback:
+                return await self.send_photo(chat_id, fallback, **kwargs)
+            raise WebpageCurlFailed()
+
+        if entry and entry.get("file_id"):
+            self.hits += 1
+            try:
+                return await bot.send_photo(chat_id=chat_id, photo=entry["file_id"], **kwargs)
+            except (FileIdInvalid, MediaEmpty):
+                LOGGER.warning(f"Cached file_id for {url} rejected, uploading again")
+                await self.forget(url)
+
+        self.misses += 1
+        waiter = None
+        if url not in self._inflight:
+            waiter = self._inflight[url] = bot_loop.create_future()
+        try:
+            msg = await bot.send_photo(chat_id=chat_id, photo=url, **kwargs)
+            if msg and msg.photo:
+                await self.store_file_id(url, msg.photo.file_id)
+            return msg
+        except (WebpageCurlFailed, WebpageMediaEmpty):
+            LOGGER.warning(f"Telegram could not fetch {url}, caching as failed")
+            await self.mark_failed(url)
+            if not fallback:
+                raise
+        finally:
+            if waiter is not None:
+                del self._inflight[url]
+                waiter.set_result(None)
+        return await self.send_photo(chat_id, fallback, **kwargs)
+
+
+media_cache = MediaCache(get_collection("rss_media_cache") if DATABASE_URL else None)
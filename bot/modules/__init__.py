@@ -1,6 +1,173 @@
 import glob
-import importlib
+from asyncio import Lock
+from importlib import import_module
+from inspect import iscoroutinefunction
 from os.path import dirname, basename, isfile
+from time import time
+
+from pyrogram import ContinuePropagation, StopPropagation
+from pyrogram.filters import command, regex
+from pyrogram.handlers import CallbackQueryHandler, EditedMessageHandler, MessageHandler
+
+from bot import bot, LOGGER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.telegram_helper.bot_commands import BotCommands
+from bot.helper.telegram_helper.filters import CustomFilters
+
+# Modules listed here are imported on the first update that matches one of
+# their commands or callback data patterns (searched like pyrogram's
+# `regex`). Commands are also checked against the filter the module's own
+# command handlers use, so nobody else can trigger the import; the callbacks
+# check the user themselves. Any other module is imported at startup; rss has
+# to be, since it schedules its polling job on import and reacts to plain
+# replies.
+MANIFEST = {
+    "anime": {
+        "commands": ["anime", "manga", "character", "airing", "top", "genres", "tags", "browse"],
+        "callbacks": [r"^anime(page|btn|desc|char|browse)_"],
+        "filters": CustomFilters.authorized,
+    },
+    "authorize": {
+        "commands": [
+            BotCommands.AuthorizeCommand,
+            BotCommands.UnAuthorizeCommand,
+            BotCommands.AddSudoCommand,
+            BotCommands.RmSudoCommand,
+        ],
+        "filters": CustomFilters.sudo,
+    },
+    "exec": {
+        "commands": [BotCommands.AExecCommand, BotCommands.ExecCommand, BotCommands.ClearLocalsCommand],
+        "filters": CustomFilters.owner,
+    },
+    "gdrive": {
+        "commands": ["gd", "gdinfo"],
+        "callbacks": ["^gd", "refreshstorage|closestorage"],
+        "filters": CustomFilters.authorized,
+    },
+    "misc": {
+        "commands": ["github", "nsfw"],
+        "callbacks": [r"^nsfw:(refresh|close):"],
+        "filters": CustomFilters.authorized,
+    },
+    "myfiles": {
+        "commands": ["storage", "myfiles"],
+        "callbacks": ["storagemenu", "myfilesmenu", "next_myfiles"],
+        "filters": CustomFilters.authorized,
+    },
+    "nhentai": {
+        "commands": ["nhentai"],
+        "filters": CustomFilters.authorized,
+    },
+    "shell": {
+        "commands": [BotCommands.ShellCommand],
+        "filters": CustomFilters.owner,
+    },
+}
+
+# Ahead of every real handler group, including the -1 used for replies.
+LAZY_GROUP = -100
+
+# Imports run one at a time: each patches bot.add_handler while it runs.
+_IMPORT_LOCK = Lock()
+
+
+class LazyModule:
+    """Stand-in handlers for a module that has not been imported yet.
+
+    The first matching update imports the module and hands that update to
+    the handlers the import registered, stopping it there only if one of them
+    ran; the stand-ins are then removed and the module's own handlers take
+    over.
+    """
+
+    def __init__(self, name, commands=(), callbacks=(), filters=None):
+        self.name = name
+        self.module = None
+        self.handlers = []
+        self.triggers = []
+        if commands:
+            commands_filter = command(commands) if filters is None else command(commands) & filters
+            self.triggers.append(MessageHandler(self._on_message, filters=commands_filter))
+            self.triggers.append(EditedMessageHandler(self._on_edited_message, filters=commands_filter))
+        if callbacks:
+            pattern = "|".join(f"(?:{callback})" for callback in callbacks)
+            self.triggers.append(CallbackQueryHandler(self._on_callback_query, filters=regex(pattern)))
+
+    def register(self):
+        for trigger in self.triggers:
+            bot.add_handler(trigger, LAZY_GROUP)
+
+    def _record(self, handler, group=0):
+        self.handlers.append((handler, group))
+        return handler, group
+
+    def _import(self):
+        # Handlers registered while the module imports are kept so the update
+        # that triggered the import can be dispatched to them right away.
+        bot.add_handler = self._record
+        try:
+            return import_module(f"{__name__}.{self.name}")
+        finally:
+            del bot.add_handler
+
+    def _install(self, module, start_time):
+        self.module = module
+        for handler, group in self.handlers:
+            bot.add_handler(handler, group)
+        for trigger in self.triggers:
+            bot.remove_handler(trigger, LAZY_GROUP)
+        globals()[self.name] = self.module
+        LOGGER.info(f"Loaded module {self.name} in {time() - start_time:.2f}s")
+        return module
+
+    def load(self):
+        if self.module is not None:
+            return self.module
+        start_time = time()
+        return self._install(self._import(), start_time)
+
+    async def load_async(self):
+        # The import runs in a thread so the loop keeps serving other updates
+        # meanwhile; the handlers are installed back on the loop.
+        async with _IMPORT_LOCK:
+            if self.module is not None:
+                return self.module
+            start_time = time()
+            module = await sync_to_async(self._import)
+            return self._install(module, start_time)
+
+    async def _dispatch(self, handler_type, client, update):
+        await self.load_async()
+        handled = False
+        for group in sorted({group for _, group in self.handlers}):
+            for handler, handler_group in self.handlers:
+                if handler_group != group or type(handler) is not handler_type:
+                    continue
+                try:
+                    if await handler.check(client, update):
+                        handled = True
+                        if iscoroutinefunction(handler.callback):
+                            await handler.callback(client, update)
+                        else:
+                            await sync_to_async(handler.callback, client, update)
+                        break
+                except ContinuePropagation:
+                    continue
+        # Left alone, an update none of the module's handlers wanted goes on
+        # to the later groups as if the stand-ins had never been there.
+        if handled:
+            raise StopPropagation
+
+    async def _on_message(self, client, message):
+        await self._dispatch(MessageHandler, client, message)
+
+    async def _on_edited_message(self, client, message):
+        await self._dispatch(EditedMessageHandler, client, message)
+
+    async def _on_callback_query(self, client, query):
+        await self._dispatch(CallbackQueryHandler, client, query)
+
 
 def _list_all_modules():
     folder = dirname(__file__)
@@ -12,10 +179,16 @@ def _list_all_modules():
         and not f.endswith("__init__.py")
     )
 
-_ALL_ = _list_all_modules()
+
+LAZY_MODULES = {name: LazyModule(name, **entry) for name, entry in MANIFEST.items()}
+
+for lazy_module in LAZY_MODULES.values():
+    lazy_module.register()
+
+_ALL_ = [module_name for module_name in _list_all_modules() if module_name not in MANIFEST]
 
 for module_name in _ALL_:
-    module = importlib.import_module(f"{__name__}.{module_name}")
+    module = import_module(f"{__name__}.{module_name}")
     globals()[module_name] = module
 
-__all__ = _ALL_
\ No newline at end of file
+__all__ = _ALL_
@@ -1,8 +1,8 @@
 from pyrogram.filters import command
 from pyrogram.handlers import MessageHandler
 
-from bot import user_data, bot
-from bot.helper.ext_utils.bot_utils import update_user_ldata
+from bot import bot
+from bot.helper.telegram_helper.auth_store import auth_store
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.message_utils import send_message
@@ -16,10 +16,10 @@ async def authorize(client, message):
         id_ = reply_to.from_user.id if reply_to.from_user else reply_to.sender_chat.id
     else:
         id_ = message.chat.id
-    if id_ in user_data and user_data[id_].get("is_auth"):
+    if auth_store.is_authorized(id_):
         msg = "Already Authorized!"
     else:
-        update_user_ldata(id_, "is_auth", True)
+        await auth_store.update(id_, "is_auth", True)
         msg = "Authorized"
     await send_message(message, msg)
 
@@ -32,8 +32,8 @@ async def unauthorize(client, message):
         id_ = reply_to.from_user.id if reply_to.from_user else reply_to.sender_chat.id
     else:
         id_ = message.chat.id
-    if id_ not in user_data or user_data[id_].get("is_auth"):
-        update_user_ldata(id_, "is_auth", False)
+    if auth_store.has_flag(id_, "is_auth"):
+        await auth_store.update(id_, "is_auth", False)
         msg = "Unauthorized"
     else:
         msg = "Already Unauthorized!"
@@ -48,10 +48,10 @@ async def addSudo(client, message):
     elif reply_to := message.reply_to_message:
         id_ = reply_to.from_user.id if reply_to.from_user else reply_to.sender_chat.id
     if id_:
-        if id_ in user_data and user_data[id_].get("is_sudo"):
+        if auth_store.is_sudo(id_):
             msg = "Already Sudo!"
         else:
-            update_user_ldata(id_, "is_sudo", True)
+            await auth_store.update(id_, "is_sudo", True)
             msg = "Promoted as Sudo"
     else:
         msg = "Give ID or Reply To message of whom you want to Promote."
@@ -65,8 +65,8 @@ async def removeSudo(client, message):
         id_ = int(msg[1].strip())
     elif reply_to := message.reply_to_message:
         id_ = reply_to.from_user.id if reply_to.from_user else reply_to.sender_chat.id
-    if id_ and id_ not in user_data or user_data[id_].get("is_sudo"):
-        update_user_ldata(id_, "is_sudo", False)
+    if id_ and auth_store.has_flag(id_, "is_sudo"):
+        await auth_store.update(id_, "is_sudo", False)
         msg = "Demoted"
     else:
         msg = "Give ID or Reply To message of whom you want to remove from Sudo"
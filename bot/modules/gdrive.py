@@ -306,7 +306,7 @@ async def get_gdrive_buttons(user_id, folder_id='root', folder_name='My Drive',
         keyboard.append([InlineKeyboardButton("⌀ Nothing to show ⌀", callback_data=f"gd pages {user_id}")])
     else:
         # File/folder list - one button per row
-        page, next_offset = await sync_to_async(gdrive_list_next_page, items, offset)
+        page, next_offset = gdrive_list_next_page(items, offset)
         for idx, item in enumerate(page):
             name = item['name']
             file_id = item['id']
@@ -1,8 +1,6 @@
 import asyncio
-from collections import OrderedDict
 from configparser import ConfigParser
-from contextlib import asynccontextmanager
-from json import loads
+from functools import partial
 from math import floor
 from os.path import splitext
 from time import time
@@ -16,22 +14,22 @@ from pyrogram.filters import command, regex
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 
 from bot import LOGGER, bot
-from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.rclone_helper.backend import RCLONE_CONFIG, rclone
+from bot.helper.rclone_helper.file_index import file_index
+from bot.helper.rclone_helper.link_resolver import link_resolver
+from bot.helper.rclone_helper.listing_cache import listing_cache
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import send_message, edit_message, delete_message, send_file
 
 
 # Configuration
-rclone_config = "/usr/src/app/rclone.conf"
+rclone_config = RCLONE_CONFIG
 SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
-RCLONE_TIMEOUT = 300
 MEDIAINFO_TIMEOUT = 60
 SEARCH_TIMEOUT = 180
 MAX_STREAM_CHUNK = 8192
 ITEMS_PER_PAGE = 10
-CACHE_TTL = 60
-CACHE_MAX_SIZE = 100
 
 rclone_dict = {}
 active_tasks = {}  # Track background tasks
@@ -60,35 +58,6 @@ def get_user_tag(message):
     return source_user.mention
 
 
-class LRUCache:
-    """Simple LRU cache with size limit"""
-    def __init__(self, max_size=CACHE_MAX_SIZE):
-        self.cache = OrderedDict()
-        self.max_size = max_size
-    
-    def get(self, key):
-        if key in self.cache:
-            timestamp, value = self.cache[key]
-            if time() - timestamp < CACHE_TTL:
-                self.cache.move_to_end(key)
-                return value
-            else:
-                del self.cache[key]
-        return None
-    
-    def set(self, key, value):
-        self.cache[key] = (time(), value)
-        self.cache.move_to_end(key)
-        if len(self.cache) > self.max_size:
-            self.cache.popitem(last=False)
-    
-    def clear(self):
-        self.cache.clear()
-
-
-process_cache = LRUCache()
-
-
 class Menus:
     MYFILES = "myfilesmenu"
     STORAGE = "storagemenu"
@@ -110,21 +79,9 @@ def get_readable_file_size(size_in_bytes: int):
     )
 
 
-def rclone_list_next_page(info, offset=0, max_results=ITEMS_PER_PAGE):
-    """Paginate rclone list results"""
-    start = offset
-    end = max_results + start
-    total = len(info)
-    next_offset = offset + max_results
-
-    if end > total:
-        next_page = info[start:]
-    elif start >= total:
-        next_page = []
-    else:
-        next_page = info[start:end]
-
-    return next_page, next_offset
+def rclone_list_next_page(info, offset=0, max_results=ITEMS_PER_PAGE, sort_by=None):
+    """Paginate a rclone Listing"""
+    return info.page(sort_by, offset, max_results), offset + max_results
 
 
 def rclone_list_button_maker(
@@ -136,16 +93,15 @@ def rclone_list_button_maker(
     user_id,
 ):
     """Create buttons for rclone list items"""
-    for index, entry in enumerate(info):
-        path = entry["Path"]
+    for index, (path, size, is_dir, _) in enumerate(info):
         update_rclone_data(str(index), path, user_id)
 
-        if entry["MimeType"] == "inode/directory":
+        if is_dir:
             button.data_button(
                 f"📁 {path}", data=f"{menu_type}^{dir_callback}^{index}^{user_id}"
             )
         else:
-            size = get_readable_file_size(entry["Size"])
+            size = get_readable_file_size(size)
             button.data_button(
                 f"[{size}] {path}",
                 data=f"{menu_type}^{file_callback}^{index}^True^{user_id}",
@@ -236,93 +192,6 @@ async def create_next_buttons(
     )
 
 
-@asynccontextmanager
-async def rclone_process(*args):
-    """Context manager for rclone processes with proper cleanup"""
-    process = None
-    try:
-        process = await exec(*args, stdout=PIPE, stderr=PIPE)
-        yield process
-    except Exception as e:
-        LOGGER.error(f"Process error: {e}")
-        raise
-    finally:
-        if process and process.returncode is None:
-            try:
-                process.terminate()
-                try:
-                    await asyncio.wait_for(process.wait(), timeout=5)
-                except asyncio.TimeoutError:
-                    LOGGER.warning("Process didn't terminate, killing...")
-                    process.kill()
-                    await process.wait()
-            except Exception as e:
-                LOGGER.error(f"Process cleanup error: {e}")
-
-
-async def execute_rclone_cmd(cmd, timeout=RCLONE_TIMEOUT, cache_key=None):
-    """Execute rclone command with error handling and optional caching"""
-    # Check cache first
-    if cache_key:
-        cached = process_cache.get(cache_key)
-        if cached is not None:
-            LOGGER.info(f"Cache hit for: {cache_key}")
-            return cached
-
-    try:
-        async with rclone_process(*cmd) as process:
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), timeout=timeout
-                )
-            except asyncio.TimeoutError:
-                LOGGER.error(f"Command timeout after {timeout}s: {' '.join(cmd)}")
-                return None, f"Operation timed out after {timeout} seconds", -1
-
-            return_code = process.returncode
-            stdout = stdout.decode().strip()
-            stderr = stderr.decode().strip()
-
-            result = (stdout, stderr, return_code)
-
-            # Cache successful results
-            if cache_key and return_code == 0:
-                process_cache.set(cache_key, result)
-
-            # Log detailed errors for debugging
-            if return_code != 0:
-                LOGGER.error(f"Command failed (rc={return_code}): {' '.join(cmd)}")
-                LOGGER.error(f"Stderr: {stderr}")
-
-            return result
-
-    except Exception as e:
-        LOGGER.error(f"Command execution error: {e}", exc_info=True)
-        return None, str(e), -1
-
-
-async def is_valid_path(remote, path, message):
-    """Validate if rclone path exists"""
-    try:
-        cmd = [
-            "rclone",
-            "lsjson",
-            f"--config={rclone_config}",
-            f"{remote}:{path}",
-            "--fast-list",
-            "--max-depth=1",
-        ]
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=30)
-
-        if return_code != 0:
-            LOGGER.error(f"Invalid path: {remote}:{path} - {stderr}")
-            return False
-        return True
-    except Exception as e:
-        LOGGER.error(f"Path validation error: {e}")
-        return False
-
-
 async def list_remotes(
     message, menu_type, remote_type="remote", is_second_menu=False, edit=False
 ):
@@ -368,6 +237,81 @@ async def list_remotes(
             await send_message(message, error_msg)
 
 
+def folder_menu(info, rclone_remote, base_dir, menu_type, user_id, is_second_menu, sort_by):
+    """Message and buttons for the first page of a folder listing"""
+    buttons = ButtonMaker()
+    msg = ""
+    next_type = ""
+    dir_callback = "remote_dir"
+    file_callback = ""
+    back_callback = "back"
+
+    if menu_type == Menus.MYFILES:
+        next_type = "next_myfiles"
+        file_callback = "file_action"
+        buttons.data_button(
+            "⚙️ Folder Options", f"{menu_type}^folder_action^{user_id}"
+        )
+        buttons.data_button("🔍 Search", f"myfilesmenu^search^{user_id}")
+        msg = f"Your cloud files are listed below\n\n<b>Path:</b><code>{rclone_remote}:{base_dir}</code>"
+
+    total = len(info)
+
+    if not info.complete:
+        msg += f"\n\n<i>⏳ Still listing, {total} entries so far...</i>"
+        page, _ = rclone_list_next_page(info)
+        rclone_list_button_maker(
+            info=page,
+            button=buttons,
+            menu_type=menu_type,
+            dir_callback=dir_callback,
+            file_callback=file_callback,
+            user_id=user_id,
+        )
+    elif total == 0:
+        buttons.data_button("⌀ Nothing to show ⌀", f"{menu_type}^pages^{user_id}")
+    else:
+        page, next_offset = rclone_list_next_page(info, sort_by=sort_by)
+
+        rclone_list_button_maker(
+            info=page,
+            button=buttons,
+            menu_type=menu_type,
+            dir_callback=dir_callback,
+            file_callback=file_callback,
+            user_id=user_id,
+        )
+
+        current_page = 1
+        total_pages = max(round(total / ITEMS_PER_PAGE), 1)
+
+        if total <= ITEMS_PER_PAGE:
+            buttons.data_button(
+                f"🔢 {current_page} / {total_pages}",
+                f"{menu_type}^pages^{user_id}",
+                "footer",
+            )
+        else:
+            buttons.data_button(
+                f"🔢 {current_page} / {total_pages}",
+                f"{menu_type}^pages^{user_id}",
+                "footer",
+            )
+            buttons.data_button(
+                "NEXT ⏩",
+                f"{next_type} {next_offset} {is_second_menu} {back_callback}",
+                "footer",
+            )
+
+    buttons.data_button(
+        "⬅️ Back", f"{menu_type}^{back_callback}^{user_id}", "footer"
+    )
+    buttons.data_button(
+        "✘ Close", f"{menu_type}^close^{user_id}", "footer"
+    )
+    return msg, buttons
+
+
 async def list_folder(
     message,
     rclone_remote,
@@ -377,105 +321,59 @@ async def list_folder(
     is_crypt=False,
     edit=False,
 ):
-    """List folder contents from rclone remote"""
+    """List folder contents from rclone remote, returning whether it worked"""
     try:
         user_id = get_message_owner_id(message)
-        buttons = ButtonMaker()
-        msg = ""
-        next_type = ""
-        dir_callback = "remote_dir"
-        file_callback = ""
-        back_callback = "back"
+        sort_by = "name" if is_second_menu else "size"
+
+        # Large folders arrive over a while; the first page is shown as soon
+        # as it is there and redrawn in sorted order once the rest follows.
+        # A load already running for this folder is joined, and the Listing
+        # it fills is the one shown.
+        listing, load = listing_cache.lookup(
+            rclone_remote, base_dir, partial(rclone.stream_list, rclone_remote, base_dir)
+        )
+        if load is None:
+            info, err = listing, None
+        else:
+            first_page = asyncio.create_task(listing.wait_for(ITEMS_PER_PAGE))
+            await asyncio.wait([load, first_page], return_when=asyncio.FIRST_COMPLETED)
+            first_page.cancel()
 
-        cmd = [
-            "rclone",
-            "lsjson",
-            f"--config={rclone_config}",
-            f"{rclone_remote}:{base_dir}",
-            "--fast-list",
-            "--max-depth=1",
-        ]
-
-        if menu_type == Menus.MYFILES:
-            next_type = "next_myfiles"
-            file_callback = "file_action"
-            cmd.extend(["--no-modtime"])
-            buttons.data_button(
-                "⚙️ Folder Options", f"{menu_type}^folder_action^{user_id}"
-            )
-            buttons.data_button("🔍 Search", f"myfilesmenu^search^{user_id}")
-            msg = f"Your cloud files are listed below\n\n<b>Path:</b><code>{rclone_remote}:{base_dir}</code>"
+            if not load.done():
+                msg, buttons = folder_menu(
+                    listing, rclone_remote, base_dir, menu_type, user_id, is_second_menu, None
+                )
+                if edit:
+                    await edit_message(message, msg, buttons.build_menu(1))
+                else:
+                    sent = await send_message(message, msg, buttons.build_menu(1))
+                    if not isinstance(sent, str):
+                        message = sent
+                        edit = True
 
-        # Use cache for frequently accessed folders
-        cache_key = f"ls:{rclone_remote}:{base_dir}"
-        res, err, rc = await execute_rclone_cmd(cmd, cache_key=cache_key)
+            info, err = await asyncio.shield(load)
 
-        if rc != 0:
+        if err:
             LOGGER.error(f"Error listing folder: {err}")
             error_msg = f"Failed to list folder contents.\n\n<b>Path:</b> <code>{rclone_remote}:{base_dir}</code>\n<b>Error:</b> <code>{err[:200]}</code>"
             if edit:
                 await edit_message(message, error_msg)
             else:
                 await send_message(message, error_msg)
-            return
-
-        info = loads(res) if res else []
-
-        if is_second_menu:
-            sinfo = sorted(info, key=lambda x: x.get("Name", ""))
-        else:
-            sinfo = sorted(info, key=lambda x: x.get("Size", 0), reverse=True)
-
-        total = len(info)
-        update_rclone_data("info", sinfo, user_id)
-
-        if total == 0:
-            buttons.data_button("⌀ Nothing to show ⌀", f"{menu_type}^pages^{user_id}")
-        else:
-            page, next_offset = await sync_to_async(rclone_list_next_page, sinfo)
-
-            await sync_to_async(
-                rclone_list_button_maker,
-                info=page,
-                button=buttons,
-                menu_type=menu_type,
-                dir_callback=dir_callback,
-                file_callback=file_callback,
-                user_id=user_id,
-            )
-
-            current_page = 1
-            total_pages = max(round(total / ITEMS_PER_PAGE), 1)
-
-            if total <= ITEMS_PER_PAGE:
-                buttons.data_button(
-                    f"🔢 {current_page} / {total_pages}",
-                    f"{menu_type}^pages^{user_id}",
-                    "footer",
-                )
-            else:
-                buttons.data_button(
-                    f"🔢 {current_page} / {total_pages}",
-                    f"{menu_type}^pages^{user_id}",
-                    "footer",
-                )
-                buttons.data_button(
-                    "NEXT ⏩",
-                    f"{next_type} {next_offset} {is_second_menu} {back_callback}",
-                    "footer",
-                )
+            return False
 
-        buttons.data_button(
-            "⬅️ Back", f"{menu_type}^{back_callback}^{user_id}", "footer"
-        )
-        buttons.data_button(
-            "✘ Close", f"{menu_type}^close^{user_id}", "footer"
+        update_rclone_data("info", info, user_id)
+        update_rclone_data("info_sort", sort_by, user_id)
+        msg, buttons = folder_menu(
+            info, rclone_remote, base_dir, menu_type, user_id, is_second_menu, sort_by
         )
 
         if edit:
             await edit_message(message, msg, buttons.build_menu(1))
         else:
             await send_message(message, msg, buttons.build_menu(1))
+        return True
 
     except Exception as e:
         LOGGER.error(f"Error in list_folder: {e}", exc_info=True)
@@ -484,6 +382,7 @@ async def list_folder(
             await edit_message(message, error_msg)
         else:
             await send_message(message, error_msg)
+        return False
 
 
 async def storage_menu_cb(client, callback_query):
@@ -519,23 +418,13 @@ async def rclone_about(message, query, remote_name, user_id):
     """Get storage information for a remote"""
     try:
         button = ButtonMaker()
-        cmd = [
-            "rclone",
-            "about",
-            "--json",
-            f"--config={rclone_config}",
-            f"{remote_name}:",
-        ]
-
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=30)
+        info, err = await rclone.about(remote_name, timeout=30)
 
-        if return_code != 0:
-            LOGGER.error(f"Error getting storage info: {stderr}")
-            await query.answer(f"Failed: {stderr[:100]}", show_alert=True)
+        if err:
+            LOGGER.error(f"Error getting storage info: {err}")
+            await query.answer(f"Failed: {err[:100]}", show_alert=True)
             return
 
-        info = loads(stdout) if stdout else {}
-
         if len(info) == 0:
             await query.answer("Team Drive with Unlimited Storage", show_alert=True)
             return
@@ -631,27 +520,16 @@ async def calculate_size_background(message, remote_path, remote, user_id):
             buttons.build_menu(1)
         )
 
-        cmd = [
-            "rclone",
-            "size",
-            "--fast-list",
-            f"--config={rclone_config}",
-            f"{remote}:{remote_path}",
-            "--json",
-        ]
-
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=RCLONE_TIMEOUT)
+        data, err = await rclone.size(remote, remote_path)
 
-        if return_code != 0:
-            LOGGER.error(f"Error calculating size: {stderr}")
+        if err:
+            LOGGER.error(f"Error calculating size: {err}")
             await edit_message(
                 message,
-                f"❌ Failed to calculate folder size.\n\n<b>Error:</b> <code>{stderr[:200]}</code>",
+                f"❌ Failed to calculate folder size.\n\n<b>Error:</b> <code>{err[:200]}</code>",
                 buttons.build_menu(1)
             )
             return
-
-        data = loads(stdout) if stdout else {}
         files = data.get("count", 0)
         size = data.get("bytes", 0)
         total_size = get_readable_file_size(size)
@@ -705,50 +583,41 @@ async def search_action(client, message, query, remote, user_id):
                         await edit_message(question, "Search canceled.")
                         await delete_message(response_message)
                     else:
+                        if await file_index.ready(remote):
+                            update_rclone_data("SEARCH_REMOTE", remote, user_id)
+                            update_rclone_data("SEARCH_TEXT", text, user_id)
+                            await show_search_page(question, remote, text, 0, user_id)
+                            client.remove_handler(handler)
+                            return
+
+                        # Until the index is built, search on the remote itself.
                         await edit_message(
                             question,
                             "**⏳ Searching file(s) on remote...**\n\nPlease wait, it may take some time"
                         )
 
-                        cmd = [
-                            "rclone",
-                            "lsjson",
-                            "--files-only",
-                            "--fast-list",
-                            "--no-modtime",
-                            "--ignore-case",
-                            "-R",
-                            f"--config={rclone_config}",
-                            "--include",
-                            f"*{text}*",
-                            f"{remote}:",
-                        ]
-
-                        out, err, return_code = await execute_rclone_cmd(cmd, timeout=SEARCH_TIMEOUT)
-
-                        if return_code != 0:
+                        data, err = await rclone.list(
+                            remote,
+                            recurse=True,
+                            files_only=True,
+                            include=f"*{text}*",
+                            timeout=SEARCH_TIMEOUT,
+                        )
+
+                        if err:
                             LOGGER.error(f"Search error: {err}")
                             await edit_message(question, f"An error occurred during search.\n\n<code>{err[:200]}</code>")
-                        elif out and len(out) > 0:
-                            data = loads(out)
+                        elif data:
                             msg = f"<b>Found {len(data)} files:\n\n</b>"
+                            links = await link_resolver.resolve_many(
+                                remote, [file["Path"] for file in data[:50]]
+                            )
 
-                            for index, file in enumerate(data[:50], start=1):
+                            for index, (file, (link, _)) in enumerate(zip(data[:50], links), start=1):
                                 name = file["Name"]
-                                path = file["Path"]
-
-                                # Try to get link
-                                cmd_link = [
-                                    "rclone",
-                                    "link",
-                                    f"--config={rclone_config}",
-                                    f"{remote}:{path}",
-                                ]
 
-                                link_out, link_err, link_rc = await execute_rclone_cmd(cmd_link, timeout=10)
-
-                                if link_rc == 0 and link_out:
-                                    msg += f"{index}. <a href='{link_out}'>{name}</a>\n"
+                                if link:
+                                    msg += f"{index}. <a href='{link}'>{name}</a>\n"
                                 else:
                                     msg += f"{index}. <code>{name}</code>\n"
 
@@ -773,6 +642,37 @@ async def search_action(client, message, query, remote, user_id):
         LOGGER.error(f"Error in search_action: {e}", exc_info=True)
 
 
+async def show_search_page(message, remote, text, offset, user_id):
+    """Show one page of indexed search results, resolving only its links"""
+    total, rows = await file_index.search(remote, text, ITEMS_PER_PAGE, offset)
+    if total == 0:
+        await edit_message(message, "No file(s) found")
+        return
+
+    links = await link_resolver.resolve_many(remote, [path for _, path, _ in rows])
+    msg = f"<b>Found {total} files:\n\n</b>"
+    for index, ((name, _, size), (link, _)) in enumerate(zip(rows, links), start=offset + 1):
+        if link:
+            msg += f"{index}. <a href='{link}'>{name}</a> [{get_readable_file_size(size)}]\n"
+        else:
+            msg += f"{index}. <code>{name}</code> [{get_readable_file_size(size)}]\n"
+
+    buttons = ButtonMaker()
+    if offset > 0:
+        buttons.data_button(
+            "⏪ BACK", f"myfilesmenu^search_page^{max(offset - ITEMS_PER_PAGE, 0)}^{user_id}"
+        )
+    buttons.data_button(
+        f"🔢 {offset // ITEMS_PER_PAGE + 1} / {(total - 1) // ITEMS_PER_PAGE + 1}",
+        f"myfilesmenu^pages^{user_id}",
+    )
+    if offset + ITEMS_PER_PAGE < total:
+        buttons.data_button(
+            "NEXT ⏩", f"myfilesmenu^search_page^{offset + ITEMS_PER_PAGE}^{user_id}"
+        )
+    await edit_message(message, msg, buttons.build_menu(3))
+
+
 async def delete_selection(message, user_id, is_folder=False):
     """Confirmation dialog for deletion"""
     try:
@@ -801,13 +701,13 @@ async def delete_selected(message, user_id, remote_path, remote, is_folder=False
         msg = ""
 
         if is_folder:
-            success = await rclone_purge(message, remote_path, remote, rclone_config)
+            success = await rclone_purge(message, remote_path, remote)
             if success:
                 msg = "✅ The folder has been deleted successfully!"
             else:
                 msg = "❌ Failed to delete the folder. Check logs for details."
         else:
-            success = await rclone_delete(message, remote_path, remote, rclone_config)
+            success = await rclone_delete(message, remote_path, remote)
             if success:
                 msg = "✅ The file has been deleted successfully!"
             else:
@@ -818,8 +718,9 @@ async def delete_selected(message, user_id, remote_path, remote, is_folder=False
 
         await edit_message(message, msg, buttons.build_menu(1))
         
-        # Invalidate cache for this path
-        process_cache.clear()
+        listing_cache.invalidate(remote, remote_path)
+        await file_index.invalidate(remote, remote_path)
+        link_resolver.forget(remote, remote_path)
 
     except Exception as e:
         LOGGER.error(f"Error in delete_selected: {e}", exc_info=True)
@@ -830,7 +731,7 @@ async def delete_empty_dir(message, user_id, remote, remote_path):
     """Delete empty directories"""
     try:
         buttons = ButtonMaker()
-        success = await rclone_rmdirs(message, remote, remote_path, rclone_config)
+        success = await rclone_rmdirs(message, remote, remote_path)
 
         buttons.data_button("⬅️ Back", f"myfilesmenu^back_remotes_menu^{user_id}", "footer")
         buttons.data_button("✘ Close", f"myfilesmenu^close^{user_id}", "footer")
@@ -842,51 +743,48 @@ async def delete_empty_dir(message, user_id, remote, remote_path):
 
         await edit_message(message, msg, buttons.build_menu(1))
         
-        # Invalidate cache
-        process_cache.clear()
+        listing_cache.invalidate(remote, remote_path)
+        await file_index.invalidate(remote, remote_path)
+        link_resolver.forget(remote, remote_path)
 
     except Exception as e:
         LOGGER.error(f"Error in delete_empty_dir: {e}", exc_info=True)
         await edit_message(message, f"An error occurred.\n\n<code>{str(e)}</code>")
 
 
-async def rclone_purge(message, remote_path, remote, rclone_config):
+async def rclone_purge(message, remote_path, remote):
     """Purge (delete) a folder"""
     try:
         await edit_message(message, "⏳ Deleting folder...")
         
-        cmd = ["rclone", "purge", f"--config={rclone_config}", f"{remote}:{remote_path}"]
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=RCLONE_TIMEOUT)
+        success, err = await rclone.purge(remote, remote_path)
 
-        if return_code != 0:
-            LOGGER.error(f"Error purging folder: {stderr}")
-            return False
-        return True
+        if not success:
+            LOGGER.error(f"Error purging folder: {err}")
+        return success
 
     except Exception as e:
         LOGGER.error(f"Error in rclone_purge: {e}", exc_info=True)
         return False
 
 
-async def rclone_delete(message, remote_path, remote, rclone_config):
+async def rclone_delete(message, remote_path, remote):
     """Delete a file"""
     try:
         await edit_message(message, "⏳ Deleting file...")
         
-        cmd = ["rclone", "delete", f"--config={rclone_config}", f"{remote}:{remote_path}"]
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=60)
+        success, err = await rclone.delete_file(remote, remote_path)
 
-        if return_code != 0:
-            LOGGER.error(f"Error deleting file: {stderr}")
-            return False
-        return True
+        if not success:
+            LOGGER.error(f"Error deleting file: {err}")
+        return success
 
     except Exception as e:
         LOGGER.error(f"Error in rclone_delete: {e}", exc_info=True)
         return False
 
 
-async def rclone_rmdirs(message, remote, remote_path, rclone_config):
+async def rclone_rmdirs(message, remote, remote_path):
     """Remove empty directories"""
     try:
         await edit_message(
@@ -894,13 +792,11 @@ async def rclone_rmdirs(message, remote, remote_path, rclone_config):
             "**⏳ Removing empty directories...**\n\nPlease wait, it may take some time depending on number of dirs"
         )
 
-        cmd = ["rclone", "rmdirs", f"--config={rclone_config}", f"{remote}:{remote_path}"]
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=RCLONE_TIMEOUT)
+        success, err = await rclone.rmdirs(remote, remote_path)
 
-        if return_code != 0:
-            LOGGER.error(f"Error removing directories: {stderr}")
-            return False
-        return True
+        if not success:
+            LOGGER.error(f"Error removing directories: {err}")
+        return success
 
     except Exception as e:
         LOGGER.error(f"Error in rclone_rmdirs: {e}", exc_info=True)
@@ -927,26 +823,20 @@ async def rclone_mkdir(client, message, remote, remote_path, tag):
                         text = text.strip().replace("..", "").replace("/", "_")
                         path = f"{remote_path}/{text}".strip("/")
 
-                        cmd = [
-                            "rclone",
-                            "mkdir",
-                            f"--config={rclone_config}",
-                            f"{remote}:{path}",
-                        ]
+                        success, err = await rclone.mkdir(remote, path)
 
-                        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=30)
-
-                        if return_code != 0:
-                            LOGGER.error(f"Error creating directory: {stderr}")
-                            await edit_message(question, f"An error occurred during directory creation.\n\n<code>{stderr[:200]}</code>")
+                        if not success:
+                            LOGGER.error(f"Error creating directory: {err}")
+                            await edit_message(question, f"An error occurred during directory creation.\n\n<code>{err[:200]}</code>")
                         else:
                             msg = "<b>✅ Directory created successfully.</b>\n\n"
                             msg += f"<b>Path: </b><code>{remote}:{path}</code>\n\n"
                             msg += f"<b>cc:</b> {tag}\n\n"
                             await edit_message(question, msg)
                             
-                            # Invalidate cache
-                            process_cache.clear()
+                            listing_cache.invalidate(remote, path)
+                            await file_index.invalidate(remote, path)
+                            link_resolver.forget(remote, path)
 
                 client.remove_handler(handler)
 
@@ -969,24 +859,11 @@ async def rclone_dedupe(message, remote, remote_path, user_id, tag):
         msg += "\nIt may take some time depending on number of duplicates files"
         await edit_message(message, msg)
 
-        cmd = [
-            "rclone",
-            "dedupe",
-            "newest",
-            "--tpslimit",
-            "4",
-            "--transfers",
-            "1",
-            "--fast-list",
-            f"--config={rclone_config}",
-            f"{remote}:{remote_path}",
-        ]
-
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=RCLONE_TIMEOUT)
+        success, err = await rclone.dedupe(remote, remote_path)
 
-        if return_code != 0:
-            LOGGER.error(f"Error deduplicating: {stderr}")
-            msg = f"❌ Dedupe failed.\n\n<b>Error:</b> <code>{stderr[:200]}</code>"
+        if not success:
+            LOGGER.error(f"Error deduplicating: {err}")
+            msg = f"❌ Dedupe failed.\n\n<b>Error:</b> <code>{err[:200]}</code>"
         else:
             msg = "<b>✅ Dedupe completed successfully</b>\n"
             msg += f"<b>cc:</b> {tag}\n"
@@ -996,8 +873,9 @@ async def rclone_dedupe(message, remote, remote_path, user_id, tag):
         button.data_button("✘ Close", f"myfilesmenu^close^{user_id}", "footer")
         await edit_message(message, msg, button.build_menu(1))
         
-        # Invalidate cache
-        process_cache.clear()
+        listing_cache.invalidate(remote, remote_path)
+        await file_index.invalidate(remote, remote_path)
+        link_resolver.forget(remote, remote_path)
 
     except Exception as e:
         LOGGER.error(f"Error in rclone_dedupe: {e}", exc_info=True)
@@ -1034,19 +912,11 @@ async def rclone_rename(client, message, remote, remote_path, tag):
                             _, ext = splitext(file)
                             path = f"{text}{ext}"
 
-                        cmd = [
-                            "rclone",
-                            "moveto",
-                            f"--config={rclone_config}",
-                            f"{remote}:{remote_path}",
-                            f"{remote}:{path}",
-                        ]
+                        success, err = await rclone.moveto(remote, remote_path, path)
 
-                        stdout, stderr, return_code = await execute_rclone_cmd(cmd, timeout=60)
-
-                        if return_code != 0:
-                            LOGGER.error(f"Error renaming file: {stderr}")
-                            await edit_message(question, f"An error occurred during renaming.\n\n<code>{stderr[:200]}</code>")
+                        if not success:
+                            LOGGER.error(f"Error renaming file: {err}")
+                            await edit_message(question, f"An error occurred during renaming.\n\n<code>{err[:200]}</code>")
                         else:
                             msg = "<b>✅ File renamed successfully.</b>\n\n"
                             msg += f"<b>Old path: </b><code>{remote}:{remote_path}</code>\n\n"
@@ -1054,8 +924,9 @@ async def rclone_rename(client, message, remote, remote_path, tag):
                             msg += f"<b>cc: {tag}</b>"
                             await edit_message(question, msg)
                             
-                            # Invalidate cache
-                            process_cache.clear()
+                            listing_cache.invalidate(remote, remote_path, path)
+                            await file_index.invalidate(remote, remote_path, path)
+                            link_resolver.forget(remote, remote_path, path)
 
                 client.remove_handler(handler)
 
@@ -1076,18 +947,16 @@ async def rclone_get_link(client, message, remote, remote_path, user_id):
     try:
         await edit_message(message, "⏳ Getting link...")
         
-        cmd_link = ["rclone", "link", f"--config={rclone_config}", f"{remote}:{remote_path}"]
-        stdout, stderr, return_code = await execute_rclone_cmd(cmd_link, timeout=30)
+        link, err = await link_resolver.resolve(remote, remote_path)
 
         buttons = ButtonMaker()
         buttons.data_button("⬅️ Back", f"myfilesmenu^back_remotes_menu^{user_id}", "footer")
         buttons.data_button("✘ Close", f"myfilesmenu^close^{user_id}", "footer")
 
-        if return_code != 0:
-            error_msg = stderr if stderr else "Unknown error"
-            await edit_message(message, f"❌ Error: <code>{error_msg[:200]}</code>", buttons.build_menu(2))
+        if err:
+            await edit_message(message, f"❌ Error: <code>{err[:200]}</code>", buttons.build_menu(2))
         else:
-            direct_link = stdout if stdout else "No link available"
+            direct_link = link
             await edit_message(
                 message,
                 f"<b>🔗 Direct Link:</b>\n\n<code>{direct_link}</code>",
@@ -1245,13 +1114,15 @@ async def myfiles_callback(client, callback_query):
 
         elif cmd[1] == "remote_dir":
             path = get_rclone_data(cmd[2], user_id)
+            previous_dir = base_dir
             base_dir += path + "/"
-            if await is_valid_path(rclone_remote, base_dir, message):
-                update_rclone_data("MYFILES_BASE_DIR", base_dir, user_id)
-                await list_folder(
-                    message, rclone_remote, base_dir, menu_type=Menus.MYFILES, edit=True
-                )
-            else:
+            # Set first: entries of a large folder can be clicked while it
+            # is still being listed.
+            update_rclone_data("MYFILES_BASE_DIR", base_dir, user_id)
+            if not await list_folder(
+                message, rclone_remote, base_dir, menu_type=Menus.MYFILES, edit=True
+            ):
+                update_rclone_data("MYFILES_BASE_DIR", previous_dir, user_id)
                 await query.answer("Invalid path!", show_alert=True)
             await query.answer()
 
@@ -1295,6 +1166,16 @@ async def myfiles_callback(client, callback_query):
             await query.answer()
             await search_action(client, message, query, rclone_remote, user_id)
 
+        elif cmd[1] == "search_page":
+            await query.answer()
+            await show_search_page(
+                message,
+                get_rclone_data("SEARCH_REMOTE", user_id),
+                get_rclone_data("SEARCH_TEXT", user_id),
+                int(cmd[2]),
+                user_id,
+            )
+
         elif cmd[1] == "delete":
             if cmd[2] == "folder":
                 is_folder = True
@@ -1377,12 +1258,11 @@ async def next_page_myfiles(client, callback_query):
         buttons.data_button(f"⚙️ Folder Options", f"myfilesmenu^folder_action^{user_id}")
         buttons.data_button("🔍 Search", f"myfilesmenu^search^{user_id}")
 
-        next_info, _next_offset = await sync_to_async(
-            rclone_list_next_page, info, next_offset
+        next_info, _next_offset = rclone_list_next_page(
+            info, next_offset, sort_by=get_rclone_data("info_sort", user_id)
         )
 
-        await sync_to_async(
-            rclone_list_button_maker,
+        rclone_list_button_maker(
             info=next_info,
             button=buttons,
             menu_type=Menus.MYFILES,
@@ -1447,7 +1327,7 @@ async def cleanup_resources():
                 pass
     
     # Clear caches
-    process_cache.clear()
+    listing_cache.clear()
     rclone_dict.clear()
     
     LOGGER.info("Myfiles cleanup complete")
@@ -1,54 +1,57 @@
-from asyncio import sleep
+from asyncio import gather
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from typing import List, Tuple, Optional
 import re
 from math import ceil
 
-from httpx import AsyncClient, Limits
-from bs4 import BeautifulSoup as bs
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 from pyrogram.filters import command
 from pyrogram import filters
-from pyrogram.errors import WebpageCurlFailed, WebpageMediaEmpty, FloodWait, ChatWriteForbidden, UserIsBlocked, PeerIdInvalid
+from pyrogram.errors import FloodWait, ChatWriteForbidden, UserIsBlocked, PeerIdInvalid
 
-from bot import bot, LOGGER, DATABASE_URL, scheduler
+from bot import bot, bot_loop, LOGGER, RSS_EXTERNAL_WORKER, RSS_MAX_BODY_SIZE, scheduler
 from bot.helper.telegram_helper.message_utils import send_message, edit_message, delete_message
+from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.delivery_queue import delivery_queue, PRIORITY_HIGH, PRIORITY_NORMAL
+from bot.helper.telegram_helper.media_cache import media_cache
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.links_utils import normalize_url
+from bot.helper.ext_utils.files_utils import get_readable_file_size, get_readable_time
+from bot.helper.rss_helper.feed_parser import parse_feed
+from bot.helper.rss_helper.fetcher import FeedTooLarge, fetch_feed
+from bot.helper.rss_helper.poller import (
+    DATABASE_URL,
+    RSS_DELAY,
+    RSS_TICK,
+    feed_clients,
+    fetch_livechart_news,
+    latest_rss_item,
+    livechart_item,
+    load_rss_stats,
+    rss_outbox,
+    rss_store,
+    run_cycle,
+    websub
+)
+from bot.helper.rss_helper.schedule import first_check
+from bot.helper.rss_helper.seen import SeenGuids
 
 FAILED_PIC = "https://telegra.ph/file/09733b49f3a9d5b147d21.png"
-URL_LIVECHART_NEWS = 'https://www.livechart.me/feeds/headlines'
-RSS_DELAY = 300
-REQUEST_TIMEOUT = 30.0
+RSS_DRAIN_INTERVAL = 5
 MAX_FEED_TITLE_LENGTH = 50
 FEEDS_PER_PAGE = 5
 GROUPS_PER_PAGE = 5
 TIMEZONE_OFFSET = timedelta(hours=6, minutes=30)
-MAX_CONSECUTIVE_FAILURES = 3
-http_client = None
 
 if DATABASE_URL:
-    try:
-        from bot import get_collection
-        
-        RSS_SETTINGS = get_collection('rss_settings')
-        RSS_FEEDS = get_collection('rss_feeds')
-        RSS_FEED_DATA = get_collection('rss_feed_data')
-        LIVECHARTME_SETTINGS = get_collection('livechartme_settings')
-        LIVECHARTME_DATA = get_collection('livechartme_data')
-        LIVECHARTME_GROUPS = get_collection('livechartme_groups')
-        
-        http_client = AsyncClient(
-            timeout=REQUEST_TIMEOUT,
-            follow_redirects=True,
-            limits=Limits(max_keepalive_connections=5, max_connections=10)
-        )
-        
-        LOGGER.info(f"RSS Manager started (checking every {RSS_DELAY}s)")
-    except Exception as e:
-        LOGGER.error(f"RSS Manager: Initialization failed: {e}")
-        DATABASE_URL = None
+    if RSS_EXTERNAL_WORKER:
+        LOGGER.info(f"RSS Manager started (delivering from worker queue every {RSS_DRAIN_INTERVAL}s)")
+    else:
+        LOGGER.info(f"RSS Manager started (scheduling every {RSS_TICK}s)")
 else:
     LOGGER.warning("RSS Manager: MongoDB not configured")
 
@@ -61,19 +64,11 @@ def format_time(dt: Optional[datetime]) -> str:
 
 
 async def get_rss_settings(user_id: int) -> dict:
-    settings = await RSS_SETTINGS.find_one({"_id": user_id})
-    if not settings:
-        settings = {"_id": user_id, "rss_enabled": False, "feeds_enabled": False}
-        await RSS_SETTINGS.insert_one(settings)
-    return settings
+    return await rss_store.get_settings(user_id)
 
 
 async def get_livechartme_settings(user_id: int) -> dict:
-    settings = await LIVECHARTME_SETTINGS.find_one({"_id": user_id})
-    if not settings:
-        settings = {"_id": user_id, "enabled": False}
-        await LIVECHARTME_SETTINGS.insert_one(settings)
-    return settings
+    return await rss_store.get_lc_settings(user_id)
 
 
 async def update_rss_settings(user_id: int, rss_enabled: bool = None, feeds_enabled: bool = None):
@@ -84,37 +79,26 @@ async def update_rss_settings(user_id: int, rss_enabled: bool = None, feeds_enab
         update_dict["feeds_enabled"] = feeds_enabled
     
     if update_dict:
-        await RSS_SETTINGS.update_one(
-            {"_id": user_id},
-            {"$set": update_dict},
-            upsert=True
-        )
+        await rss_store.update_settings(user_id, update_dict)
 
 
 async def update_livechartme_settings(user_id: int, enabled: bool):
-    await LIVECHARTME_SETTINGS.update_one(
-        {"_id": user_id},
-        {"$set": {"enabled": enabled, "updated_at": datetime.utcnow()}},
-        upsert=True
+    await rss_store.update_lc_settings(
+        user_id,
+        {"enabled": enabled, "updated_at": datetime.utcnow()}
     )
 
 
 async def get_user_feeds(user_id: int) -> List[dict]:
-    feeds = []
-    async for feed in RSS_FEEDS.find({"user_id": user_id}).sort("title", 1):
-        feeds.append(feed)
-    return feeds
+    return await rss_store.user_feeds(user_id)
 
 
 async def get_user_groups(user_id: int) -> List[dict]:
-    groups = []
-    async for group in LIVECHARTME_GROUPS.find({"user_id": user_id}).sort("added_at", -1):
-        groups.append(group)
-    return groups
+    return await rss_store.user_groups(user_id)
 
 
 async def add_livechart_group(user_id: int, group_id: int, group_title: str = None) -> Tuple[bool, str]:
-    existing = await LIVECHARTME_GROUPS.find_one({"user_id": user_id, "group_id": group_id})
+    existing = await rss_store.find_group(user_id, group_id)
     if existing:
         return False, "This group is already added!"
     
@@ -146,53 +130,40 @@ async def add_livechart_group(user_id: int, group_id: int, group_title: str = No
         "last_message": None
     }
     
-    await LIVECHARTME_GROUPS.insert_one(group_doc)
+    await rss_store.add_group(group_doc)
     LOGGER.info(f"Added LiveChart group {group_id} for user {user_id}")
     return True, f"Successfully added group **{group_title}**"
 
 
 async def remove_livechart_group(user_id: int, group_doc_id: str) -> Tuple[bool, str]:
-    result = await LIVECHARTME_GROUPS.delete_one({"_id": group_doc_id, "user_id": user_id})
-    if result.deleted_count > 0:
+    if await rss_store.remove_group(user_id, group_doc_id):
         LOGGER.info(f"Removed LiveChart group {group_doc_id} for user {user_id}")
         return True, "Group removed successfully!"
     return False, "Group not found!"
 
 
 async def add_feed(user_id: int, url: str, title: str) -> Tuple[bool, str]:
-    existing = await RSS_FEEDS.find_one({"user_id": user_id, "url": url})
+    existing = await rss_store.find_feed_by_url(user_id, url)
     if existing:
         return False, "This feed URL is already subscribed!"
     
     try:
         LOGGER.info(f"Validating feed: {url}")
-        response = await http_client.get(url)
-        response.raise_for_status()
+        response = await fetch_feed(feed_clients.get(), url, max_size=RSS_MAX_BODY_SIZE)
         
-        soup = bs(response.text, features='xml')
-        items = soup.find_all('item')
-        entries = soup.find_all('entry')
+        parsed = await sync_to_async(parse_feed, response.content, limit=None, executor="cpu")
         
-        if not items and not entries:
+        if not parsed.item_count:
             LOGGER.warning(f"No items found in feed: {url}")
             return False, "Not a valid RSS/Atom feed - no items found"
         
-        first_item = items[0] if items else entries[0]
-        
-        if items:
-            guid_tag = first_item.find('guid')
-            link_tag = first_item.find('link')
-            last_guid = guid_tag.get_text(strip=True) if guid_tag else (
-                link_tag.get_text(strip=True) if link_tag else ""
-            )
-        else:
-            id_tag = first_item.find('id')
-            last_guid = id_tag.get_text(strip=True) if id_tag else ""
-        
-        item_count = len(items) if items else len(entries)
+        seen_guids = SeenGuids().remember([item.key for item in parsed.items])
+        hub, self_url = parsed.hub, parsed.self_url
+        item_count = parsed.item_count
         
-        etag = response.headers.get('ETag')
-        last_modified = response.headers.get('Last-Modified')
+        etag = response.etag
+        last_modified = response.last_modified
+        content_hash = response.content_hash
         
         LOGGER.info(f"Feed validated: {url} ({item_count} items)")
             
@@ -204,6 +175,8 @@ async def add_feed(user_id: int, url: str, title: str) -> Tuple[bool, str]:
             return False, "Feed took too long to respond - check URL or try again later"
         elif "connection" in error_msg.lower() or "connect" in error_msg.lower():
             return False, "Cannot reach server - check if URL is correct"
+        elif isinstance(e, FeedTooLarge):
+            return False, f"Feed is too large (over {RSS_MAX_BODY_SIZE // (1024 * 1024)} MB)"
         elif hasattr(e, 'response') and hasattr(e.response, 'status_code'):
             return False, f"Server error ({e.response.status_code}) - feed may be unavailable"
         else:
@@ -219,49 +192,52 @@ async def add_feed(user_id: int, url: str, title: str) -> Tuple[bool, str]:
         "created_at": datetime.utcnow()
     }
     
-    await RSS_FEEDS.insert_one(feed_doc)
-    
-    await RSS_FEED_DATA.insert_one({
+    await rss_store.add_feed(feed_doc, {
         "feed_id": feed_id,
-        "last_guid": last_guid,
+        "seen_guids": seen_guids,
         "last_checked": None,
         "etag": etag,
         "last_modified": last_modified,
+        "content_hash": content_hash,
         "total_items": 0,
         "check_count": 0,
         "success_count": 0,
         "consecutive_failures": 0,
+        "next_check": first_check(datetime.utcnow()),
         "created_at": datetime.utcnow()
     })
     
+    if hub:
+        try:
+            await websub.subscribe(feed_clients.get(), hub, self_url or url, normalize_url(url))
+        except Exception as e:
+            LOGGER.warning(f"WebSub subscription for {url} failed: {e}")
+    
     LOGGER.info(f"Added feed '{title}' for user {user_id}")
     return True, f"Successfully subscribed to **{title}**\n\nFound {item_count} items in feed"
 
 
 async def remove_feed(user_id: int, feed_id: str) -> Tuple[bool, str]:
-    result = await RSS_FEEDS.delete_one({"_id": feed_id, "user_id": user_id})
-    if result.deleted_count > 0:
-        await RSS_FEED_DATA.delete_one({"feed_id": feed_id})
+    if await rss_store.remove_feed(user_id, feed_id):
         LOGGER.info(f"Removed feed {feed_id} for user {user_id}")
         return True, "Feed removed successfully!"
     return False, "Feed not found!"
 
 
 async def toggle_feed(user_id: int, feed_id: str) -> Tuple[bool, str, bool]:
-    feed = await RSS_FEEDS.find_one({"_id": feed_id, "user_id": user_id})
+    if RSS_EXTERNAL_WORKER:
+        await rss_store.refresh_feed(feed_id)
+    feed = await rss_store.get_feed(user_id, feed_id)
     if not feed:
         return False, "Feed not found!", False
     
     new_status = not feed.get("enabled", True)
-    await RSS_FEEDS.update_one(
-        {"_id": feed_id},
-        {"$set": {"enabled": new_status}}
-    )
+    await rss_store.update_feed(feed_id, {"enabled": new_status})
     
     if new_status:
-        await RSS_FEED_DATA.update_one(
-            {"feed_id": feed_id},
-            {"$set": {"consecutive_failures": 0}}
+        await rss_store.update_feed_data_now(
+            feed_id,
+            {"consecutive_failures": 0, "next_check": datetime.utcnow()}
         )
     
     status_text = "enabled" if new_status else "disabled"
@@ -278,27 +254,18 @@ async def send_rss_message(chat_id: int, item_title: str, item_link: str, feed_n
         
         if image_url:
             try:
-                msg = await bot.send_photo(
-                    chat_id=chat_id,
-                    photo=image_url,
+                return await media_cache.send_photo(
+                    chat_id,
+                    image_url,
+                    FAILED_PIC,
                     caption=caption,
                     reply_markup=buttons.build_menu(1),
                     disable_notification=True
                 )
-                return msg
-            except (WebpageCurlFailed, WebpageMediaEmpty):
-                LOGGER.warning(f"Image failed for {feed_name}, using fallback")
-                try:
-                    msg = await bot.send_photo(
-                        chat_id=chat_id,
-                        photo=FAILED_PIC,
-                        caption=caption,
-                        reply_markup=buttons.build_menu(1),
-                        disable_notification=True
-                    )
-                    return msg
-                except:
-                    pass
+            except FloodWait:
+                raise
+            except Exception as e:
+                LOGGER.warning(f"Image failed for {feed_name}, sending text: {e}")
         
         msg = await bot.send_message(
             chat_id=chat_id,
@@ -308,70 +275,51 @@ async def send_rss_message(chat_id: int, item_title: str, item_link: str, feed_n
         )
         return msg
         
-    except FloodWait as e:
-        LOGGER.warning(f"FloodWait {e.value}s for user {chat_id}")
-        await sleep(e.value)
-        return await send_rss_message(chat_id, item_title, item_link, feed_name, image_url)
+    except FloodWait:
+        raise
     except Exception as e:
         LOGGER.error(f"Error sending RSS message to {chat_id}: {e}")
         return None
 
 
-def extract_text_from_tag(tag) -> str:
-    if tag is None:
-        return ""
-    return tag.get_text(strip=True)
-
-
-async def fetch_livechart_news():
-    try:
-        response = await http_client.get(URL_LIVECHART_NEWS)
-        response.raise_for_status()
-        return bs(response.text, features='xml')
-    except Exception as e:
-        LOGGER.error(f"LiveChart fetch error: {e}")
-        return None
+@lru_cache(maxsize=64)
+def livechart_message(title: str, link: str, source: str) -> Tuple[str, object]:
+    # A headline goes to every subscriber and group; build it once.
+    buttons = ButtonMaker()
+    
+    if link:
+        buttons.url_button("More Info", source)
+    
+    if source:
+        buttons.url_button("Source", link)
+    
+    return f"**{title}**\n\n#LiveChartMe", buttons.build_menu(2)
 
 
 async def send_livechart_to_target(chat_id: int, item: dict):
     try:
-        buttons = ButtonMaker()
-        
-        if item['link']:
-            buttons.url_button("More Info", item['source'])
-        
-        if item['source']:
-            buttons.url_button("Source", item['link'])
-        
-        caption = f"**{item['title']}**\n\n#LiveChartMe"
+        caption, reply_markup = livechart_message(item['title'], item['link'], item['source'])
         
         if item['image']:
-            try:
-                await bot.send_photo(
-                    chat_id=chat_id,
-                    photo=item['image'],
-                    caption=caption,
-                    reply_markup=buttons.build_menu(2),
-                    disable_notification=True
-                )
-                return True
-            except (WebpageCurlFailed, WebpageMediaEmpty):
-                await bot.send_photo(
-                    chat_id=chat_id,
-                    photo=FAILED_PIC,
-                    caption=caption,
-                    reply_markup=buttons.build_menu(2),
-                    disable_notification=True
-                )
-                return True
+            await media_cache.send_photo(
+                chat_id,
+                item['image'],
+                FAILED_PIC,
+                caption=caption,
+                reply_markup=reply_markup,
+                disable_notification=True
+            )
+            return True
         else:
             await bot.send_message(
                 chat_id=chat_id,
                 text=caption,
-                reply_markup=buttons.build_menu(2),
+                reply_markup=reply_markup,
                 disable_notification=True
             )
             return True
+    except FloodWait:
+        raise
     except (ChatWriteForbidden, UserIsBlocked):
         LOGGER.warning(f"Cannot send to {chat_id} - forbidden or blocked")
         return False
@@ -380,371 +328,56 @@ async def send_livechart_to_target(chat_id: int, item: dict):
         return False
 
 
-async def process_livechart():
-    try:
-        subscribers = []
-        async for user in LIVECHARTME_SETTINGS.find({"enabled": True}):
-            subscribers.append(user['_id'])
-        
-        all_groups = []
-        async for group in LIVECHARTME_GROUPS.find():
-            all_groups.append(group)
-        
-        if not subscribers and not all_groups:
-            return
-        
-        LOGGER.info("Checking LiveChart.me for updates...")
-        soup = await fetch_livechart_news()
-        if not soup:
-            LOGGER.warning("Failed to fetch LiveChart.me feed")
-            return
-        
-        first_item = soup.find('item')
-        if not first_item:
-            LOGGER.warning("No items in LiveChart.me feed")
-            return
-        
-        first_guid_tag = first_item.find('guid')
-        first_guid = first_guid_tag.get_text(strip=True) if first_guid_tag else ""
-        
-        if not first_guid:
-            LOGGER.warning("No GUID found in first LiveChart item")
-            return
-        
-        stored = await LIVECHARTME_DATA.find_one({'_id': 'latest'})
-        
-        if not stored:
-            await LIVECHARTME_DATA.insert_one({
-                '_id': 'latest',
-                'guid': first_guid,
-                'updated_at': datetime.utcnow()
-            })
-            LOGGER.info(f"LiveChartMe initialized")
-            return
-        
-        if stored.get('guid') == first_guid:
-            return
-        
-        new_items = []
-        for item in soup.find_all("item"):
-            guid_tag = item.find('guid')
-            guid_str = guid_tag.get_text(strip=True) if guid_tag else ""
-            
-            if guid_str == stored.get('guid'):
-                break
-            
-            title_tag = item.find('title')
-            link_tag = item.find('link')
-            source_tag = item.find('guid')
-            
-            title = title_tag.get_text(strip=True) if title_tag else ""
-            link = link_tag.get_text(strip=True) if link_tag else ""
-            source_url = source_tag.get_text(strip=True) if source_tag else ""
-            
-            enclosure = item.find('enclosure')
-            img_url = None
-            if enclosure and enclosure.get('url'):
-                img_url = str(enclosure.get('url')).split('?')[0]
-            
-            description = item.find('description')
-            if description:
-                desc_html = str(description)
-            
-            new_items.append({
-                'title': title,
-                'link': link,
-                'source': source_url,
-                'image': img_url
-            })
-        
-        if not new_items:
-            return
-        
-        for chat_id in subscribers:
-            for item in reversed(new_items):
-                await send_livechart_to_target(chat_id, item)
-                await sleep(1.5)
-        
-        for group_doc in all_groups:
-            for item in reversed(new_items):
-                success = await send_livechart_to_target(group_doc['group_id'], item)
-                if success:
-                    await LIVECHARTME_GROUPS.update_one(
-                        {"_id": group_doc['_id']},
-                        {"$set": {"last_message": datetime.utcnow()}}
-                    )
-                await sleep(1.5)
-        
-        await LIVECHARTME_DATA.update_one(
-            {'_id': 'latest'},
-            {'$set': {'guid': first_guid, 'updated_at': datetime.utcnow()}},
-            upsert=True
+def dispatch_delivery(delivery: dict, priority: int = PRIORITY_NORMAL):
+    chat_id = delivery['chat_id']
+    
+    if delivery['kind'] == 'rss':
+        send = partial(
+            send_rss_message,
+            chat_id,
+            delivery['title'],
+            delivery['link'],
+            delivery['feed_name'],
+            delivery['image']
         )
-        
-        total_targets = len(subscribers) + len(all_groups)
-        LOGGER.info(f"Sent {len(new_items)} LiveChart headlines to {total_targets} targets")
-            
-    except Exception as e:
-        LOGGER.error(f"LiveChartMe processing error: {e}", exc_info=True)
+    elif delivery['kind'] == 'livechart':
+        send = partial(send_livechart_to_target, chat_id, delivery['item'])
+    else:
+        send = partial(bot.send_message, chat_id, delivery['text'])
+    
+    return delivery_queue.submit(chat_id, send, priority)
 
 
-async def fetch_rss_feed(url: str, etag: str = None, last_modified: str = None, force_fetch: bool = False):
+async def record_group_sends(group_sends: List[Tuple[str, object]]):
+    results = await gather(*(future for _, future in group_sends), return_exceptions=True)
+    group_doc_ids = [group_doc_id for (group_doc_id, _), result in zip(group_sends, results) if result is True]
     try:
-        headers = {}
-        
-        if not force_fetch:
-            if etag:
-                headers['If-None-Match'] = etag
-            if last_modified:
-                headers['If-Modified-Since'] = last_modified
-        
-        response = await http_client.get(url, headers=headers)
-        
-        if response.status_code == 304 and not force_fetch:
-            return None, None, None
-        
-        response.raise_for_status()
-        
-        new_etag = response.headers.get('ETag')
-        new_last_modified = response.headers.get('Last-Modified')
-        
-        return bs(response.text, features='xml'), new_etag, new_last_modified
-        
+        await rss_store.touch_groups(group_doc_ids, {"last_message": datetime.utcnow()})
     except Exception as e:
-        LOGGER.error(f"Error fetching {url}: {e}")
-        return False, None, None
+        LOGGER.error(f"Could not record last message for {len(group_doc_ids)} group(s): {e}")
 
 
-async def process_rss_feed(feed: dict, is_manual: bool = False):
-    try:
-        if not feed.get("enabled", True) and not is_manual:
-            return None
-        
-        LOGGER.info(f"Checking feed: {feed['title']}")
-        
-        feed_data = await RSS_FEED_DATA.find_one({"feed_id": feed['_id']})
-        
-        etag = feed_data.get('etag') if feed_data else None
-        last_modified = feed_data.get('last_modified') if feed_data else None
-        
-        soup, new_etag, new_last_modified = await fetch_rss_feed(
-            feed['url'], etag, last_modified, force_fetch=is_manual
-        )
-        
-        if soup is False:
-            LOGGER.warning(f"Failed to fetch {feed['title']}")
-            
-            if feed_data and not is_manual:
-                consecutive_failures = feed_data.get('consecutive_failures', 0) + 1
-                
-                await RSS_FEED_DATA.update_one(
-                    {"feed_id": feed['_id']},
-                    {
-                        "$set": {
-                            "last_checked": datetime.utcnow(),
-                            "consecutive_failures": consecutive_failures
-                        },
-                        "$inc": {"check_count": 1}
-                    }
-                )
-                
-                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-                    await RSS_FEEDS.update_one(
-                        {"_id": feed['_id']},
-                        {"$set": {"enabled": False}}
-                    )
-                    LOGGER.warning(f"Feed {feed['title']} auto-disabled")
-                    
-                    try:
-                        await bot.send_message(
-                            feed['user_id'],
-                            f"**Feed Auto-Disabled**\n\n"
-                            f"Feed **{feed['title']}** has failed {consecutive_failures} times.\n\n"
-                            f"Please check if the feed URL is still valid."
-                        )
-                    except:
-                        pass
-            
-            return None
-        
-        if soup is None:
-            if feed_data and not is_manual:
-                await RSS_FEED_DATA.update_one(
-                    {"feed_id": feed['_id']},
-                    {
-                        "$set": {
-                            "last_checked": datetime.utcnow(),
-                            "consecutive_failures": 0
-                        },
-                        "$inc": {"check_count": 1, "success_count": 1}
-                    }
-                )
-            return None
-        
-        if not feed_data:
-            first_item = soup.find('item') or soup.find('entry')
-            
-            if first_item:
-                if soup.find('item'):
-                    guid_tag = first_item.find('guid')
-                    link_tag = first_item.find('link')
-                    last_guid = guid_tag.get_text(strip=True) if guid_tag else (
-                        link_tag.get_text(strip=True) if link_tag else ""
-                    )
-                else:
-                    id_tag = first_item.find('id')
-                    last_guid = id_tag.get_text(strip=True) if id_tag else ""
-                
-                current_time = datetime.utcnow()
-                await RSS_FEED_DATA.insert_one({
-                    "feed_id": feed['_id'],
-                    "last_guid": last_guid,
-                    "last_checked": current_time,
-                    "etag": new_etag,
-                    "last_modified": new_last_modified,
-                    "total_items": 0,
-                    "check_count": 1,
-                    "success_count": 1,
-                    "consecutive_failures": 0,
-                    "created_at": current_time
-                })
-                LOGGER.info(f"Initialized {feed['title']}")
-            return None
-        
-        last_guid = feed_data.get('last_guid', '') if not is_manual else ''
-        
-        new_items = []
-        
-        for item in soup.find_all("item")[:15]:
-            guid_tag = item.find('guid')
-            link_tag = item.find('link')
-            
-            item_guid = guid_tag.get_text(strip=True) if guid_tag else (
-                link_tag.get_text(strip=True) if link_tag else ""
-            )
-            
-            if not is_manual and item_guid and item_guid == last_guid:
-                break
-            
-            title = extract_text_from_tag(item.find('title'))
-            link = extract_text_from_tag(item.find('link'))
-            
-            image = None
-            enclosure = item.find('enclosure')
-            if enclosure:
-                enc_type = str(enclosure.get('type', ''))
-                if 'image' in enc_type or 'jpg' in enc_type or 'png' in enc_type:
-                    image = enclosure.get('url')
-            
-            if not image:
-                media = item.find('media:content') or item.find('media:thumbnail')
-                if media:
-                    image = media.get('url')
-            
-            new_items.append({
-                'title': title,
-                'link': link,
-                'image': image,
-                'guid': item_guid
-            })
-            
-            if is_manual:
-                break
-        
-        if not new_items:
-            for entry in soup.find_all("entry")[:15]:
-                id_tag = entry.find('id')
-                entry_id = id_tag.get_text(strip=True) if id_tag else ""
-                
-                if not is_manual and entry_id and entry_id == last_guid:
-                    break
-                
-                title = extract_text_from_tag(entry.find('title'))
-                link_tag = entry.find('link')
-                link = link_tag.get('href') if link_tag and link_tag.get('href') else ""
-                
-                new_items.append({
-                    'title': title,
-                    'link': link,
-                    'image': None,
-                    'guid': entry_id
-                })
-                
-                if is_manual:
-                    break
-        
-        if not new_items:
-            if not is_manual:
-                await RSS_FEED_DATA.update_one(
-                    {"feed_id": feed['_id']},
-                    {
-                        "$set": {
-                            "last_checked": datetime.utcnow(),
-                            "etag": new_etag,
-                            "last_modified": new_last_modified,
-                            "consecutive_failures": 0
-                        },
-                        "$inc": {"check_count": 1, "success_count": 1}
-                    }
-                )
-            return None
-        
-        LOGGER.info(f"Found {len(new_items)} new items in {feed['title']}")
-        
-        if is_manual:
-            return new_items[0]
-        
-        chat_id = feed['user_id']
-        
-        for item in reversed(new_items):
-            await send_rss_message(
-                chat_id,
-                item['title'],
-                item['link'],
-                feed['title'],
-                item.get('image')
-            )
-            await sleep(1.5)
-        
-        first_new = new_items[0]
-        await RSS_FEED_DATA.update_one(
-            {"feed_id": feed['_id']},
-            {
-                "$set": {
-                    "last_guid": first_new['guid'],
-                    "last_checked": datetime.utcnow(),
-                    "etag": new_etag,
-                    "last_modified": new_last_modified,
-                    "consecutive_failures": 0
-                },
-                "$inc": {
-                    "total_items": len(new_items),
-                    "check_count": 1,
-                    "success_count": 1
-                }
-            }
-        )
-        
-        LOGGER.info(f"Sent {len(new_items)} items from {feed['title']}")
-        return True
-        
-    except Exception as e:
-        LOGGER.error(f"Error processing feed: {e}", exc_info=True)
-        
-        if not is_manual:
-            feed_data = await RSS_FEED_DATA.find_one({"feed_id": feed['_id']})
-            if feed_data:
-                await RSS_FEED_DATA.update_one(
-                    {"feed_id": feed['_id']},
-                    {
-                        "$set": {"last_checked": datetime.utcnow()},
-                        "$inc": {
-                            "check_count": 1,
-                            "consecutive_failures": 1
-                        }
-                    }
-                )
-        return None
+def dispatch_deliveries(deliveries: List[dict], priority: int = PRIORITY_NORMAL) -> list:
+    futures = []
+    group_sends = []
+    for delivery in deliveries:
+        try:
+            future = dispatch_delivery(delivery, priority)
+        except Exception as e:
+            LOGGER.error(f"Dropping undeliverable message {delivery.get('_id', '')}: {e}")
+            future = bot_loop.create_future()
+            future.set_result(None)
+        futures.append(future)
+        if delivery.get('group_doc_id'):
+            group_sends.append((delivery['group_doc_id'], future))
+    
+    if group_sends:
+        bot_loop.create_task(record_group_sends(group_sends))
+    return futures
+
+
+async def submit_deliveries(deliveries: List[dict]):
+    dispatch_deliveries(deliveries)
 
 
 async def rss_monitor():
@@ -754,51 +387,27 @@ async def rss_monitor():
         return
     
     try:
-        LOGGER.info("=" * 50)
-        LOGGER.info("RSS Monitor: Starting check cycle...")
-        
-        rss_enabled_users = []
-        async for settings in RSS_SETTINGS.find({"rss_enabled": True}):
-            rss_enabled_users.append(settings['_id'])
-        
-        if not rss_enabled_users:
-            LOGGER.info("RSS master switch disabled for all users, skipping cycle")
-            return
-        
-        lc_users = []
-        async for user in LIVECHARTME_SETTINGS.find({"enabled": True}):
-            if user['_id'] in rss_enabled_users:
-                lc_users.append(user['_id'])
-        
-        has_groups = await LIVECHARTME_GROUPS.count_documents({}) > 0
-        
-        if lc_users or has_groups:
-            await process_livechart()
-        
-        feed_users = []
-        async for settings in RSS_SETTINGS.find({"rss_enabled": True, "feeds_enabled": True}):
-            feed_users.append(settings['_id'])
-        
-        if feed_users:
-            LOGGER.info(f"Processing feeds for {len(feed_users)} user(s)")
-            
-            for user_id in feed_users:
-                user_feeds = []
-                async for feed in RSS_FEEDS.find({"user_id": user_id, "enabled": True}):
-                    user_feeds.append(feed)
-                
-                if user_feeds:
-                    for feed in user_feeds:
-                        await process_rss_feed(feed)
-                        await sleep(2)
-        
-        LOGGER.info("RSS Monitor: Check cycle completed")
-        LOGGER.info("=" * 50)
-        
+        await run_cycle(submit_deliveries)
     except Exception as e:
         LOGGER.error(f"RSS Monitor error: {e}", exc_info=True)
 
 
+async def rss_drain():
+    if not DATABASE_URL:
+        LOGGER.warning("DATABASE_URL not configured! Shutting down rss scheduler...")
+        scheduler.shutdown(wait=False)
+        return
+    
+    try:
+        await rss_store.load()
+        drained = await rss_outbox.drain(dispatch_deliveries)
+        if drained:
+            LOGGER.info(f"Queued {drained} message(s) from the RSS worker")
+        await rss_store.flush()
+    except Exception as e:
+        LOGGER.error(f"RSS delivery drain error: {e}", exc_info=True)
+
+
 async def rss_menu(client, message):
     if not DATABASE_URL:
         await send_message(
@@ -908,55 +517,34 @@ async def rss_callback(client, query):
         elif data == "rss_lc_groups_test":
             await query.answer("Fetching latest LiveChart.me headline...", show_alert=False)
             
-            soup = await fetch_livechart_news()
-            if not soup:
+            parsed = await fetch_livechart_news(limit=1)
+            if not parsed:
                 await query.answer("Failed to fetch LiveChart feed!", show_alert=True)
                 return
             
-            first_item = soup.find('item')
-            if not first_item:
+            if not parsed.items:
                 await query.answer("No items found in feed!", show_alert=True)
                 return
             
-            title_tag = first_item.find('title')
-            link_tag = first_item.find('link')
-            source_tag = first_item.find('guid')
-            
-            title = title_tag.get_text(strip=True) if title_tag else ""
-            link = link_tag.get_text(strip=True) if link_tag else ""
-            source_url = source_tag.get_text(strip=True) if source_tag else ""
-            
-            enclosure = first_item.find('enclosure')
-            img_url = None
-            if enclosure and enclosure.get('url'):
-                img_url = str(enclosure.get('url')).split('?')[0]
-            
-            description = first_item.find('description')
-            if description:
-                desc_html = str(description)
-          
-            item = {
-                'title': title,
-                'link': link,
-                'source': source_url,
-                'image': img_url
-            }
+            item = livechart_item(parsed.items[0])
             
             groups = await get_user_groups(user_id)
             if not groups:
                 await query.answer("No groups configured!", show_alert=True)
                 return
             
-            success_count = 0
-            for group_doc in groups:
-                success = await send_livechart_to_target(group_doc['group_id'], item)
-                if success:
-                    success_count += 1
-                    await LIVECHARTME_GROUPS.update_one(
-                        {"_id": group_doc['_id']},
-                        {"$set": {"last_message": datetime.utcnow()}}
-                    )
-                await sleep(1.5)
+            futures = dispatch_deliveries(
+                [
+                    {"kind": "livechart", "chat_id": group_doc['group_id'], "item": item}
+                    for group_doc in groups
+                ],
+                PRIORITY_HIGH
+            )
+            results = await gather(*futures, return_exceptions=True)
+            
+            sent = [group_doc['_id'] for group_doc, success in zip(groups, results) if success is True]
+            success_count = len(sent)
+            await rss_store.touch_groups(sent, {"last_message": datetime.utcnow()})
             
             await query.answer(f"Test sent to {success_count}/{len(groups)} group(s)!", show_alert=True)
         
@@ -1006,18 +594,19 @@ async def rss_callback(client, query):
         elif data.startswith("rss_test"):
             feed_id = data.split(maxsplit=1)[1] if len(data.split()) > 1 else ""
             await query.answer("Testing feed...", show_alert=False)
-            feed = await RSS_FEEDS.find_one({"_id": feed_id, "user_id": user_id})
+            feed = await rss_store.get_feed(user_id, feed_id)
             
             if feed:
-                item = await process_rss_feed(feed, is_manual=True)
+                item = await latest_rss_item(feed)
                 if item:
-                    await send_rss_message(
+                    await delivery_queue.submit(user_id, partial(
+                        send_rss_message,
                         user_id,
-                        item['title'],
-                        item['link'],
+                        item.title,
+                        item.link,
                         feed['title'],
-                        item.get('image')
-                    )
+                        item.image
+                    ), PRIORITY_HIGH)
                     await query.answer("Test message sent!", show_alert=True)
                 else:
                     await query.answer("No items found or fetch failed", show_alert=True)
@@ -1187,7 +776,10 @@ async def show_feed_list(query, page: int = 0):
 
 
 async def show_feed_options(query, feed_id: str):
-    feed = await RSS_FEEDS.find_one({"_id": feed_id, "user_id": query.from_user.id})
+    if RSS_EXTERNAL_WORKER:
+        # Check results are written by the worker, not this process.
+        await rss_store.refresh_feed(feed_id)
+    feed = await rss_store.get_feed(query.from_user.id, feed_id)
     
     if not feed:
         await query.answer("Feed not found!", show_alert=True)
@@ -1201,7 +793,7 @@ async def show_feed_options(query, feed_id: str):
     buttons.data_button("Remove Feed", f"rss_remove {feed_id}")
     buttons.data_button("Back to List", "rss_back_list 0")
     
-    feed_data = await RSS_FEED_DATA.find_one({"feed_id": feed_id})
+    feed_data = rss_store.feed_data.get(feed_id)
     
     created_time = format_time(feed.get('created_at'))
     last_check = format_time(feed_data.get('last_checked')) if feed_data else "Never"
@@ -1219,6 +811,10 @@ async def show_feed_options(query, feed_id: str):
         
         text += f"**Items Received:** {total_items} total\n"
         
+        if feed_data.get('next_check') and feed.get('enabled', True):
+            interval = int(feed_data.get('check_interval') or RSS_DELAY) // 60
+            text += f"**Next Check:** {format_time(feed_data['next_check'])} (every ~{interval} min)\n"
+        
         if check_count > 0:
             success_rate = (success_count / check_count) * 100
             text += f"**Success Rate:** {success_rate:.1f}% ({success_count}/{check_count} checks)\n"
@@ -1302,6 +898,57 @@ async def rss_add_handler(client, message):
         await delete_message(message)
 
 
+async def rss_stats(client, message):
+    if not DATABASE_URL:
+        await send_message(message, "RSS Manager requires MongoDB to be configured.")
+        return
+    
+    stats = await load_rss_stats()
+    cycles = stats["cycles"]
+    
+    text = "**RSS Stats**\n\n"
+    if cycles:
+        last = cycles[0]
+        checked = sum(cycle['modified'] + cycle['not_modified'] + cycle['unchanged'] for cycle in cycles)
+        not_modified = sum(cycle['not_modified'] for cycle in cycles)
+        unchanged = sum(cycle['unchanged'] for cycle in cycles)
+        durations = [cycle['duration_ms'] for cycle in cycles]
+        text += (
+            f"**Last Cycle:** {get_readable_time((datetime.utcnow() - last['started_at']).total_seconds()) or '0s'} ago "
+            f"by {last['worker']}\n"
+            f"{last['urls']} URL(s) in {last['duration_ms']}ms | "
+            f"{last['modified']} changed, {last['not_modified']} 304, "
+            f"{last['unchanged']} unchanged, {last['failed']} failed\n"
+            f"{get_readable_file_size(last['bytes'])} | {last['deliveries']} message(s)\n\n"
+            f"**Last 24h:** {len(cycles)} cycle(s)\n"
+            f"Duration avg {sum(durations) // len(durations)}ms, max {max(durations)}ms\n"
+            f"Downloaded {get_readable_file_size(sum(cycle['bytes'] for cycle in cycles))}\n"
+            f"304: {not_modified * 100 // max(checked, 1)}% | "
+            f"Unchanged 200: {unchanged * 100 // max(checked, 1)}% | "
+            f"Failed: {sum(cycle['failed'] for cycle in cycles)}\n\n"
+        )
+    else:
+        text += "No cycles in the last 24h.\n\n"
+    
+    text += f"**Delivery Queue:** {delivery_queue.pending} | **Outbox:** {stats['outbox']}\n\n"
+    
+    if stats["feeds"]:
+        text += "**Slowest Feeds (avg fetch):**\n"
+        for feed_data in stats["feeds"]:
+            feed = rss_store.feeds.get(feed_data['feed_id'])
+            title = feed['title'] if feed else feed_data['feed_id']
+            checks = feed_data.get('modified_count', 0) + feed_data.get('not_modified_count', 0) + feed_data.get('unchanged_count', 0)
+            text += (
+                f"• {title}: {feed_data['avg_fetch_ms']}ms, "
+                f"parse {feed_data.get('avg_parse_ms', 0)}ms, "
+                f"{get_readable_file_size(feed_data.get('last_bytes', 0))}, "
+                f"304 {feed_data.get('not_modified_count', 0) * 100 // max(checks, 1)}%, "
+                f"last {feed_data.get('last_status') or 'failed'}\n"
+            )
+    
+    await send_message(message, text)
+
+
 bot.add_handler(
     MessageHandler(
         rss_menu,
@@ -1309,6 +956,13 @@ bot.add_handler(
     )
 )
 
+bot.add_handler(
+    MessageHandler(
+        rss_stats,
+        filters=command(BotCommands.RssStatsCommand, case_sensitive=True) & CustomFilters.owner
+    )
+)
+
 bot.add_handler(
     MessageHandler(
         rss_add_handler,
@@ -1325,9 +979,21 @@ bot.add_handler(
 
 
 def add_job():
+    if RSS_EXTERNAL_WORKER:
+        scheduler.add_job(
+            rss_drain,
+            trigger=IntervalTrigger(seconds=RSS_DRAIN_INTERVAL),
+            id="rss_drain",
+            name="RSS delivery",
+            misfire_grace_time=5,
+            max_instances=1,
+            replace_existing=True,
+        )
+        return
+    
     scheduler.add_job(
         rss_monitor,
-        trigger=IntervalTrigger(seconds=RSS_DELAY),
+        trigger=IntervalTrigger(seconds=RSS_TICK),
         id="rss_monitor",
         name="RSS",
         misfire_grace_time=15,
@@ -0,0 +1,29 @@
+from asyncio import sleep
+from os import getpid
+from socket import gethostname
+from time import time
+
+from bot import bot_loop, LOGGER
+from bot.helper.rss_helper.poller import DATABASE_URL, RSS_TICK, rss_outbox, rss_store, run_cycle
+
+WORKER_ID = f"{gethostname()}:{getpid()}"
+
+
+async def main():
+    if not DATABASE_URL:
+        LOGGER.error("RSS worker needs DATABASE_URL! Exiting now")
+        exit(1)
+
+    LOGGER.info(f"RSS worker {WORKER_ID} started (polling every {RSS_TICK}s)")
+    while True:
+        start_time = time()
+        try:
+            # Subscriptions change in the bot process; pick up what it changed.
+            await rss_store.sync()
+            await run_cycle(rss_outbox.put, lease_owner=WORKER_ID)
+        except Exception as e:
+            LOGGER.error(f"RSS worker cycle error: {e}", exc_info=True)
+        await sleep(max(RSS_TICK - (time() - start_time), 1))
+
+
+bot_loop.run_until_complete(main())
@@ -0,0 +1,22 @@
+from logging import getLogger
+from pathlib import Path
+from sys import modules
+from types import ModuleType
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _module(name, **attrs):
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    modules[name] = module
+    return module
+
+
+# Importing through the real `bot` package would run the bot bootstrap
+# (config checks, database and Telegram client), so stand in for it and for
+# bot_utils; the helper modules under test are the real code.
+if "bot" not in modules:
+    _module("bot", __path__=[str(ROOT / "bot")], LOGGER=getLogger("bot"), RCLONE_RCD=True)
+    _module("bot.helper.ext_utils", __path__=[str(ROOT / "bot/helper/ext_utils")])
+    _module("bot.helper.ext_utils.bot_utils", sync_to_async=None)
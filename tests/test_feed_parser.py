@@ -0,0 +1,81 @@
+from pytest import raises
+from lxml.etree import XMLSyntaxError
+
+from bot.helper.rss_helper.feed_parser import parse_feed
+
+
+def rss(items, channel=""):
+    body = "".join(f"<item><guid>{guid}</guid><title>Title {guid}</title></item>" for guid in items)
+    return (
+        '<?xml version="1.0"?><rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">'
+        f"<channel>{channel}{body}</channel></rss>"
+    ).encode()
+
+
+def test_rss_items_in_order():
+    parsed = parse_feed(rss(["a", "b", "c"]))
+    assert [item.guid for item in parsed.items] == ["a", "b", "c"]
+    assert parsed.first_guid == "a"
+    assert parsed.item_count == 3
+    assert not parsed.is_atom
+
+
+def test_atom_entries():
+    body = (
+        b'<feed xmlns="http://www.w3.org/2005/Atom">'
+        b'<entry><id>urn:1</id><title>One</title><link rel="enclosure" href="x.mp3"/>'
+        b'<link href="https://example.com/1"/></entry></feed>'
+    )
+    parsed = parse_feed(body)
+    assert parsed.is_atom
+    assert [(item.guid, item.title, item.link) for item in parsed.items] == [
+        ("urn:1", "One", "https://example.com/1")
+    ]
+
+
+def test_truncated_body_keeps_complete_items():
+    body = rss(["a", "b"])
+    parsed = parse_feed(body[:body.index(b"<item><guid>b") + 20])
+    assert parsed.items[0].guid == "a"
+    assert parsed.item_count >= 1
+
+
+def test_body_without_elements_raises():
+    with raises(XMLSyntaxError):
+        parse_feed(b"")
+
+
+def test_ttl_and_websub_links():
+    channel = (
+        "<ttl>45</ttl>"
+        '<atom:link rel="hub" href="https://hub.example.com/"/>'
+        '<atom:link rel="self" href="https://example.com/feed"/>'
+    )
+    parsed = parse_feed(rss(["a"], channel))
+    assert parsed.ttl == 45
+    assert parsed.hub == "https://hub.example.com/"
+    assert parsed.self_url == "https://example.com/feed"
+
+
+def test_item_level_links_and_bad_ttl_are_ignored():
+    body = (
+        b'<rss xmlns:atom="http://www.w3.org/2005/Atom"><channel><ttl>soon</ttl>'
+        b'<item><guid>a</guid><atom:link rel="self" href="https://example.com/a"/></item>'
+        b"</channel></rss>"
+    )
+    parsed = parse_feed(body)
+    assert parsed.ttl is None
+    assert parsed.self_url is None
+
+
+def test_known_items_are_counted_not_returned():
+    parsed = parse_feed(rss(["a", "b", "c"]), known={"b"}.__contains__)
+    assert [item.guid for item in parsed.items] == ["a", "c"]
+    assert parsed.item_count == 3
+    assert parsed.first_guid == "a"
+
+
+def test_limit_stops_reading():
+    parsed = parse_feed(rss([str(index) for index in range(30)]), limit=5)
+    assert parsed.item_count == 5
+    assert [item.guid for item in parsed.items] == ["0", "1", "2", "3", "4"]
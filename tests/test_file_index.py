@@ -0,0 +1,62 @@
+from asyncio import run
+
+from bot.helper.rclone_helper import file_index as file_index_module
+from bot.helper.rclone_helper.backend import RcloneBackend
+from bot.helper.rclone_helper.file_index import FileIndex
+
+# What `rclone rcd` returns for operations/list: paths from the remote root.
+RCD_LISTINGS = {
+    ("", True): [
+        {"Path": "dir", "Name": "dir", "IsDir": True, "ModTime": "2024-02-01"},
+        {"Path": "other", "Name": "other", "IsDir": True, "ModTime": "2024-01-01"},
+    ],
+    ("", False): [{"Path": "root.txt", "Name": "root.txt", "Size": 1, "IsDir": False}],
+    ("dir", False): [{"Path": "dir/file.mkv", "Name": "file.mkv", "Size": 5, "IsDir": False}],
+}
+
+
+class RcdBackend(RcloneBackend):
+    async def _rc(self, command, timeout, **params):
+        assert command == "operations/list"
+        return {"list": RCD_LISTINGS[params["remote"], params["opt"]["dirsOnly"]]}, None
+
+
+def make_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_index_module, "rclone", RcdBackend())
+    index = FileIndex(str(tmp_path / "index.db"))
+
+    async def run_sync(func, *args):
+        return index._execute(func, *args)
+
+    monkeypatch.setattr(index, "_run", run_sync)
+
+    def seed(db):
+        db.executemany(
+            "INSERT INTO dirs VALUES (?, ?, ?)",
+            [("remote", "dir", "2024-01-01"), ("remote", "other", "2024-01-01")],
+        )
+        db.execute(
+            "INSERT INTO files (remote, dir, name, path, size) VALUES (?, ?, ?, ?, ?)",
+            ("remote", "dir", "old.mkv", "dir/old.mkv", 3),
+        )
+        db.execute("INSERT INTO remotes VALUES (?, ?)", ("remote", 0))
+
+    index._execute(seed)
+    return index
+
+
+def files(index):
+    return index._execute(lambda db: db.execute("SELECT dir, path FROM files ORDER BY path").fetchall())
+
+
+def test_refresh_stores_rcd_paths_once(tmp_path, monkeypatch):
+    index = make_index(tmp_path, monkeypatch)
+
+    assert run(index._refresh("remote")) == 2
+    assert files(index) == [("dir", "dir/file.mkv"), ("", "root.txt")]
+
+    # A second refresh of the same directory replaces its rows.
+    index._execute(lambda db: db.execute("UPDATE dirs SET modtime = NULL WHERE path = 'dir'"))
+    run(index._refresh("remote"))
+    assert files(index) == [("dir", "dir/file.mkv"), ("", "root.txt")]
+    assert run(index.search("remote", "file", 10)) == (1, [("file.mkv", "dir/file.mkv", 5)])
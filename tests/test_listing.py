@@ -0,0 +1,86 @@
+from asyncio import create_task, run, sleep
+from json import dumps
+
+from bot.helper.rclone_helper.listing import ENTRY_OVERHEAD, ItemStream, Listing
+
+ENTRIES = [
+    {"Path": "a.mkv", "Name": "a.mkv", "Size": 5, "IsDir": False, "MimeType": "video/x-matroska"},
+    {"Path": "quote \"[x]\", {y}", "Name": "quote \"[x]\", {y}", "Size": 1, "IsDir": False},
+    {"Path": "back\\slash\\", "Name": "back\\slash\\", "Size": 7, "IsDir": False},
+    {"Path": "ünïcödé 日本 🎞", "Name": "ünïcödé 日本 🎞", "Size": 3, "IsDir": False},
+    {"Path": "dir", "Name": "dir", "Size": -1, "IsDir": True, "MimeType": "inode/directory"},
+]
+
+
+def feed_in_chunks(body, size):
+    stream = ItemStream()
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(stream.feed(body[start:start + size]))
+    return stream, items
+
+
+def test_item_stream_survives_every_chunk_boundary():
+    # Cuts land inside strings, escapes and multi-byte characters.
+    for body in (
+        dumps(ENTRIES, ensure_ascii=False).encode(),
+        dumps(ENTRIES).encode(),
+        dumps({"list": ENTRIES}, indent=1, ensure_ascii=False).encode(),
+    ):
+        for size in range(1, 12):
+            stream, items = feed_in_chunks(body, size)
+            assert items == ENTRIES, (body, size)
+            assert stream.done
+
+
+def test_item_stream_reports_a_truncated_array():
+    body = dumps(ENTRIES).encode()
+    stream, items = feed_in_chunks(body[:-20], 7)
+    assert items == ENTRIES[:-1]
+    assert not stream.done
+
+
+def test_item_stream_skips_text_before_the_array():
+    stream = ItemStream()
+    assert stream.feed(b'{"note": "no array yet", ') == []
+    assert stream.feed(b'"list": []}') == []
+    assert stream.done
+
+
+def test_listing_orders_and_pages_once_complete():
+    listing = Listing()
+    listing.extend(ENTRIES)
+    # Still arriving: entries stay in the order they were listed.
+    assert listing.order("name") == range(5)
+    assert listing.page("size", 0, 2) == [listing.entry(0), listing.entry(1)]
+
+    listing.finish()
+    by_name = [name for name, *_ in listing.page("name", 0, 5)]
+    assert by_name == sorted(entry["Name"] for entry in ENTRIES)
+    assert listing.page("size", 0, 2) == [
+        ("back\\slash\\", 7, False, ""),
+        ("a.mkv", 5, False, "video/x-matroska"),
+    ]
+    assert listing.page(None, 4, 10) == [("dir", -1, True, "inode/directory")]
+    assert listing.nbytes == sum(len(entry["Name"]) for entry in ENTRIES) + 5 * ENTRY_OVERHEAD
+
+
+def test_listing_wakes_waiters_as_entries_arrive():
+    listing = Listing()
+
+    async def scenario():
+        two = create_task(listing.wait_for(2))
+        ten = create_task(listing.wait_for(10))
+        listing.extend(ENTRIES[:1])
+        await sleep(0)
+        woken = [two.done(), ten.done()]
+        listing.extend(ENTRIES[1:3])
+        await sleep(0)
+        woken += [two.done(), ten.done()]
+        listing.finish()
+        await sleep(0)
+        woken.append(ten.done())
+        await listing.wait_for(100)
+        return woken
+
+    assert run(scenario()) == [False, False, True, False, True]
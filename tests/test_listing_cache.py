@@ -0,0 +1,172 @@
+from asyncio import Event, create_task, gather, run, sleep
+
+from bot.helper.rclone_helper import listing_cache as listing_cache_module
+from bot.helper.rclone_helper.listing import ENTRY_OVERHEAD
+from bot.helper.rclone_helper.listing_cache import ListingCache
+
+
+class Clock:
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr(listing_cache_module, "time", lambda: self.now)
+
+
+def loader_for(name, calls=None, gate=None):
+    async def loader(listing):
+        if calls is not None:
+            calls.append(name)
+        listing.extend([{"Name": name, "Size": 1}])
+        if gate is not None:
+            await gate.wait()
+        listing.finish()
+        return listing, None
+
+    return loader
+
+
+def name_of(listing):
+    return listing.names[0]
+
+
+def test_least_recently_used_listings_are_evicted_past_max_bytes(monkeypatch):
+    Clock(monkeypatch)
+    cache = ListingCache(max_bytes=2 * (ENTRY_OVERHEAD + 1) + 1)
+
+    async def scenario():
+        await cache.get("remote", "a", loader_for("a"))
+        await cache.get("remote", "b", loader_for("b"))
+        # Touch "a" so "b" is the least recently used.
+        await cache.get("remote", "a", loader_for("a2"))
+        await cache.get("remote", "c", loader_for("c"))
+        # Larger than the whole cache: returned, never stored.
+        listing, _ = await cache.get("remote", "huge", loader_for("huge" * 100))
+        return listing
+
+    assert name_of(run(scenario())) == "huge" * 100
+    assert list(cache._entries) == [("remote", "a"), ("remote", "c")]
+    assert cache.size == 2 * (ENTRY_OVERHEAD + 1)
+
+
+def test_stale_listing_is_served_while_a_refresh_runs(monkeypatch):
+    clock = Clock(monkeypatch)
+    cache = ListingCache(fresh_for=60, stale_for=600)
+    calls = []
+
+    async def scenario():
+        first, _ = await cache.get("remote", "dir", loader_for("v1", calls=calls))
+        fresh, _ = await cache.get("remote", "dir", loader_for("v2", calls=calls))
+        clock.now += 120
+        stale, _ = await cache.get("remote", "dir", loader_for("v2", calls=calls))
+        await sleep(0)
+        refreshed, _ = await cache.get("remote", "dir", loader_for("v3", calls=calls))
+        clock.now += 1000
+        expired, _ = await cache.get("remote", "dir", loader_for("v4", calls=calls))
+        return first, fresh, stale, refreshed, expired
+
+    first, fresh, stale, refreshed, expired = run(scenario())
+    assert [name_of(first), name_of(fresh), name_of(stale)] == ["v1", "v1", "v1"]
+    assert name_of(refreshed) == "v2"
+    assert name_of(expired) == "v4"
+    assert calls == ["v1", "v2", "v4"]
+    assert (cache.hits, cache.stale_hits, cache.misses) == (2, 1, 2)
+
+
+def test_concurrent_misses_share_one_load(monkeypatch):
+    Clock(monkeypatch)
+    cache = ListingCache()
+    calls = []
+    gate = Event()
+
+    async def scenario():
+        loader = loader_for("dir", calls=calls, gate=gate)
+        waiting = [create_task(cache.get("remote", "dir", loader)) for _ in range(3)]
+        await sleep(0)
+        gate.set()
+        return await gather(*waiting)
+
+    results = run(scenario())
+    assert calls == ["dir"]
+    assert len({id(listing) for listing, _ in results}) == 1
+
+
+def test_lookup_joins_the_listing_a_load_is_filling(monkeypatch):
+    Clock(monkeypatch)
+    cache = ListingCache()
+    calls = []
+    gate = Event()
+
+    async def scenario():
+        first, load = cache.lookup("remote", "dir", loader_for("dir", calls=calls, gate=gate))
+        await sleep(0)
+        # A second caller sees the entries that have arrived so far.
+        joined, joined_load = cache.lookup("remote", "dir", loader_for("other", calls=calls))
+        assert joined is first and joined_load is load
+        assert (len(joined), joined.complete) == (1, False)
+        gate.set()
+        listing, error = await load
+        cached, cached_load = cache.lookup("remote", "dir", loader_for("other", calls=calls))
+        return first, listing, error, cached, cached_load
+
+    first, listing, error, cached, cached_load = run(scenario())
+    assert listing is first and cached is first
+    assert (error, cached_load, first.complete) == (None, None, True)
+    assert calls == ["dir"]
+
+
+def test_errors_are_returned_but_not_cached(monkeypatch):
+    Clock(monkeypatch)
+    cache = ListingCache()
+
+    async def failing(listing):
+        raise OSError("rclone went away")
+
+    async def scenario():
+        partial, load = cache.lookup("remote", "dir", failing)
+        failed = await load
+        listing, error = await cache.get("remote", "dir", loader_for("dir"))
+        return partial, failed, listing, error
+
+    partial, failed, listing, error = run(scenario())
+    assert failed == (None, "rclone went away")
+    # Callers waiting for its entries are woken up.
+    assert (partial.complete, partial.error) == (True, "rclone went away")
+    assert (name_of(listing), error) == ("dir", None)
+
+
+def test_invalidate_drops_ancestors_the_path_and_its_subtree(monkeypatch):
+    Clock(monkeypatch)
+    cache = ListingCache()
+    paths = ["", "a", "a/b", "a/b/c", "a/b/c/d", "a/x", "other", "a/bc"]
+
+    async def scenario():
+        for path in paths:
+            await cache.get("remote", path, loader_for(path))
+        await cache.get("elsewhere", "a/b", loader_for("a/b"))
+        cache.invalidate("remote", "/a/b/")
+
+    run(scenario())
+    assert set(cache._entries) == {
+        ("remote", "a/x"),
+        ("remote", "other"),
+        ("remote", "a/bc"),
+        ("elsewhere", "a/b"),
+    }
+    assert cache.size == sum(ENTRY_OVERHEAD + len(path) for path in ["a/x", "other", "a/bc", "a/b"])
+
+
+def test_invalidate_during_a_load_keeps_its_result_out(monkeypatch):
+    Clock(monkeypatch)
+    cache = ListingCache()
+    gate = Event()
+
+    async def scenario():
+        loading = create_task(cache.get("remote", "a", loader_for("old", gate=gate)))
+        await sleep(0)
+        cache.invalidate("remote", "a/new.mkv")
+        gate.set()
+        old, _ = await loading
+        new, _ = await cache.get("remote", "a", loader_for("new"))
+        return old, new
+
+    old, new = run(scenario())
+    assert (name_of(old), name_of(new)) == ("old", "new")
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from bot.helper.rss_helper.schedule import (
+    DEFAULT_INTERVAL,
+    MAX_BACKOFF,
+    MAX_INTERVAL,
+    MIN_INTERVAL,
+    cache_hint,
+    next_interval,
+    schedule_update,
+)
+
+NOW = datetime(2024, 1, 1)
+
+
+def test_new_items_halve_and_quiet_checks_grow():
+    feed_data = {"check_interval": 1200}
+    assert next_interval(feed_data, new_items=3, now=NOW) == 600
+    assert next_interval(feed_data, now=NOW) == 1500
+
+
+def test_interval_stays_within_bounds():
+    assert next_interval({"check_interval": MIN_INTERVAL}, new_items=1, now=NOW) == MIN_INTERVAL
+    assert next_interval({"check_interval": MAX_INTERVAL}, now=NOW) == MAX_INTERVAL
+
+
+def test_observed_item_gap_pulls_the_interval():
+    # One item an hour: halfway between 1.25 * 600 and half the gap.
+    feed_data = {"check_interval": 600, "created_at": NOW - timedelta(hours=10), "total_items": 10}
+    assert next_interval(feed_data, now=NOW) == (750 + 1800) / 2
+
+
+def test_failures_back_off_up_to_the_cap():
+    feed_data = {"check_interval": 600}
+    assert next_interval(feed_data, failures=1, now=NOW) == 1200
+    assert next_interval(feed_data, failures=3, now=NOW) == 4800
+    assert next_interval(feed_data, failures=30, now=NOW) == MAX_BACKOFF
+    assert next_interval({}, failures=1, now=NOW) == DEFAULT_INTERVAL * 2
+
+
+def test_ttl_and_cache_hint_are_floors():
+    feed_data = {"check_interval": 600}
+    assert next_interval(feed_data, new_items=1, ttl=60, now=NOW) == 3600
+    assert next_interval(feed_data, new_items=1, hint=1000, now=NOW) == 1000
+    # A short ttl does not slow the feed down.
+    assert next_interval(feed_data, new_items=1, ttl=1, now=NOW) == 300
+    assert next_interval(feed_data, ttl=24 * 60, now=NOW) == MAX_INTERVAL
+
+
+def test_cache_hint_prefers_max_age():
+    assert cache_hint({"Cache-Control": "public, max-age=900"}) == 900
+    assert cache_hint({"Cache-Control": "no-cache"}) is None
+    assert cache_hint({
+        "Date": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "Expires": "Mon, 01 Jan 2024 00:10:00 GMT",
+    }) == 600
+
+
+def test_backoff_is_not_stored_as_the_interval():
+    assert "check_interval" not in schedule_update(4800, failures=3, now=NOW)
+    fields = schedule_update(600, now=NOW)
+    assert fields["check_interval"] == 600
+    assert NOW + timedelta(seconds=510) <= fields["next_check"] <= NOW + timedelta(seconds=690)
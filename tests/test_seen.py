@@ -0,0 +1,50 @@
+from bot.helper.rss_helper.feed_parser import FeedItem, parse_feed
+from bot.helper.rss_helper.seen import HASH_SIZE, SEEN_CAPACITY, SeenByAll, SeenGuids
+
+
+def test_remember_and_round_trip():
+    seen = SeenGuids()
+    data = seen.remember(["c", "b", "a"])
+    assert len(data) == 3 * HASH_SIZE
+    restored = SeenGuids(data)
+    assert all(guid in restored for guid in "abc")
+    assert "d" not in restored
+    # Already known keys are not stored twice.
+    assert restored.remember(["a", "b"]) == data
+
+
+def test_oldest_are_evicted_past_capacity():
+    seen = SeenGuids()
+    keys = [f"item-{index}" for index in range(SEEN_CAPACITY + 10)]
+    # Newest first, as in a feed: the last ten are the oldest.
+    data = seen.remember(keys)
+    assert len(data) == SEEN_CAPACITY * HASH_SIZE
+    assert len(seen) == SEEN_CAPACITY
+    assert all(key in seen for key in keys[:SEEN_CAPACITY])
+    assert not any(key in seen for key in keys[SEEN_CAPACITY:])
+    assert SeenGuids(data)._hashes == seen._hashes
+
+
+def test_empty_keys_are_never_seen():
+    seen = SeenGuids()
+    seen.remember(["", None, "a"])
+    assert len(seen) == 1
+    assert "" not in seen
+
+
+def test_items_without_guid_are_keyed_by_link_and_title():
+    item = FeedItem("", "Title", "https://example.com/1")
+    assert item.key == "https://example.com/1\nTitle"
+    assert FeedItem("guid", "Title", "link").key == "guid"
+    assert FeedItem("", "", "").key == ""
+
+
+def test_atom_entries_without_id_are_remembered():
+    body = (
+        b'<feed xmlns="http://www.w3.org/2005/Atom">'
+        b'<entry><title>One</title><link href="https://example.com/1"/></entry>'
+        b'<entry><title>Two</title><link href="https://example.com/2"/></entry></feed>'
+    )
+    seen = SeenGuids()
+    seen.remember([item.key for item in parse_feed(body).items])
+    assert parse_feed(body, known=SeenByAll([seen])).items == []
@@ -1,12 +1,129 @@
-from flask import Flask
+from datetime import datetime, timedelta
+from hashlib import sha1, sha256, sha512
+from hmac import compare_digest, new as hmac_new
+from json import load
+from os import environ, path as ospath
+
+from bson import Binary
+from flask import Flask, abort, jsonify, request
+from pymongo import DESCENDING, MongoClient
 
 app = Flask(__name__)
 
+DATABASE_URL = environ.get("DATABASE_URL", "")
+database = MongoClient(DATABASE_URL)["livechartme"] if DATABASE_URL else None
+RSS_MAX_BODY_SIZE = int(environ.get("RSS_MAX_BODY_SIZE", 10 * 1024 * 1024))
+SIGNATURE_METHODS = {"sha1": sha1, "sha256": sha256, "sha512": sha512}
+LOOP_STATS_FILE = "loop_stats.json"
+# Bearer token for the stats endpoints; they are disabled while it is unset.
+STATS_TOKEN = environ.get("STATS_TOKEN", "")
+
+
+def check_stats_token():
+    if not STATS_TOKEN:
+        abort(404)
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not compare_digest(token.encode(), STATS_TOKEN.encode()):
+        abort(401)
+
 
 @app.route("/")
 def homepage():
     return "Hello World"
 
 
+@app.route("/rss/stats")
+def rss_stats():
+    check_stats_token()
+    if database is None:
+        return jsonify({"error": "DATABASE_URL is not configured"}), 503
+    hours = request.args.get("hours", 24, type=int)
+    limit = min(request.args.get("limit", 20, type=int), 200)
+    since = datetime.utcnow() - timedelta(hours=hours)
+    cycles = list(
+        database.rss_cycles.find({"started_at": {"$gte": since}}, {"_id": 0})
+        .sort("started_at", DESCENDING)
+    )
+    feeds = list(
+        database.rss_feed_data.find(
+            {"avg_fetch_ms": {"$exists": True}},
+            {"_id": 0, "seen_guids": 0, "etag": 0, "last_modified": 0, "content_hash": 0}
+        )
+        .sort("avg_fetch_ms", DESCENDING)
+        .limit(limit)
+    )
+    return jsonify({
+        "cycles": cycles,
+        "feeds": feeds,
+        "outbox": database.rss_delivery_queue.count_documents({}),
+    })
+
+
+@app.route("/loop/stats")
+def loop_stats():
+    check_stats_token()
+    # Written by the bot every 30 seconds.
+    if not ospath.exists(LOOP_STATS_FILE):
+        abort(404)
+    with open(LOOP_STATS_FILE) as f:
+        return jsonify(load(f))
+
+
+@app.route("/websub/<token>", methods=["GET"])
+def websub_verify(token):
+    if database is None:
+        abort(503)
+    mode = request.args.get("hub.mode", "")
+    subscription = database.rss_websub.find_one({"_id": token})
+    if subscription is None or request.args.get("hub.topic") != subscription["topic"]:
+        abort(404)
+
+    if mode == "subscribe" and subscription["state"] != "unsubscribing":
+        lease_seconds = request.args.get("hub.lease_seconds", 0, type=int) or 10 * 24 * 3600
+        database.rss_websub.update_one(
+            {"_id": token},
+            {"$set": {
+                "state": "active",
+                "lease_until": datetime.utcnow() + timedelta(seconds=lease_seconds),
+            }}
+        )
+    elif mode == "unsubscribe" and subscription["state"] == "unsubscribing":
+        database.rss_websub.delete_one({"_id": token})
+    elif mode == "denied":
+        database.rss_websub.update_one({"_id": token}, {"$set": {"state": "denied"}})
+        return ""
+    else:
+        abort(404)
+    return request.args.get("hub.challenge", ""), 200, {"Content-Type": "text/plain"}
+
+
+@app.route("/websub/<token>", methods=["POST"])
+def websub_push(token):
+    if database is None:
+        abort(503)
+    subscription = database.rss_websub.find_one({"_id": token})
+    if subscription is None:
+        # Tells the hub to stop delivering to this callback.
+        abort(410)
+    if (request.content_length or 0) > RSS_MAX_BODY_SIZE:
+        abort(413)
+
+    body = request.get_data()
+    method, _, signature = request.headers.get("X-Hub-Signature", "").partition("=")
+    digest = SIGNATURE_METHODS.get(method)
+    if digest is None or not compare_digest(
+        hmac_new(subscription["secret"].encode(), body, digest).hexdigest(), signature
+    ):
+        # Unsigned or forged content is acknowledged but never processed.
+        return "", 202
+
+    database.rss_push_inbox.insert_one({
+        "url": subscription["url"],
+        "content": Binary(body),
+        "received_at": datetime.utcnow(),
+    })
+    return "", 202
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=7860)